@@ -0,0 +1,78 @@
+"""
+Кодеки кэша на ответах размера /all: время кодирования и декодирования,
+размер записи и память Redis (MEMORY USAGE).
+
+Запуск из корня репозитория:
+    PYTHONPATH=src python benchmarks/bench_cache_codec.py [число строк]
+"""
+
+import datetime as dt
+import sys
+import timeit
+
+import redis
+
+from core.cache import CODECS, COMPRESSIONS, CacheSerializer
+from core.config import settings
+
+NUMBER = 5
+KEY = 'bench:cache_codec'
+
+
+def make_rows(count: int) -> list:
+    start = dt.date(2023, 1, 1)
+    return [{
+        'id': index,
+        'exchange_product_id': f'A{index % 900:03d}NVY060F',
+        'exchange_product_name': 'Бензин (АИ-92-К5), ст. Новоярославская',
+        'oil_id': f'A{index % 900:03d}',
+        'delivery_basis_id': 'NVY',
+        'delivery_basis_name': 'ст. Новоярославская',
+        'delivery_type_id': 'F',
+        'volume': 60 * (index % 50 + 1),
+        'total': f'{index * 1234.5:.2f}',
+        'count': index % 20 + 1,
+        'date': (start + dt.timedelta(days=index // 300)).isoformat(),
+        'created_on': '2025-01-15T09:05:26',
+        'updated_on': '2025-01-15T09:05:26'
+    } for index in range(count)]
+
+
+def memory_usage(client: redis.Redis, data: bytes) -> int | None:
+    client.set(KEY, data)
+    try:
+        return client.memory_usage(KEY)
+    except redis.ResponseError:
+        return None
+    finally:
+        client.delete(KEY)
+
+
+def main(counts: list) -> None:
+    client = redis.Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT,
+                         db=settings.REDIS_DB,
+                         password=settings.REDIS_PASSWORD)
+    for count in counts:
+        rows = make_rows(count)
+        print(f'{count} строк')
+        for codec in CODECS:
+            for compression, method in COMPRESSIONS.items():
+                if not method.available:
+                    continue
+                serializer = CacheSerializer(
+                    codec, compression, settings.CACHE_COMPRESS_MIN_BYTES)
+                data = serializer.encode(rows)
+                encode = timeit.timeit(lambda: serializer.encode(rows),
+                                       number=NUMBER) / NUMBER
+                decode = timeit.timeit(lambda: serializer.decode(data),
+                                       number=NUMBER) / NUMBER
+                memory = memory_usage(client, data)
+                memory = f'{memory / 1024:.1f} КБ' if memory else 'н/д'
+                print(f'  {codec:8}{compression:6}'
+                      f'кодирование {encode * 1000:8.2f} мс, '
+                      f'декодирование {decode * 1000:8.2f} мс, '
+                      f'{len(data) / 1024:9.1f} КБ, Redis {memory}')
+
+
+if __name__ == '__main__':
+    main([int(count) for count in sys.argv[1:]] or [1000, 10000])
@@ -0,0 +1,64 @@
+"""
+Построение объектов из таблицы торгов: построчный обход словарей
+против колоночного get_objects.
+
+Запуск из корня репозитория:
+    PYTHONPATH=src python benchmarks/bench_get_objects.py [файлы]
+"""
+
+import sys
+import timeit
+from datetime import datetime
+from decimal import Decimal
+from io import BytesIO
+
+import pandas as pd
+
+from bulletin import filter_spimex, get_objects, make_bulletin
+from models.spimex import SpimexTradingResults
+from services.parse import get_columns
+
+NUMBER = 20
+TIME = '12.09.2025'
+
+
+def legacy(df: pd.DataFrame) -> list:
+    spimex_objects = []
+    for row in df.to_dict(orient='records'):
+        if row['Unnamed: 14'] != '-':
+            date_obj = datetime.strptime(TIME, '%d.%m.%Y').date()
+            spimex_objects.append(SpimexTradingResults(
+                exchange_product_id=row['Форма СЭТ-БТ'],
+                exchange_product_name=row['Unnamed: 2'],
+                oil_id=row['Форма СЭТ-БТ'][:4],
+                delivery_basis_id=row['Форма СЭТ-БТ'][4:7],
+                delivery_basis_name=row['Unnamed: 3'],
+                delivery_type_id=row['Форма СЭТ-БТ'][-1],
+                volume=int(row['Unnamed: 4']) if row['Unnamed: 4'] else None,
+                total=Decimal(
+                    str(row['Unnamed: 5'])) if row['Unnamed: 5'] else None,
+                count=int(row['Unnamed: 14']) if row['Unnamed: 14'] else None,
+                date=date_obj))
+    return spimex_objects
+
+
+def bench(func, df: pd.DataFrame) -> float:
+    return timeit.timeit(lambda: func(df), number=NUMBER) / NUMBER
+
+
+def main(paths: list) -> None:
+    corpus = ([(path, open(path, 'rb').read()) for path in paths] or
+              [(f'synthetic-{rows}', make_bulletin(rows))
+               for rows in (600, 2400)])
+    for name, content in corpus:
+        df = filter_spimex(pd.read_excel(BytesIO(content)))
+        before = bench(legacy, df)
+        objects = bench(lambda df: get_objects(TIME, df), df)
+        columns = bench(lambda df: get_columns(TIME, df), df)
+        print(f'{name} ({len(df)} строк): до {before * 1000:.2f} мс, '
+              f'get_objects {objects * 1000:.2f} мс, '
+              f'get_columns {columns * 1000:.2f} мс')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,134 @@
+"""
+Время запросов services/spimex.py на большой таблице без индексов
+ix_spimex_date / ix_spimex_filters_date и с ними.
+
+Запуск из корня репозитория:
+    PYTHONPATH=src python benchmarks/bench_indexes.py [число строк]
+
+По умолчанию используется временный файл SQLite, для PostgreSQL задайте
+BENCH_POSTGRES_URL (таблица spimex_trading_results будет пересоздана).
+"""
+
+import asyncio
+import datetime as dt
+import os
+import random
+import sys
+import tempfile
+import time
+from decimal import Decimal
+from statistics import median
+
+from sqlalchemy import insert, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from core.database import Base
+from models.spimex import SpimexTradingResults
+from services.spimex import (get_dynamics_spimex, get_last_spimex,
+                             get_trading_results_spimex)
+
+INDEXES = ('ix_spimex_date', 'ix_spimex_filters_date')
+OILS = ('A592', 'A100', 'DT5K', 'DTL5', 'MZ12', 'TS1Z', 'A095', 'SUG1')
+BASES = ('ACN', 'ANK', 'BEZ', 'KRS', 'NVY', 'OMS', 'PRM', 'UFA')
+TYPES = 'FAJ'
+CHUNK = 20000
+REPEAT = 5
+
+
+def make_rows(rows: int):
+    rnd = random.Random(0)
+    products = [(oil, basis, kind, n) for oil in OILS for basis in BASES
+                for kind in TYPES for n in range(10)]
+    day = dt.date(2025, 9, 12)
+    produced = 0
+    while produced < rows:
+        for oil, basis, kind, n in products[:rows - produced]:
+            volume = rnd.randint(1, 5000)
+            yield {
+                'exchange_product_id': f'{oil}{basis}{n:03d}{kind}',
+                'exchange_product_name': 'Бензин',
+                'oil_id': oil,
+                'delivery_basis_id': basis,
+                'delivery_basis_name': 'ст.',
+                'delivery_type_id': kind,
+                'volume': volume,
+                'total': Decimal(volume * 52000),
+                'count': rnd.randint(1, 50),
+                'date': day
+            }
+        produced += len(products)
+        day -= dt.timedelta(days=1)
+
+
+def queries():
+    end = dt.date(2025, 9, 12)
+    start = end - dt.timedelta(days=30)
+    filters = {'oil_id': 'A592', 'delivery_basis_id': 'ACN',
+               'delivery_type_id': 'F'}
+    return {
+        'get_last_spimex': get_last_spimex(limit=10),
+        'get_dynamics': get_dynamics_spimex(start_date=start, end_date=end),
+        'get_dynamics + фильтры': get_dynamics_spimex(
+            start_date=start, end_date=end, **filters),
+        'get_trading_results': get_trading_results_spimex(limit=10),
+        'get_trading_results + фильтры': get_trading_results_spimex(
+            limit=10, **filters)
+    }
+
+
+async def measure(conn) -> dict:
+    timings = {}
+    for name, stmt in queries().items():
+        runs = []
+        for _ in range(REPEAT):
+            start = time.perf_counter()
+            (await conn.execute(stmt)).all()
+            runs.append(time.perf_counter() - start)
+        timings[name] = median(runs)
+    return timings
+
+
+async def run(url: str, rows: int) -> None:
+    engine = create_async_engine(url)
+    table = SpimexTradingResults.__table__
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+        for name in INDEXES:
+            await conn.execute(text(f'DROP INDEX {name}'))
+
+    generated = make_rows(rows)
+    async with engine.begin() as conn:
+        while chunk := [row for _, row in zip(range(CHUNK), generated)]:
+            await conn.execute(insert(table), chunk)
+
+    async with engine.connect() as conn:
+        await conn.execute(text('ANALYZE'))
+        before = await measure(conn)
+        for index in table.indexes:
+            if index.name in INDEXES:
+                await conn.run_sync(index.create)
+        await conn.execute(text('ANALYZE'))
+        await conn.commit()
+        after = await measure(conn)
+
+    print(f'{engine.dialect.name}, {rows:,} строк')
+    for name in before:
+        print(f'  {name}: без индексов {before[name] * 1000:.1f} мс, '
+              f'с индексами {after[name] * 1000:.2f} мс')
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+    await engine.dispose()
+
+
+async def main(rows: int) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'bench.db')
+        await run(f'sqlite+aiosqlite:///{path}', rows)
+    if os.environ.get('BENCH_POSTGRES_URL'):
+        await run(os.environ['BENCH_POSTGRES_URL'], rows)
+
+
+if __name__ == '__main__':
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 3000000))
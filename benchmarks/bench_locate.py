@@ -0,0 +1,44 @@
+"""
+Поиск границ таблицы торгов: построчный df.apply с регулярным выражением
+против векторизованного locate_table.
+
+Запуск из корня репозитория:
+    PYTHONPATH=src python benchmarks/bench_locate.py [файлы]
+"""
+
+import sys
+import timeit
+from io import BytesIO
+
+import pandas as pd
+
+from bulletin import locate_table, make_bulletin
+
+NUMBER = 20
+
+
+def legacy(df: pd.DataFrame) -> tuple:
+    mask = df.apply(
+        lambda row: row.astype(str).str.contains(
+            'Единица измерения: Метрическая тонна').any(), axis=1)
+    start = mask.idxmax() + 3
+    total = df.iloc[start:]['Форма СЭТ-БТ'] == 'Итого:'
+    return start, total.idxmax()
+
+
+def main(paths: list) -> None:
+    corpus = ([(path, open(path, 'rb').read()) for path in paths] or
+              [(f'synthetic-{rows}', make_bulletin(rows))
+               for rows in (300, 600, 1200)])
+    for name, content in corpus:
+        df = pd.read_excel(BytesIO(content))
+        assert legacy(df) == locate_table(df)
+        before = timeit.timeit(lambda: legacy(df), number=NUMBER) / NUMBER
+        after = timeit.timeit(lambda: locate_table(df),
+                              number=NUMBER) / NUMBER
+        print(f'{name} ({len(df)} строк): до {before * 1000:.2f} мс, '
+              f'после {after * 1000:.3f} мс, x{before / after:.0f}')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
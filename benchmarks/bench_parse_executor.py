@@ -0,0 +1,64 @@
+"""
+Разбор пакета бюллетеней в потоке и в пуле процессов: общее время
+и наибольшая задержка цикла событий, которую видят остальные запросы.
+
+Запуск из корня репозитория:
+    PYTHONPATH=src python benchmarks/bench_parse_executor.py [файлы]
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+from bulletin import make_bulletin
+from core.config import settings
+from core.executor import ParseExecutor
+from services.parse import parse_bulletin
+
+TICK = 0.005
+TIME = '12.09.2025'
+
+
+async def probe(stop: asyncio.Event) -> float:
+    """Возвращает наибольшее опоздание тика цикла событий."""
+
+    lag = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lag = max(lag, time.perf_counter() - start - TICK)
+    return lag
+
+
+async def measure(corpus: list, workers: int) -> tuple:
+    settings.PARSE_WORKERS = workers
+    executor = ParseExecutor()
+    executor.start()
+    # Прогрев: запуск процессов пула не входит в замер
+    await asyncio.gather(*(executor.run(parse_bulletin, corpus[0], TIME)
+                           for _ in range(max(workers, 1))))
+    stop = asyncio.Event()
+    lag = asyncio.create_task(probe(stop))
+    start = time.perf_counter()
+    await asyncio.gather(*(executor.run(parse_bulletin, content, TIME)
+                           for content in corpus))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await executor.close()
+    return elapsed, await lag
+
+
+async def main(paths: list) -> None:
+    corpus = ([open(path, 'rb').read() for path in paths] or
+              [make_bulletin(600, seed=seed) for seed in range(8)])
+    for name, workers in (('поток', 0),
+                          ('процессы', os.cpu_count() or 1)):
+        elapsed, lag = await measure(corpus, workers)
+        print(f'{name} ({workers}): {len(corpus)} файлов за '
+              f'{elapsed * 1000:.0f} мс, '
+              f'задержка цикла до {lag * 1000:.1f} мс')
+
+
+if __name__ == '__main__':
+    asyncio.run(main(sys.argv[1:]))
@@ -0,0 +1,62 @@
+"""
+Задержка обработки одной даты: старый путь через запись и повторное
+чтение Excel против обработки в памяти.
+
+Запуск из корня репозитория:
+    PYTHONPATH=src python benchmarks/bench_process_time.py [файлы]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from io import BytesIO
+from statistics import median
+
+import pandas as pd
+
+from bulletin import filter_spimex, make_bulletin
+
+REPEAT = 5
+
+
+def legacy(content: bytes, directory: str) -> list:
+    df = pd.read_excel(BytesIO(content))
+    mask = df.apply(
+        lambda row: row.astype(str).str.contains(
+            'Единица измерения: Метрическая тонна').any(), axis=1)
+    file_name = os.path.join(directory, 'spimex.xls')
+    df.iloc[mask.idxmax() + 3:].to_excel(file_name, index=False,
+                                         engine='openpyxl')
+    return pd.read_excel(file_name, engine='openpyxl').to_dict('records')
+
+
+def in_memory(content: bytes, directory: str) -> list:
+    df = pd.read_excel(BytesIO(content))
+    return filter_spimex(df).to_dict('records')
+
+
+def measure(func, content: bytes, directory: str) -> float:
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        func(content, directory)
+        timings.append(time.perf_counter() - start)
+    return median(timings)
+
+
+def main(paths: list) -> None:
+    corpus = ([(path, open(path, 'rb').read()) for path in paths] or
+              [(f'synthetic-{rows}', make_bulletin(rows))
+               for rows in (300, 600)])
+    with tempfile.TemporaryDirectory() as directory:
+        for name, content in corpus:
+            before = measure(legacy, content, directory)
+            after = measure(in_memory, content, directory)
+            print(f'{name}: до {before * 1000:.1f} мс, '
+                  f'после {after * 1000:.1f} мс, '
+                  f'x{before / after:.2f}')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,108 @@
+"""
+Чтение бюллетеня: весь лист через pd.read_excel и filter_spimex против
+read_bulletin с выбранными колонками на движках openpyxl/xlrd и calamine.
+Для каждого способа меряется медиана времени и пиковый RSS отдельного
+процесса, в котором он выполнялся, сверх памяти после импортов
+(сброс пика через /proc/self/clear_refs есть только в Linux).
+
+Запуск из корня репозитория:
+    PYTHONPATH=src python benchmarks/bench_read_bulletin.py [файлы]
+"""
+
+import multiprocessing
+import resource
+import sys
+import time
+from io import BytesIO
+from statistics import median
+from unittest.mock import patch
+
+import pandas as pd
+
+from bulletin import filter_spimex, make_bulletin
+from services import parse
+from services.parse import read_bulletin
+
+REPEAT = 5
+
+
+def full_sheet(content: bytes) -> pd.DataFrame:
+    return filter_spimex(pd.read_excel(BytesIO(content)))
+
+
+def pruned(content: bytes) -> pd.DataFrame:
+    with patch.object(parse, 'python_calamine', None):
+        return read_bulletin(content)
+
+
+def calamine(content: bytes) -> pd.DataFrame:
+    return read_bulletin(content)
+
+
+READERS = {'весь лист': full_sheet, 'read_bulletin, openpyxl/xlrd': pruned}
+if parse.python_calamine is not None:
+    READERS['read_bulletin, calamine'] = calamine
+
+
+def reset_peak() -> None:
+    # Сбрасывает VmHWM процесса, чтобы в пик не попали импорты (Linux)
+    try:
+        with open('/proc/self/clear_refs', 'w') as file:
+            file.write('5')
+    except OSError:
+        pass
+
+
+def get_peak() -> float:
+    try:
+        with open('/proc/self/status') as file:
+            for line in file:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # ru_maxrss в Linux в килобайтах
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def get_current() -> float:
+    with open('/proc/self/statm') as file:
+        return (int(file.read().split()[1]) *
+                resource.getpagesize() / 1024 / 1024)
+
+
+def measure(name: str, content: bytes, result) -> None:
+    baseline = get_current()
+    reset_peak()
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        READERS[name](content)
+        timings.append(time.perf_counter() - start)
+    result.put((median(timings), get_peak() - baseline))
+
+
+def run(name: str, content: bytes) -> tuple:
+    context = multiprocessing.get_context('spawn')
+    result = context.Queue()
+    process = context.Process(target=measure, args=(name, content, result))
+    process.start()
+    value = result.get()
+    process.join()
+    return value
+
+
+def main(paths: list) -> None:
+    corpus = ([(path, open(path, 'rb').read()) for path in paths] or
+              [(f'synthetic-{rows}', make_bulletin(rows))
+               for rows in (300, 3000)])
+    for name, content in corpus:
+        print(f'{name}:')
+        for reader in READERS:
+            elapsed, rss = run(reader, content)
+            print(f'  {reader}: {elapsed * 1000:.1f} мс, '
+                  f'пиковый RSS +{rss:.1f} МБ')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,100 @@
+"""
+Генератор синтетических бюллетеней Spimex и прежние шаги разбора
+всего листа для сравнения в бенчмарках.
+
+Раскладка листа повторяет реальный бюллетень: шапка, строка
+'Единица измерения: Метрическая тонна', две строки заголовков таблицы,
+строки инструментов, строка 'Итого:' и хвост с другими разделами.
+"""
+
+import random
+from io import BytesIO
+from typing import List, Tuple
+
+import pandas as pd
+
+from models.spimex import SpimexTradingResults
+from services.parse import TOTAL_MARKER, UNIT_MARKER, find_row, get_columns
+
+COLUMNS = 16
+BASES = ('ACN', 'ANK', 'BEZ', 'KRS', 'NVY', 'OMS', 'PRM', 'UFA')
+OILS = ('A592', 'A100', 'DT5K', 'DTL5', 'MZ12', 'TS1Z', 'A095', 'SUG1')
+
+
+def _row(**cells) -> List:
+    row = [None] * COLUMNS
+    for index, value in cells.items():
+        row[int(index[1:])] = value
+    return row
+
+
+def make_grid(rows: int = 500, seed: int = 0) -> List[List]:
+    """Возвращает лист бюллетеня в виде списка строк."""
+
+    rnd = random.Random(seed)
+    grid = [_row(c1='Форма СЭТ-БТ')]
+    grid += [_row(c1=f'Бюллетень по итогам торгов, строка {i}')
+             for i in range(6)]
+    grid.append(_row(c1='Единица измерения: Метрическая тонна'))
+    grid.append(_row(c1='Код Инструмента', c2='Наименование Инструмента',
+                     c3='Базис поставки', c4='Объем Договоров',
+                     c5='Обьем Договоров, руб.', c14='Количество Договоров'))
+    grid.append(_row(c1=None))
+    for i in range(rows):
+        code = (f'{rnd.choice(OILS)}{rnd.choice(BASES)}'
+                f'{i % 1000:03d}{rnd.choice("FAJ")}')
+        if rnd.random() < 0.3:
+            grid.append(_row(c1=code, c2=f'Бензин {i}', c3=f'ст. {i}',
+                             c4='-', c5='-', c14='-'))
+        else:
+            volume = rnd.randint(1, 5000)
+            grid.append(_row(
+                c1=code, c2=f'Бензин {i}', c3=f'ст. {i}', c4=volume,
+                c5=volume * rnd.randint(40000, 80000),
+                c6=rnd.randint(-100, 100), c7=rnd.randint(40000, 80000),
+                c14=rnd.randint(1, 50)))
+    grid.append(_row(c1='Итого:', c4=1, c5=1, c14=1))
+    grid.append(_row(c1='Единица измерения: Кубический метр'))
+    grid += [_row(c1=f'Примечание {i}') for i in range(20)]
+    return grid
+
+
+def make_bulletin(rows: int = 500, seed: int = 0) -> bytes:
+    """Возвращает бюллетень в виде xlsx-файла."""
+
+    buffer = BytesIO()
+    pd.DataFrame(make_grid(rows, seed)).to_excel(
+        buffer, index=False, header=False, engine='openpyxl')
+    return buffer.getvalue()
+
+
+def locate_table(df: pd.DataFrame) -> Tuple[int, int] | None:
+    """
+    Возвращает позиции первой строки данных и строки 'Итого:' (или конца
+    листа) в листе, прочитанном целиком, либо None без таблицы.
+    """
+
+    marker = find_row(df, UNIT_MARKER)
+    if marker is None:
+        return None
+    start = marker + 3
+    end = find_row(df, TOTAL_MARKER, start=start, exact=True)
+    return start, len(df) if end is None else end
+
+
+def filter_spimex(df: pd.DataFrame) -> pd.DataFrame | None:
+    """Вырезает таблицу торгов из листа, прочитанного целиком."""
+
+    bounds = locate_table(df)
+    if bounds is None:
+        return None
+    start, end = bounds
+    return df.iloc[start:end]
+
+
+def get_objects(time: str, df: pd.DataFrame) -> List[SpimexTradingResults]:
+    """Строит объекты SpimexTradingResults из колонок get_columns."""
+
+    columns = get_columns(time, df)
+    return [SpimexTradingResults(**dict(zip(columns, values)))
+            for values in zip(*columns.values())]
@@ -1,14 +1,31 @@
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
+from functools import partial
 
-from core.database import create_database, engine
+from core.database import async_session, create_database, engine
+from core.http import http_manager
+from core.cache import redis_manager
+from core.jobs import job_manager
+from core.executor import parse_executor
+from services.rollup import ensure_rollup
+from services.tasks import run_spimex_job
 from api.routes import router
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await create_database()
+    await ensure_rollup(async_session)
+    await http_manager.get_client()
+    redis_manager.start_listener()
+    parse_executor.start()
+    job_manager.start_worker(
+        partial(run_spimex_job, session_factory=async_session))
     yield
+    await job_manager.close()
+    await parse_executor.close()
+    await redis_manager.close()
+    await http_manager.close()
     await engine.dispose()
 
 
@@ -1,68 +1,113 @@
-from typing import List
+from functools import partial
+from typing import Dict, List
 import datetime as dt
 
-from fastapi import status, Query, APIRouter
-
-from services.spimex import (get_all_spimex, get_last_spimex,
-                             get_dynamics_spimex,
-                             get_trading_results_spimex)
-from services.parse import get_spimex
-from core.dependencies import session_depend
-from core.cache import get_cache, set_cache
+from fastapi import status, Query, APIRouter, HTTPException, Response
+from fastapi.responses import StreamingResponse
+
+from services.spimex import (get_all_spimex, get_dynamics_cached,
+                             get_last_dates_cached,
+                             get_trading_results_cached, fetch_all,
+                             encode_cursor, decode_cursor, stream_spimex,
+                             get_aggregates_cached)
+from services.tasks import run_spimex_job, submit_spimex_job
+from core.dependencies import session_factory_depend, validators_depend
+from core.conditional import Validators
+from core.jobs import job_manager
+from core.cache import (get_or_set_cache, redis_manager, CachedBody,
+                        STALE_COUNTER)
 from schemas.spimex import (SpimexDateModel,
-                            SpimexModel)
+                            SpimexModel,
+                            SpimexAggregateModel,
+                            AggregateField)
 
 
 router = APIRouter()
 
 
-@router.post('/create_spimex', status_code=201)
-async def create_spimex(session: session_depend, date: SpimexDateModel):
-    spimexes = await get_spimex(date.date)
-    session.add_all(spimexes)
-    await session.commit()
-    return {'ok': status.HTTP_201_CREATED}
+def cached_response(cached: CachedBody,
+                    validators: Validators) -> Response:
+    """
+    Отдает закэшированное тело как есть, без повторной валидации
+    и сериализации через response_model, с ETag версии набора данных.
+    """
+    return Response(cached.body, media_type='application/json',
+                    headers={**cached.headers, **validators.headers})
+
+
+@router.post('/create_spimex', status_code=status.HTTP_202_ACCEPTED)
+async def create_spimex(session_factory: session_factory_depend,
+                        date: SpimexDateModel):
+    job_manager.start_worker(
+        partial(run_spimex_job, session_factory=session_factory))
+    job_id = await submit_spimex_job(date.date)
+    return {'ok': status.HTTP_202_ACCEPTED, 'job_id': job_id,
+            'status_url': f'/jobs/{job_id}'}
+
+
+@router.get('/jobs/{job_id}')
+async def get_job(job_id: str):
+    job = await job_manager.get_status(job_id)
+    if job is None:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, 'Задание не найдено')
+    return job
 
 
 @router.get('/all',
             status_code=status.HTTP_200_OK,
             response_model=List[SpimexModel])
-async def get_all(session: session_depend):
-    cached_key = 'all'
-    cached_data = await get_cache(cached_key)
-    if cached_data:
-        return cached_data
-    stmt = get_all_spimex()
-    result = await session.execute(stmt)
-    data = result.scalars().all()
-    if data:
-        await set_cache(cached_key, data, to_dict=True)
-    return data
+async def get_all(
+        session_factory: session_factory_depend,
+        validators: validators_depend,
+        limit: int = Query(None, ge=1, le=10000),
+        cursor: str = Query(None),
+        stream: bool = Query(False)
+        ):
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as error:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, str(error))
+
+    if validators.not_modified:
+        return validators.not_modified_response()
+
+    if stream:
+        return StreamingResponse(
+            stream_spimex(session_factory, get_all_spimex(after=after)),
+            media_type='application/x-ndjson', headers=validators.headers)
+
+    cached_key = ('all' if limit is None and cursor is None
+                  else f'all:{limit}_{cursor}')
+    stmt = get_all_spimex(limit=limit, after=after)
+
+    def next_cursor(data: List[dict]) -> Dict[str, str]:
+        if not limit or len(data) < limit:
+            return {}
+        last = SpimexModel.model_validate(data[-1])
+        return {'X-Next-Cursor': encode_cursor(last.date, last.id)}
+
+    return cached_response(await get_or_set_cache(
+        cached_key, session_factory,
+        lambda session: fetch_all(session, stmt), to_dict=True,
+        headers=next_cursor), validators)
 
 
 @router.get('/get_last_trading_dates')
 async def get_last_trading_dates(
-        session: session_depend,
+        session_factory: session_factory_depend,
+        validators: validators_depend,
         limit: int = Query(5, ge=1, le=100)
         ):
-    cached_key = f'last_trading_dates:{limit}'
-    cached_data = await get_cache(cached_key)
-    if cached_data:
-        return cached_data
-
-    stmt = get_last_spimex(limit=limit)
-    result = await session.execute(stmt)
-    data = result.scalars().all()
-
-    if data:
-        await set_cache(cached_key, data)
-
-    return data
+    if validators.not_modified:
+        return validators.not_modified_response()
+    return cached_response(
+        await get_last_dates_cached(session_factory, limit), validators)
 
 
 @router.get('/get_dynamics')
 async def get_dynamics(
-        session: session_depend,
+        session_factory: session_factory_depend,
+        validators: validators_depend,
         oil_id: str = Query(None, max_length=25),
         delivery_basis_id: str = Query(None, max_length=25),
         delivery_type_id: str = Query(None, max_length=25),
@@ -70,50 +115,69 @@ async def get_dynamics(
         end_date: dt.date = Query()
 
         ):
-    cached_key = (f'get_dynamics:{oil_id}_{delivery_basis_id}_'
-                  f'{delivery_type_id}_{start_date}_{end_date}')
-    cached_data = await get_cache(cached_key)
-    if cached_data:
-        return cached_data
-
-    stmt = get_dynamics_spimex(
+    if validators.not_modified:
+        return validators.not_modified_response()
+    return cached_response(await get_dynamics_cached(
+        session_factory,
         oil_id=oil_id,
         delivery_basis_id=delivery_basis_id,
         delivery_type_id=delivery_type_id,
         start_date=start_date,
         end_date=end_date,
-    )
-    result = await session.execute(stmt)
-    data = result.scalars().all()
-
-    if data:
-        await set_cache(cached_key, data, to_dict=True)
-
-    return data
+    ), validators)
 
 
 @router.get('/get_trading_results', status_code=status.HTTP_200_OK)
 async def get_trading_results(
-        session: session_depend,
+        session_factory: session_factory_depend,
+        validators: validators_depend,
         oil_id: str = Query(None, max_length=25),
         delivery_basis_id: str = Query(None, max_length=25),
         delivery_type_id: str = Query(None, max_length=25),
         limit: int = Query(5, ge=1, le=100)
         ):
-    cached_key = (f'trading_results:{oil_id}_{delivery_basis_id}_'
-                  f'{delivery_type_id}_{limit}')
-    cached_data = await get_cache(cached_key)
-    if cached_data:
-        return cached_data
-    stmt = get_trading_results_spimex(
+    if validators.not_modified:
+        return validators.not_modified_response()
+    return cached_response(await get_trading_results_cached(
+        session_factory,
         oil_id=oil_id,
         delivery_basis_id=delivery_basis_id,
         delivery_type_id=delivery_type_id,
-        limit=limit)
-    result = await session.execute(stmt)
-    data = result.scalars().all()
+        limit=limit), validators)
 
-    if data:
-        await set_cache(cached_key, data, to_dict=True)
 
-    return data
+@router.get('/get_aggregates',
+            status_code=status.HTTP_200_OK,
+            response_model=List[SpimexAggregateModel])
+async def get_aggregates(
+        session_factory: session_factory_depend,
+        validators: validators_depend,
+        start_date: dt.date = Query(),
+        end_date: dt.date = Query(),
+        group_by: List[AggregateField] = Query(['date']),
+        oil_id: str = Query(None, max_length=25),
+        delivery_basis_id: str = Query(None, max_length=25),
+        delivery_type_id: str = Query(None, max_length=25)
+        ):
+    if validators.not_modified:
+        return validators.not_modified_response()
+    try:
+        cached = await get_aggregates_cached(
+            session_factory,
+            start_date=start_date,
+            end_date=end_date,
+            group_by=group_by,
+            oil_id=oil_id,
+            delivery_basis_id=delivery_basis_id,
+            delivery_type_id=delivery_type_id)
+    except ValueError as error:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, str(error))
+    return cached_response(cached, validators)
+
+
+@router.get('/cache_metrics')
+async def get_cache_metrics():
+    client = await redis_manager.get_client()
+    total = await client.get(STALE_COUNTER)
+    return {'stale_served': int(total or 0),
+            'stale_served_process': redis_manager.stale_served}
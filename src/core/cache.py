@@ -1,11 +1,33 @@
+import asyncio
 import json
 import datetime as dt
-from typing import Any
+import logging
+import random
+import secrets
+import time
+from collections import OrderedDict
+from decimal import Decimal
+from typing import (Any, Awaitable, Callable, Dict, Iterable, List,
+                    NamedTuple, Sequence, Tuple)
 
+import msgpack
+import orjson
 import redis.asyncio as redis
+from redis.exceptions import LockError, WatchError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from core.config import settings
 
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
 
 class DateEncoder(json.JSONEncoder):
     """Кастомный JSON encoder для обработки datetime объектов"""
@@ -15,14 +37,342 @@ class DateEncoder(json.JSONEncoder):
         return super().default(obj)
 
 
+INVALIDATE_CHANNEL = 'cache:invalidate'
+STALE_COUNTER = 'cache:stats:stale_served'
+TAG_PREFIX = 'tag:'
+DATASET_VERSION_KEY = 'spimex:dataset_version'
+CODEC_MAGIC = b'\xfe'
+CODEC_VERSION = 1
+
+logger = logging.getLogger(__name__)
+
+
+def format_version(epoch: bytes | None, count: Any) -> str | None:
+    """
+    Собирает версию набора торгов 'эпоха.счетчик' из полей хеша
+    DATASET_VERSION_KEY, None если эпохи еще нет.
+    """
+    if epoch is None:
+        return None
+    return f'{epoch.decode()}.{int(count or 0)}'
+
+
+def encode_default(obj: Any) -> Any:
+    """Приводит даты и Decimal к строкам для бинарных кодеков"""
+    if isinstance(obj, dt.date):
+        return obj.isoformat()
+    if isinstance(obj, Decimal):
+        return str(obj)
+    raise TypeError(f'Тип {type(obj).__name__} не сериализуется')
+
+
+class JsonCodec:
+    """Стандартный json, формат записей до версии с заголовком"""
+    id = 0
+    name = 'json'
+
+    @staticmethod
+    def dumps(value: Any) -> bytes:
+        return json.dumps(value, cls=DateEncoder).encode()
+
+    @staticmethod
+    def loads(data: bytes) -> Any:
+        return json.loads(data)
+
+
+class OrjsonCodec:
+    """JSON через orjson"""
+    id = 1
+    name = 'orjson'
+
+    @staticmethod
+    def dumps(value: Any) -> bytes:
+        return orjson.dumps(value, default=encode_default)
+
+    @staticmethod
+    def loads(data: bytes) -> Any:
+        return orjson.loads(data)
+
+
+class MsgpackCodec:
+    """Двоичный формат msgpack"""
+    id = 2
+    name = 'msgpack'
+
+    @staticmethod
+    def dumps(value: Any) -> bytes:
+        return msgpack.packb(value, default=encode_default)
+
+    @staticmethod
+    def loads(data: bytes) -> Any:
+        return msgpack.unpackb(data)
+
+
+class CachedBody(NamedTuple):
+    """
+    Готовое тело JSON-ответа с дополнительными заголовками.
+    """
+    body: bytes
+    headers: Dict[str, str] = {}
+
+
+def make_body(values: Any,
+              headers: Dict[str, str] | None = None) -> CachedBody:
+    """
+    Сериализует значение в тело ответа.
+
+    Пример:
+        >>> make_body([1]).body
+        b'[1]'
+    """
+    body = orjson.dumps(values, default=encode_default)
+    return CachedBody(body, headers or {})
+
+
+class BodyCodec:
+    """
+    Готовое тело ответа: длина метаданных, метаданные в JSON и тело
+    без перекодирования.
+    """
+    id = 3
+    name = 'body'
+
+    @staticmethod
+    def dumps(value: CachedBody) -> bytes:
+        meta = orjson.dumps({'headers': value.headers})
+        return len(meta).to_bytes(4, 'big') + meta + value.body
+
+    @staticmethod
+    def loads(data: bytes) -> CachedBody:
+        end = 4 + int.from_bytes(data[:4], 'big')
+        meta = orjson.loads(data[4:end])
+        return CachedBody(data[end:], meta['headers'])
+
+
+class NoCompression:
+    id = 0
+    name = 'none'
+    available = True
+
+    @staticmethod
+    def compress(data: bytes) -> bytes:
+        return data
+
+    @staticmethod
+    def decompress(data: bytes) -> bytes:
+        return data
+
+
+class ZstdCompression:
+    """Сжатие zstd, требует пакет zstandard"""
+    id = 1
+    name = 'zstd'
+    available = zstandard is not None
+
+    @staticmethod
+    def compress(data: bytes) -> bytes:
+        return zstandard.ZstdCompressor(level=3).compress(data)
+
+    @staticmethod
+    def decompress(data: bytes) -> bytes:
+        return zstandard.ZstdDecompressor().decompress(data)
+
+
+class Lz4Compression:
+    """Сжатие lz4, требует пакет lz4"""
+    id = 2
+    name = 'lz4'
+    available = lz4_frame is not None
+
+    @staticmethod
+    def compress(data: bytes) -> bytes:
+        return lz4_frame.compress(data)
+
+    @staticmethod
+    def decompress(data: bytes) -> bytes:
+        return lz4_frame.decompress(data)
+
+
+CODECS = {codec.name: codec for codec in (JsonCodec, OrjsonCodec,
+                                          MsgpackCodec)}
+COMPRESSIONS = {compression.name: compression for compression in (
+    NoCompression, ZstdCompression, Lz4Compression)}
+
+
+class CacheSerializer:
+    """
+    Кодирует значения кэша в байты с заголовком формата.
+
+    Заголовок CODEC_MAGIC + (CODEC_VERSION, кодек, сжатие) позволяет
+    читать записи любого кодека и сжатия независимо от текущих настроек,
+    а записи неизвестной версии считать промахом вместо сброса всего кэша.
+    Записи без заголовка читаются как JSON прежнего формата.
+
+    Пример:
+        >>> serializer = CacheSerializer('msgpack', 'zstd', 4096)
+        >>> serializer.decode(serializer.encode([1, 2]))
+        [1, 2]
+    """
+
+    def __init__(self, codec: str, compression: str, min_bytes: int):
+        if codec not in CODECS:
+            raise ValueError(f'Неизвестный кодек кэша: {codec}')
+        if compression not in COMPRESSIONS:
+            raise ValueError(f'Неизвестное сжатие кэша: {compression}')
+        if not COMPRESSIONS[compression].available:
+            raise ValueError(f'Для сжатия {compression} не установлен пакет')
+        self.codec = CODECS[codec]
+        self.compression = COMPRESSIONS[compression]
+        self.min_bytes = min_bytes
+        self._codecs = {codec.id: codec
+                        for codec in (*CODECS.values(), BodyCodec)}
+        self._compressions = {compression.id: compression
+                              for compression in COMPRESSIONS.values()
+                              if compression.available}
+
+    def encode(self, value: Any) -> bytes:
+        """
+        Кодирует значение, сжимая его, если оно не меньше min_bytes.
+        Готовые тела ответов CachedBody всегда хранятся кодеком BodyCodec.
+        """
+        codec = BodyCodec if isinstance(value, CachedBody) else self.codec
+        data = codec.dumps(value)
+        compression = (self.compression if len(data) >= self.min_bytes
+                       else NoCompression)
+        return (CODEC_MAGIC
+                + bytes((CODEC_VERSION, codec.id, compression.id))
+                + compression.compress(data))
+
+    def decode(self, data: bytes) -> Any:
+        """
+        Декодирует запись кэша.
+
+        Returns:
+            Any: Значение или None для записи неизвестного формата
+        """
+        if not data.startswith(CODEC_MAGIC):
+            return json.loads(data)
+        version, codec_id, compression_id = data[1:4]
+        codec = self._codecs.get(codec_id)
+        compression = self._compressions.get(compression_id)
+        if version != CODEC_VERSION or not codec or not compression:
+            return None
+        return codec.loads(compression.decompress(data[4:]))
+
+
+def get_serializer() -> CacheSerializer:
+    """Создает сериализатор кэша по настройкам"""
+    return CacheSerializer(settings.CACHE_CODEC, settings.CACHE_COMPRESSION,
+                           settings.CACHE_COMPRESS_MIN_BYTES)
+
+
+class LocalCache:
+    """
+    Внутрипроцессный LRU-кэш уже декодированных значений с ограничением
+    общего размера в байтах и сроком жизни каждой записи.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._data: OrderedDict[str, Tuple[Any, int, float, float]] = \
+            OrderedDict()
+
+    def get_entry(self, key: str) -> Tuple[Any, bool] | None:
+        """
+        Возвращает значение и признак устаревания или None, если записи
+        нет или истек ее жесткий срок жизни.
+        """
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, _, stale_at, expires_at = item
+        now = time.monotonic()
+        if expires_at <= now:
+            self.delete((key,))
+            return None
+        self._data.move_to_end(key)
+        return value, stale_at <= now
+
+    def get(self, key: str) -> Any:
+        """
+        Возвращает значение по ключу или None, если его нет или оно истекло.
+        """
+        entry = self.get_entry(key)
+        return entry[0] if entry else None
+
+    def set(self, key: str, value: Any, size: int, ttl: float,
+            grace: float = 0) -> None:
+        """
+        Сохраняет значение, вытесняя самые старые записи при переполнении.
+
+        Args:
+            key: Ключ записи
+            value: Декодированное значение
+            size: Размер исходного значения в байтах
+            ttl: Жесткое время жизни в секундах
+            grace: Часть ttl в конце срока жизни, когда значение
+                   считается устаревшим
+        """
+        self.delete((key,))
+        if size > self.max_bytes or ttl <= 0:
+            return
+        now = time.monotonic()
+        self._data[key] = (value, size, now + ttl - grace, now + ttl)
+        self.size += size
+        while self.size > self.max_bytes:
+            _, (_, evicted, _, _) = self._data.popitem(last=False)
+            self.size -= evicted
+
+    def delete(self, keys: Iterable[str]) -> None:
+        for key in keys:
+            item = self._data.pop(key, None)
+            if item:
+                self.size -= item[1]
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.size = 0
+
+
+def get_namespace_tag(key: str) -> str:
+    """
+    Возвращает тег пространства имен ключа по его префиксу до двоеточия.
+
+    Пример:
+        all:100_None -> ns:all
+    """
+    return f'ns:{key.split(":", 1)[0]}'
+
+
 class RedisManager:
     """
     Менеджер для работы с Redis, обеспечивающий ленивую инициализацию клиента
     и управление кэшированием данных.
+
+    Перед Redis стоит внутрипроцессный кэш декодированных значений, записи
+    которого истекают одновременно с ключами Redis. Сброс записей во всех
+    процессах uvicorn рассылается через канал INVALIDATE_CHANNEL.
+
+    Ключи с периодом устаревания (grace) живут в Redis на grace секунд
+    дольше мягкого срока: в этот период значение отдается как устаревшее,
+    пока фоновая задача его пересчитывает.
+
+    Каждый записанный ключ добавляется в множества тегов tag:{тег}:
+    переданные вызывающим кодом теги, а без них ns:{пространство имен}
+    по префиксу ключа. Сброс по тегам читает эти множества вместо SCAN.
+    Ключи, которые по пространству имен не сбрасываются, передают свои
+    теги явно, чтобы не копиться в множестве ns:.
     """
 
     def __init__(self):
         self._client = None
+        self._listener = None
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._background: set[asyncio.Task] = set()
+        self.local = LocalCache(settings.CACHE_LOCAL_MAX_BYTES)
+        self.serializer = get_serializer()
+        self.stale_served = 0
 
     def get_date(self) -> int:
         """
@@ -43,6 +393,17 @@ class RedisManager:
         cache_time = target_time - now
         return int(cache_time.total_seconds())
 
+    def get_ttl(self) -> int:
+        """
+        Вычисляет мягкое время жизни ключа: до 14:11 следующего дня
+        со случайным сдвигом до CACHE_TTL_JITTER секунд, чтобы ключи
+        не истекали одновременно.
+
+        Returns:
+            int: Количество секунд
+        """
+        return self.get_date() + random.randint(0, settings.CACHE_TTL_JITTER)
+
     async def get_client(self) -> redis.Redis:
         """
         Возвращает клиент Redis, инициализируя его при первом вызове.
@@ -58,13 +419,16 @@ class RedisManager:
                 host=settings.REDIS_HOST,
                 port=settings.REDIS_PORT,
                 db=settings.REDIS_DB,
-                password=settings.REDIS_PASSWORD,
-                decode_responses=True
+                password=settings.REDIS_PASSWORD
             )
         return self._client
     
     async def close(self) -> None:
         """Корректно закрывает соединение с Redis"""
+        if self._listener:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
         if self._client:
             await self._client.close()
             self._client = None
@@ -84,16 +448,394 @@ class RedisManager:
         data = await client.get(key)
         return data
 
-    async def set_cached_data(self, key: str, data: Any) -> None:
+    async def set_cached_data(self, key: str, data: Any,
+                              ttl: int | None = None) -> None:
         """
         Сохраняет данные в кэш с автоматическим вычислением времени жизни.
 
         Args:
             key: Ключ для сохранения данных
             data: Данные для кэширования (должны быть сериализуемы в JSON)
+            ttl: Время жизни в секундах. По умолчанию до 14:11
+                 следующего дня
+        """
+        client = await self.get_client()
+        await client.setex(key, ttl or self.get_date(), data)
+
+    async def get_many_cached_data(self, keys: List[str]) -> List[Any]:
+        """
+        Получает значения нескольких ключей одним запросом MGET.
+
+        Args:
+            keys: Ключи для поиска в кэше
+
+        Returns:
+            List[Any]: Значения в порядке ключей, None для отсутствующих
         """
+        if not keys:
+            return []
         client = await self.get_client()
-        await client.setex(key, self.get_date(), data)
+        return await client.mget(keys)
+
+    async def set_many_cached_data(self, data: Dict[str, Any],
+                                   ttl: int | None = None) -> None:
+        """
+        Сохраняет несколько значений одним конвейером Redis.
+
+        Args:
+            data: Значения по ключам (должны быть сериализованы в JSON)
+            ttl: Время жизни в секундах. По умолчанию до 14:11
+                 следующего дня
+        """
+        if not data:
+            return
+        client = await self.get_client()
+        ttl = ttl or self.get_date()
+        async with client.pipeline(transaction=False) as pipe:
+            for key, value in data.items():
+                pipe.setex(key, ttl, value)
+            await pipe.execute()
+
+    async def set_if_version(self, data: Dict[str, bytes], ttl: int,
+                             version: str) -> bool:
+        """
+        Записывает значения одной транзакцией, только если версия набора
+        торгов все еще равна version (WATCH на DATASET_VERSION_KEY).
+
+        Returns:
+            bool: True, если значения записаны
+        """
+        client = await self.get_client()
+        async with client.pipeline(transaction=True) as pipe:
+            await pipe.watch(DATASET_VERSION_KEY)
+            current = format_version(*await pipe.hmget(
+                DATASET_VERSION_KEY, 'epoch', 'count'))
+            if current != version:
+                return False
+            pipe.multi()
+            for key, value in data.items():
+                pipe.setex(key, ttl, value)
+            try:
+                await pipe.execute()
+            except WatchError:
+                return False
+        return True
+
+    async def get_version(self) -> str:
+        """Возвращает версию набора торгов, при необходимости начиная эпоху"""
+        client = await self.get_client()
+        version = format_version(*await client.hmget(
+            DATASET_VERSION_KEY, 'epoch', 'count'))
+        if version is None:
+            await client.hsetnx(DATASET_VERSION_KEY, 'epoch',
+                                secrets.token_hex(4))
+            version = format_version(*await client.hmget(
+                DATASET_VERSION_KEY, 'epoch', 'count'))
+        return version
+
+    async def bump_version(self) -> str:
+        """Увеличивает счетчик версии набора торгов"""
+        client = await self.get_client()
+        async with client.pipeline(transaction=True) as pipe:
+            pipe.hsetnx(DATASET_VERSION_KEY, 'epoch', secrets.token_hex(4))
+            pipe.hincrby(DATASET_VERSION_KEY, 'count', 1)
+            pipe.hget(DATASET_VERSION_KEY, 'epoch')
+            _, count, epoch = await pipe.execute()
+        return format_version(epoch, count)
+
+    async def get_entries(
+            self,
+            keys: List[str],
+            grace: float = 0
+            ) -> List[Tuple[Any, bool]]:
+        """
+        Получает декодированные значения и признаки их устаревания,
+        сначала из локального кэша.
+
+        Промахи читаются из Redis одним конвейером GET + PTTL, чтобы
+        локальная копия истекла одновременно с ключом Redis.
+
+        Args:
+            keys: Ключи для поиска в кэше
+            grace: Период устаревания, с которым были записаны ключи
+
+        Returns:
+            List[Tuple[Any, bool]]: Пары (значение, устарело) в порядке
+            ключей, значение None для отсутствующих
+        """
+        entries = [self.local.get_entry(key) for key in keys]
+        missing = [key for key, entry in zip(keys, entries) if entry is None]
+        if not missing:
+            return entries
+
+        client = await self.get_client()
+        async with client.pipeline(transaction=False) as pipe:
+            for key in missing:
+                pipe.get(key).pttl(key)
+            replies = await pipe.execute()
+
+        loaded = {}
+        for key, data, ttl in zip(missing, replies[::2], replies[1::2]):
+            value = self.serializer.decode(data) if data else None
+            if value is not None:
+                ttl = ttl / 1000
+                loaded[key] = (value, ttl <= grace)
+                self.local.set(key, value, len(data), ttl, grace)
+        return [loaded.get(key, (None, False)) if entry is None else entry
+                for key, entry in zip(keys, entries)]
+
+    async def get_decoded(self, keys: List[str]) -> List[Any]:
+        """
+        Получает декодированные значения, сначала из локального кэша.
+
+        Args:
+            keys: Ключи для поиска в кэше
+
+        Returns:
+            List[Any]: Значения в порядке ключей, None для отсутствующих
+        """
+        return [value for value, _ in await self.get_entries(keys)]
+
+    async def set_values(self, data: Dict[str, Any],
+                         ttl: int | None = None,
+                         grace: int = 0,
+                         tags: Dict[str, Iterable[str]] | None = None,
+                         tagged: bool = True,
+                         version: str | None = None
+                         ) -> None:
+        """
+        Кодирует значения и сохраняет их в Redis и в локальный кэш.
+
+        Args:
+            data: Значения по ключам
+            ttl: Мягкое время жизни в секундах. По умолчанию до 14:11
+                 следующего дня со сдвигом CACHE_TTL_JITTER
+            grace: Сколько секунд после мягкого срока значение еще
+                   отдается как устаревшее
+            tags: Теги по ключам для сброса через invalidate_tags,
+                  вместо тега пространства имен
+            tagged: Если False, ключи не добавляются ни в какие теги
+                    и сбрасываются только по сроку или явным удалением
+            version: Версия набора торгов, прочитанная до загрузки
+                     значений. Если она успела смениться, значения
+                     устарели и не записываются
+        """
+        if not data:
+            return
+        ttl = (ttl or self.get_ttl()) + grace
+        encoded = {key: self.serializer.encode(value)
+                   for key, value in data.items()}
+        if version is None:
+            await self.set_many_cached_data(encoded, ttl)
+        elif not await self.set_if_version(encoded, ttl, version):
+            return
+        if tagged:
+            await self.tag_keys(data, ttl, tags or {})
+        for key, value in data.items():
+            self.local.set(key, value, len(encoded[key]), ttl, grace)
+
+    async def tag_keys(self, keys: Iterable[str], ttl: int,
+                       tags: Dict[str, Iterable[str]]) -> None:
+        """
+        Добавляет ключи в множества их тегов.
+
+        Ключ без переданных тегов получает тег пространства имен.
+        Множество тега живет не меньше самого долгого ключа в нем.
+
+        Args:
+            keys: Записанные ключи
+            ttl: Время жизни ключей в секундах
+            tags: Теги по ключам
+        """
+        members: Dict[str, List[str]] = {}
+        for key in keys:
+            key_tags = tags[key] if key in tags else [get_namespace_tag(key)]
+            for tag in key_tags:
+                members.setdefault(TAG_PREFIX + tag, []).append(key)
+
+        client = await self.get_client()
+        async with client.pipeline(transaction=False) as pipe:
+            for tag, tag_keys in members.items():
+                pipe.sadd(tag, *tag_keys)
+                pipe.expire(tag, ttl, nx=True).expire(tag, ttl, gt=True)
+            await pipe.execute()
+
+    async def invalidate_tags(self, tags: Iterable[str]) -> List[str]:
+        """
+        Удаляет все ключи с указанными тегами во всех процессах.
+
+        Args:
+            tags: Теги, например ns:trading_results или date:2025-01-15
+
+        Returns:
+            List[str]: Удаленные ключи
+        """
+        tags = [TAG_PREFIX + tag for tag in tags]
+        client = await self.get_client()
+        keys = sorted(key.decode() for key in await client.sunion(tags)) \
+            if tags else []
+        if keys:
+            # Удаление ключей, чистка тегов и рассылка сброса одним MULTI
+            async with client.pipeline(transaction=True) as pipe:
+                pipe.delete(*keys)
+                for tag in tags:
+                    pipe.srem(tag, *keys)
+                pipe.publish(INVALIDATE_CHANNEL, json.dumps(keys))
+                await pipe.execute()
+            self.local.delete(keys)
+        return keys
+
+    def refresh(
+            self,
+            key: str,
+            compute: Callable[[], Awaitable[Any]],
+            probe: Callable[[], Awaitable[Any]]
+            ) -> None:
+        """
+        Запускает фоновый пересчет устаревшего значения через single_flight.
+        """
+        self.spawn(self.single_flight(key, compute, probe))
+
+    def spawn(self, coro: Awaitable[Any]) -> asyncio.Task:
+        """
+        Запускает фоновую задачу кэша, ошибки которой только логируются.
+        """
+        task = asyncio.ensure_future(coro)
+        self._background.add(task)
+        task.add_done_callback(self._finish_background)
+        return task
+
+    def _finish_background(self, task: asyncio.Task) -> None:
+        self._background.discard(task)
+        if not task.cancelled() and task.exception():
+            logger.warning('Не удалось обновить кэш: %r', task.exception())
+
+    async def count_stale(self, count: int = 1) -> None:
+        """
+        Учитывает ответы устаревшими данными в процессе и в Redis.
+        """
+        self.stale_served += count
+        client = await self.get_client()
+        await client.incrby(STALE_COUNTER, count)
+
+    async def invalidate(self, keys: List[str] | None = None) -> None:
+        """
+        Удаляет ключи из Redis и рассылает сброс локальных кэшей
+        всем процессам.
+
+        Args:
+            keys: Ключи для удаления. Если не указаны, во всех процессах
+                  очищается только локальный кэш
+        """
+        client = await self.get_client()
+        async with client.pipeline(transaction=True) as pipe:
+            if keys:
+                pipe.delete(*keys)
+            pipe.publish(INVALIDATE_CHANNEL, json.dumps(keys or []))
+            await pipe.execute()
+        if keys:
+            self.local.delete(keys)
+        else:
+            self.local.clear()
+
+    async def listen(self) -> None:
+        """
+        Применяет к локальному кэшу сбросы из канала INVALIDATE_CHANNEL.
+
+        При обрыве соединения подписка восстанавливается с экспоненциальной
+        паузой до CACHE_LISTEN_BACKOFF_MAX секунд. Сбросы, пришедшие без
+        подписки, потеряны, поэтому после каждой подписки локальный кэш
+        очищается целиком.
+        """
+        attempt = 0
+        while True:
+            try:
+                client = await self.get_client()
+                async with client.pubsub() as pubsub:
+                    await pubsub.subscribe(INVALIDATE_CHANNEL)
+                    self.local.clear()
+                    attempt = 0
+                    async for message in pubsub.listen():
+                        if message['type'] != 'message':
+                            continue
+                        keys = json.loads(message['data'])
+                        if keys:
+                            self.local.delete(keys)
+                        else:
+                            self.local.clear()
+            except Exception as error:
+                logger.warning('Подписка на сброс кэша прервана: %r', error)
+            await asyncio.sleep(min(
+                settings.CACHE_LISTEN_BACKOFF * 2 ** attempt,
+                settings.CACHE_LISTEN_BACKOFF_MAX))
+            attempt += 1
+
+    def start_listener(self) -> None:
+        """Запускает фоновую подписку на канал сброса кэша"""
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self.listen())
+
+    async def single_flight(
+            self,
+            key: str,
+            compute: Callable[[], Awaitable[Any]],
+            probe: Callable[[], Awaitable[Any]]
+            ) -> Any:
+        """
+        Выполняет пересчет значения не более одного раза одновременно.
+
+        Конкурентные вызовы с тем же ключом внутри процесса ждут одну
+        общую задачу. Между процессами пересчет защищен блокировкой Redis
+        с коротким сроком аренды: остальные процессы опрашивают кэш через
+        probe и пересчитывают сами, если блокировка снята или аренда
+        истекла без результата.
+
+        Args:
+            key: Ключ пересчитываемого значения
+            compute: Пересчет значения с записью в кэш
+            probe: Чтение значения из кэша, None если его еще нет
+
+        Returns:
+            Any: Результат compute или найденное probe значение
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._compute_locked(
+                key, compute, probe))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _compute_locked(
+            self,
+            key: str,
+            compute: Callable[[], Awaitable[Any]],
+            probe: Callable[[], Awaitable[Any]]
+            ) -> Any:
+        client = await self.get_client()
+        lock = client.lock(f'lock:{key}', timeout=settings.CACHE_LOCK_LEASE,
+                           blocking=False)
+        if await lock.acquire():
+            try:
+                return await compute()
+            finally:
+                try:
+                    await lock.release()
+                except LockError:
+                    pass
+
+        deadline = time.monotonic() + settings.CACHE_LOCK_LEASE
+        while time.monotonic() < deadline:
+            await asyncio.sleep(settings.CACHE_LOCK_POLL)
+            data = await probe()
+            if data is not None:
+                return data
+            if not await client.exists(lock.name):
+                # Владелец закончил, не записав результат: пустой ответ
+                # или ошибка загрузки, ждать дальше нечего
+                data = await probe()
+                return data if data is not None else await compute()
+        return await compute()
 
 
 redis_manager = RedisManager()
@@ -109,12 +851,8 @@ async def get_cache(cached_key: str) -> Any:
     Returns:
         Any: Десериализованные данные или None, если ключ не найден
     """
-    cached_data = await redis_manager.get_cached_data(cached_key)
-
-    if cached_data:
-        return json.loads(cached_data)
-
-    return None
+    [cached_data] = await redis_manager.get_decoded([cached_key])
+    return cached_data
 
 
 async def set_cache(cached_key: str, data: Any, to_dict: bool = False) -> None:
@@ -127,12 +865,144 @@ async def set_cache(cached_key: str, data: Any, to_dict: bool = False) -> None:
         to_dict: Если True, преобразует элементы данных в словари
                  с помощью метода to_dict()
     """
-    if to_dict:
-        await redis_manager.set_cached_data(
-            cached_key, json.dumps(
-                [item.to_dict() for item in data],
-                cls=DateEncoder)
-            )
-    else:
-        await redis_manager.set_cached_data(
-            cached_key, json.dumps([item for item in data], cls=DateEncoder))
+    values = [item.to_dict() if to_dict else item for item in data]
+    await redis_manager.set_values({cached_key: values})
+
+
+async def get_or_set_cache(
+        cached_key: str,
+        session_factory: async_sessionmaker,
+        loader: Callable[[AsyncSession], Awaitable[Sequence[Any]]],
+        to_dict: bool = False,
+        headers: Callable[[List[Any]], Dict[str, str]] | None = None
+        ) -> CachedBody:
+    """
+    Возвращает готовое тело ответа из кэша, а при промахе загружает
+    данные и кэширует их сериализованными.
+
+    Одновременные промахи по одному ключу выполняют loader один раз
+    (см. RedisManager.single_flight). После мягкого срока жизни значение
+    еще CACHE_STALE_GRACE секунд отдается из кэша, а пересчет идет
+    в фоне в собственной сессии.
+
+    Args:
+        cached_key: Ключ кэша
+        session_factory: Фабрика сессий БД для загрузки
+        loader: Загрузка данных из БД в переданной сессии
+        to_dict: Если True, преобразует элементы данных в словари
+                 с помощью метода to_dict()
+        headers: Вычисляет заголовки ответа по загруженным данным,
+                 они кэшируются вместе с телом
+
+    Returns:
+        CachedBody: JSON-тело ответа и заголовки
+    """
+    async def compute() -> CachedBody:
+        version = await redis_manager.get_version()
+        async with session_factory() as session:
+            data = await loader(session)
+        values = [item.to_dict() if to_dict else item for item in data]
+        cached = make_body(values, headers(values) if headers else None)
+        if values:
+            await redis_manager.set_values(
+                {cached_key: cached},
+                grace=settings.CACHE_STALE_GRACE, version=version)
+        return cached
+
+    async def probe() -> CachedBody | None:
+        [(data, stale)] = await redis_manager.get_entries(
+            [cached_key], settings.CACHE_STALE_GRACE)
+        return None if stale or not isinstance(data, CachedBody) else data
+
+    [(cached_data, stale)] = await redis_manager.get_entries(
+        [cached_key], settings.CACHE_STALE_GRACE)
+    if isinstance(cached_data, CachedBody):
+        if stale:
+            redis_manager.refresh(cached_key, compute, probe)
+            await redis_manager.count_stale()
+        return cached_data
+
+    return await redis_manager.single_flight(cached_key, compute, probe)
+
+
+async def get_cache_entries(cached_keys: List[str],
+                            grace: int = 0) -> List[Tuple[Any, bool]]:
+    """
+    Получает данные нескольких ключей кэша с признаками устаревания.
+
+    Args:
+        cached_keys: Ключи для поиска в кэше
+        grace: Период устаревания, с которым были записаны ключи
+
+    Returns:
+        List[Tuple[Any, bool]]: Пары (данные, устарели) в порядке ключей
+    """
+    return await redis_manager.get_entries(cached_keys, grace)
+
+
+async def set_cache_many(data: Dict[str, Any],
+                         ttl: int | None = None,
+                         grace: int = 0,
+                         tags: Dict[str, Iterable[str]] | None = None,
+                         version: str | None = None
+                         ) -> None:
+    """
+    Сериализует и сохраняет несколько значений в кэш Redis.
+
+    Args:
+        data: Данные для кэширования по ключам
+        ttl: Мягкое время жизни в секундах. По умолчанию до 14:11
+             следующего дня
+        grace: Сколько секунд после мягкого срока значения еще
+               отдаются как устаревшие
+        tags: Теги по ключам вместо тега пространства имен
+        version: Версия набора торгов до загрузки данных, см.
+                 RedisManager.set_values
+    """
+    await redis_manager.set_values(data, ttl, grace, tags, version=version)
+
+
+async def invalidate_cache(cached_keys: List[str] | None = None) -> None:
+    """
+    Сбрасывает ключи кэша во всех процессах приложения.
+
+    Args:
+        cached_keys: Ключи для удаления из Redis. Если не указаны,
+                     очищаются только локальные кэши процессов
+    """
+    await redis_manager.invalidate(cached_keys)
+
+
+async def invalidate_cache_tags(tags: Iterable[str]) -> List[str]:
+    """
+    Сбрасывает во всех процессах ключи кэша с указанными тегами.
+
+    Args:
+        tags: Теги ключей, например ns:all или date:2025-01-15
+
+    Returns:
+        List[str]: Удаленные ключи
+    """
+    return await redis_manager.invalidate_tags(tags)
+
+
+async def get_dataset_version() -> str:
+    """
+    Возвращает версию набора торгов 'эпоха.счетчик'. Счетчик растет
+    с каждой загрузкой с изменениями, а эпоха - случайный токен, который
+    хранится рядом с ним: если ключ потерян, начинается новая эпоха и
+    прежние ETag больше не совпадают.
+    """
+    return await redis_manager.get_version()
+
+
+async def bump_dataset_version() -> str:
+    """
+    Увеличивает версию набора торгов, делая устаревшими ETag всех ответов.
+    Вызывается до сброса кэша, чтобы вычисление, начатое по старой
+    версии, не записало устаревшее тело.
+
+    Returns:
+        str: Новая версия
+    """
+    return await redis_manager.bump_version()
@@ -0,0 +1,83 @@
+import datetime as dt
+import hashlib
+from typing import Dict, NamedTuple
+from urllib.parse import urlencode
+
+from fastapi import Request, Response, status
+
+from core.cache import get_dataset_version
+
+PUBLICATION_TIME = dt.time(14, 11)
+
+
+class Validators(NamedTuple):
+    """
+    Заголовки условных запросов для ответа и признак того, что
+    у клиента уже актуальная версия.
+    """
+    headers: Dict[str, str]
+    not_modified: bool
+
+    def not_modified_response(self) -> Response:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED,
+                        headers=self.headers)
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """
+    Проверяет заголовок If-None-Match на совпадение с ETag.
+
+    Пример:
+        >>> etag_matches('W/"v1-a", "v2-b"', '"v2-b"')
+        True
+    """
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+    return '*' in tags or etag in tags
+
+
+def now() -> dt.datetime:
+    return dt.datetime.now()
+
+
+def get_max_age() -> int:
+    """
+    Вычисляет, сколько секунд клиент может хранить ответ: до ближайшей
+    публикации бюллетеня в PUBLICATION_TIME, сегодняшней, если она еще
+    не прошла.
+
+    Пример:
+        в 10:00 -> 15060 (4 ч 11 мин), в 15:00 -> 83460 (23 ч 11 мин)
+    """
+    current = now()
+    target = dt.datetime.combine(current.date(), PUBLICATION_TIME)
+    if target <= current:
+        target += dt.timedelta(days=1)
+    return int((target - current).total_seconds())
+
+
+async def get_validators(request: Request) -> Validators:
+    """
+    Вычисляет сильный ETag ответа по версии набора данных и запросу.
+
+    ETag вида "v{версия}-{хеш пути и параметров}" не зависит от тела
+    ответа, поэтому условный запрос проверяется одним чтением версии
+    без обращения к БД и декодирования кэша. Cache-Control разрешает
+    клиентам хранить ответ до публикации следующего бюллетеня.
+
+    Args:
+        request (Request): Текущий запрос
+
+    Returns:
+        Validators: Заголовки ETag и Cache-Control и признак 304
+    """
+    version = await get_dataset_version()
+    query = urlencode(sorted(request.query_params.multi_items()))
+    digest = hashlib.blake2b(f'{request.url.path}?{query}'.encode(),
+                             digest_size=8).hexdigest()
+    etag = f'"v{version}-{digest}"'
+    headers = {'ETag': etag,
+               'Cache-Control': f'public, max-age={get_max_age()}'}
+    return Validators(headers,
+                      etag_matches(request.headers.get('if-none-match'), etag))
@@ -1,3 +1,5 @@
+import os
+
 from pydantic_settings import BaseSettings
 from pydantic import Field, ConfigDict
 
@@ -15,6 +17,41 @@ class Settings(BaseSettings):
     REDIS_DB: int
     REDIS_PASSWORD: str
     TESTING: bool = Field(default=False)
+    HTTP_POOL_LIMIT: int = Field(default=20)
+    HTTP_POOL_LIMIT_PER_HOST: int = Field(default=8)
+    HTTP_KEEPALIVE_TIMEOUT: float = Field(default=30)
+    HTTP_DNS_CACHE_TTL: int = Field(default=300)
+    HTTP_TIMEOUT: float = Field(default=60)
+    HTTP_REQUEST_TIMEOUT: float = Field(default=30)
+    HTTP_RETRIES: int = Field(default=3)
+    HTTP_BACKOFF_BASE: float = Field(default=0.5)
+    HTTP_BACKOFF_MAX: float = Field(default=10)
+    SPIMEX_INDEX_TTL: int = Field(default=300)
+    SPIMEX_INDEX_MAX_PAGES: int = Field(default=100)
+    SPIMEX_ARCHIVE: bool = Field(default=False)
+    SPIMEX_CONCURRENCY: int = Field(default=4)
+    BULLETIN_STORE_DIR: str = Field(default='bulletins')
+    DOWNLOAD_MAX_BYTES: int = Field(default=50 * 1024 * 1024)
+    DOWNLOAD_CHUNK_BYTES: int = Field(default=64 * 1024)
+    DOWNLOAD_SPOOL_BYTES: int = Field(default=1024 * 1024)
+    CACHE_LOCAL_MAX_BYTES: int = Field(default=64 * 1024 * 1024)
+    CACHE_LOCK_LEASE: float = Field(default=5)
+    CACHE_LOCK_POLL: float = Field(default=0.05)
+    CACHE_EMPTY_TTL: int = Field(default=60)
+    CACHE_LISTEN_BACKOFF: float = Field(default=0.5)
+    CACHE_LISTEN_BACKOFF_MAX: float = Field(default=30)
+    DYNAMICS_SLICE_MAX_DAYS: int = Field(default=366)
+    CACHE_STALE_GRACE: int = Field(default=3600)
+    CACHE_TTL_JITTER: int = Field(default=0)
+    CACHE_CODEC: str = Field(default='orjson')
+    CACHE_COMPRESSION: str = Field(default='none')
+    CACHE_COMPRESS_MIN_BYTES: int = Field(default=4096)
+    JOB_BACKEND: str = Field(default='redis')
+    JOB_TTL: int = Field(default=24 * 60 * 60)
+    JOB_POLL_TIMEOUT: float = Field(default=1)
+    WEB_CONCURRENCY: int = Field(default=1)
+    PARSE_WORKERS: int = Field(default_factory=lambda data: max(
+        1, (os.cpu_count() or 1) // max(1, data['WEB_CONCURRENCY'])))
 
     model_config = ConfigDict(
         env_file='.env',
@@ -1,3 +1,4 @@
+from sqlalchemy import Connection, delete, func, inspect, select
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
 from sqlalchemy.pool import StaticPool
@@ -35,12 +36,47 @@ class Base(DeclarativeBase):
     pass
 
 
+def remove_duplicates(conn: Connection, index) -> None:
+    """
+    Удаляет дубликаты по колонкам уникального индекса, оставляя
+    последнюю вставленную строку.
+    """
+    table = index.table
+    latest = select(func.max(table.c.id)).group_by(*index.columns)
+    conn.execute(delete(table).where(table.c.id.not_in(latest)))
+
+
+def sync_indexes(conn: Connection) -> None:
+    """
+    Создает индексы моделей, которых еще нет в существующих таблицах.
+
+    create_all создает индексы только вместе с новой таблицей, поэтому
+    для уже развернутой БД недостающие индексы досоздаются здесь. Перед
+    уникальным индексом из таблицы удаляются дубликаты.
+    """
+    inspector = inspect(conn)
+    for table in Base.metadata.sorted_tables:
+        existing = {index['name']
+                    for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in existing:
+                continue
+            if index.unique:
+                remove_duplicates(conn, index)
+            index.create(conn)
+
+
 async def create_database():
     async with engine.connect() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(sync_indexes)
         await conn.commit()
 
 
 async def get_session():
     async with async_session() as session:
         yield session
+
+
+def get_session_factory() -> async_sessionmaker:
+    return async_session
@@ -1,7 +1,11 @@
 from fastapi import Depends
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from typing import Annotated
 
-from core.database import get_session
+from core.conditional import Validators, get_validators
+from core.database import get_session, get_session_factory
 
 session_depend = Annotated[AsyncSession, Depends(get_session)]
+session_factory_depend = Annotated[async_sessionmaker,
+                                   Depends(get_session_factory)]
+validators_depend = Annotated[Validators, Depends(get_validators)]
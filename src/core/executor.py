@@ -0,0 +1,53 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable
+
+from core.config import settings
+
+
+class ParseExecutor:
+    """
+    Пул процессов для разбора бюллетеней.
+
+    Чтение Excel и вырезание таблицы занимают процессор на сотни
+    миллисекунд, поэтому выполняются вне цикла событий: в пуле из
+    PARSE_WORKERS процессов или, при PARSE_WORKERS=0, в потоке.
+    Функции и аргументы должны сериализоваться pickle.
+    """
+
+    def __init__(self):
+        self._pool = None
+
+    def start(self) -> None:
+        """Создает пул процессов, если он включен и еще не создан"""
+        if settings.PARSE_WORKERS and self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=settings.PARSE_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'))
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Выполняет функцию в пуле процессов или в потоке.
+
+        Args:
+            func: Функция уровня модуля
+            args: Аргументы функции
+
+        Returns:
+            Any: Результат функции
+        """
+        if not settings.PARSE_WORKERS:
+            return await asyncio.to_thread(func, *args)
+        self.start()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, func, *args)
+
+    async def close(self) -> None:
+        """Останавливает пул, отменяя задачи из очереди"""
+        if self._pool:
+            pool, self._pool = self._pool, None
+            await asyncio.to_thread(pool.shutdown, cancel_futures=True)
+
+
+parse_executor = ParseExecutor()
@@ -0,0 +1,117 @@
+import asyncio
+import random
+from typing import Awaitable, Callable, TypeVar
+
+import aiohttp
+
+from core.config import settings
+
+T = TypeVar('T')
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class HttpManager:
+    """
+    Менеджер общего HTTP-клиента aiohttp для всего конвейера парсинга.
+
+    Одна сессия с ограниченным пулом соединений переиспользуется между
+    вызовами, поэтому keep-alive соединения и DNS-кэш к spimex.com
+    не пересоздаются на каждый запрос.
+    """
+
+    def __init__(self):
+        self._client = None
+
+    def create_connector(self) -> aiohttp.TCPConnector:
+        """
+        Создает коннектор с ограниченным пулом соединений.
+
+        Returns:
+            aiohttp.TCPConnector: Коннектор с лимитами, keep-alive и DNS-кэшем
+        """
+        return aiohttp.TCPConnector(
+            limit=settings.HTTP_POOL_LIMIT,
+            limit_per_host=settings.HTTP_POOL_LIMIT_PER_HOST,
+            keepalive_timeout=settings.HTTP_KEEPALIVE_TIMEOUT,
+            use_dns_cache=True,
+            ttl_dns_cache=settings.HTTP_DNS_CACHE_TTL
+        )
+
+    async def get_client(self) -> aiohttp.ClientSession:
+        """
+        Возвращает общую сессию aiohttp, создавая ее при первом вызове.
+
+        Returns:
+            aiohttp.ClientSession: Сессия с пулом соединений
+        """
+        if self._client is None or self._client.closed:
+            self._client = aiohttp.ClientSession(
+                connector=self.create_connector(),
+                timeout=aiohttp.ClientTimeout(total=settings.HTTP_TIMEOUT)
+            )
+        return self._client
+
+    async def close(self) -> None:
+        """Закрывает сессию и все соединения пула"""
+        if self._client:
+            await self._client.close()
+            self._client = None
+
+
+http_manager = HttpManager()
+
+
+def get_request_timeout() -> aiohttp.ClientTimeout:
+    """Таймаут одного запроса к сайту, меньше общего таймаута сессии"""
+    return aiohttp.ClientTimeout(total=settings.HTTP_REQUEST_TIMEOUT)
+
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Проверяет, имеет ли смысл повторить запрос после ошибки: обрывы
+    соединения, таймауты и ответы из RETRY_STATUSES.
+    """
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status in RETRY_STATUSES
+    return isinstance(error, (aiohttp.ClientError, asyncio.TimeoutError))
+
+
+def get_backoff(attempt: int) -> float:
+    """
+    Возвращает паузу перед повтором: экспоненциальный рост от
+    HTTP_BACKOFF_BASE до HTTP_BACKOFF_MAX со случайной долей (full jitter),
+    чтобы повторы параллельных запросов не приходили на сайт одновременно.
+
+    Args:
+        attempt (int): Номер неудачной попытки, начиная с 0
+
+    Returns:
+        float: Пауза в секундах
+    """
+    return random.uniform(0, min(settings.HTTP_BACKOFF_MAX,
+                                 settings.HTTP_BACKOFF_BASE * 2 ** attempt))
+
+
+async def with_retries(call: Callable[[], Awaitable[T]]) -> T:
+    """
+    Выполняет запрос, повторяя его до HTTP_RETRIES раз при ошибках,
+    для которых is_retryable возвращает True.
+
+    Args:
+        call: Функция без аргументов, возвращающая корутину запроса
+
+    Returns:
+        T: Результат первой успешной попытки
+
+    Пример:
+        >>> html = await with_retries(lambda: fetch_page(client, url))
+    """
+    for attempt in range(settings.HTTP_RETRIES):
+        try:
+            return await call()
+        except Exception as error:
+            if not is_retryable(error):
+                raise
+            await asyncio.sleep(get_backoff(attempt))
+    return await call()
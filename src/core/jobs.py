@@ -0,0 +1,221 @@
+import asyncio
+import datetime as dt
+import logging
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+import orjson
+
+from core.cache import redis_manager
+from core.config import settings
+
+JOB_QUEUE = 'jobs:queue'
+JOB_STATUS_PREFIX = 'jobs:status:'
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryJobBackend:
+    """
+    Очередь и статусы заданий в памяти процесса. Используется в тестах
+    и при запуске без Redis.
+    """
+
+    def __init__(self):
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._status: Dict[str, bytes] = {}
+
+    async def push(self, job_id: str, payload: Dict[str, Any]) -> None:
+        await self._queue.put((job_id, payload))
+
+    async def pop(self, timeout: float) -> Tuple[str, Dict[str, Any]] | None:
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def save(self, job_id: str, status: Dict[str, Any]) -> None:
+        self._status[job_id] = orjson.dumps(status)
+
+    async def load(self, job_id: str) -> Dict[str, Any] | None:
+        data = self._status.get(job_id)
+        return orjson.loads(data) if data else None
+
+
+class RedisJobBackend:
+    """
+    Очередь заданий в списке Redis JOB_QUEUE, общая для всех процессов,
+    и статусы в ключах JOB_STATUS_PREFIX со сроком жизни JOB_TTL.
+    """
+
+    async def push(self, job_id: str, payload: Dict[str, Any]) -> None:
+        client = await redis_manager.get_client()
+        await client.rpush(JOB_QUEUE,
+                           orjson.dumps({'id': job_id, 'payload': payload}))
+
+    async def pop(self, timeout: float) -> Tuple[str, Dict[str, Any]] | None:
+        client = await redis_manager.get_client()
+        reply = await client.blpop([JOB_QUEUE], timeout=timeout)
+        if not reply:
+            return None
+        data = orjson.loads(reply[1])
+        return data['id'], data['payload']
+
+    async def save(self, job_id: str, status: Dict[str, Any]) -> None:
+        client = await redis_manager.get_client()
+        await client.set(JOB_STATUS_PREFIX + job_id, orjson.dumps(status),
+                         ex=settings.JOB_TTL)
+
+    async def load(self, job_id: str) -> Dict[str, Any] | None:
+        client = await redis_manager.get_client()
+        data = await client.get(JOB_STATUS_PREFIX + job_id)
+        return orjson.loads(data) if data else None
+
+
+JOB_BACKENDS = {'memory': MemoryJobBackend, 'redis': RedisJobBackend}
+
+
+class Job:
+    """
+    Выполняемое задание. Обработчик меняет status и сохраняет его,
+    чтобы ход выполнения был виден через JobManager.get_status.
+    """
+
+    def __init__(self, backend, job_id: str, status: Dict[str, Any]):
+        self.backend = backend
+        self.id = job_id
+        self.status = status
+
+    async def save(self) -> None:
+        await self.backend.save(self.id, self.status)
+
+    async def update(self, **fields: Any) -> None:
+        self.status.update(fields)
+        await self.save()
+
+
+def now() -> str:
+    return dt.datetime.now(dt.timezone.utc).isoformat()
+
+
+class JobManager:
+    """
+    Менеджер фоновых заданий: постановка в очередь, статусы и воркер.
+
+    Воркер - задача asyncio в каждом процессе приложения, которая берет
+    задания из общей очереди и выполняет их обработчиком по одному.
+    Бэкенд очереди выбирается настройкой JOB_BACKEND.
+    """
+
+    def __init__(self):
+        self._backend = None
+        self._worker = None
+        self._handler = None
+
+    def get_backend(self):
+        """
+        Возвращает бэкенд очереди, создавая его при первом вызове.
+
+        Raises:
+            ValueError: Если JOB_BACKEND указывает неизвестный бэкенд
+        """
+        if self._backend is None:
+            if settings.JOB_BACKEND not in JOB_BACKENDS:
+                raise ValueError(
+                    f'Неизвестный бэкенд заданий: {settings.JOB_BACKEND}')
+            self._backend = JOB_BACKENDS[settings.JOB_BACKEND]()
+        return self._backend
+
+    def start_worker(
+            self,
+            handler: Callable[[Job, Dict[str, Any]], Awaitable[None]]
+            ) -> None:
+        """
+        Запускает воркер, если он еще не запущен.
+
+        Args:
+            handler: Обработчик задания, получает Job и данные задания
+        """
+        if self._worker is None or self._worker.done():
+            self._handler = handler
+            self._worker = asyncio.create_task(self.work())
+
+    async def submit(self, payload: Dict[str, Any],
+                     **status: Any) -> str:
+        """
+        Ставит задание в очередь.
+
+        Args:
+            payload: Данные задания для обработчика
+            status: Дополнительные поля начального статуса
+
+        Returns:
+            str: Идентификатор задания
+        """
+        job_id = uuid.uuid4().hex
+        backend = self.get_backend()
+        await backend.save(job_id, {
+            'id': job_id,
+            'state': 'queued',
+            'created_at': now(),
+            'started_at': None,
+            'finished_at': None,
+            'seconds': None,
+            'error': None,
+            **status
+        })
+        await backend.push(job_id, payload)
+        return job_id
+
+    async def get_status(self, job_id: str) -> Dict[str, Any] | None:
+        """
+        Возвращает статус задания или None, если задание не найдено.
+        """
+        return await self.get_backend().load(job_id)
+
+    async def work(self) -> None:
+        """
+        Выполняет задания из очереди до отмены. Ошибка очереди или записи
+        статуса не останавливает воркер: она пишется в лог, и после паузы
+        JOB_POLL_TIMEOUT опрос продолжается.
+        """
+        backend = self.get_backend()
+        while True:
+            try:
+                item = await backend.pop(settings.JOB_POLL_TIMEOUT)
+                if item:
+                    await self.run(*item)
+            except Exception:
+                logger.exception('Ошибка воркера заданий')
+                await asyncio.sleep(settings.JOB_POLL_TIMEOUT)
+
+    async def run(self, job_id: str, payload: Dict[str, Any]) -> None:
+        """
+        Выполняет одно задание, записывая время и итоговое состояние.
+        Ошибка обработчика завершает задание в состоянии failed.
+        """
+        backend = self.get_backend()
+        status = await backend.load(job_id) or {'id': job_id}
+        job = Job(backend, job_id, status)
+        await job.update(state='running', started_at=now())
+        started = time.monotonic()
+        try:
+            await self._handler(job, payload)
+        except Exception as error:
+            logger.exception('Задание %s завершилось ошибкой', job_id)
+            result = {'state': 'failed', 'error': str(error)}
+        else:
+            result = {'state': 'done'}
+        await job.update(**result, finished_at=now(),
+                         seconds=round(time.monotonic() - started, 3))
+
+    async def close(self) -> None:
+        """Останавливает воркер"""
+        if self._worker:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+            self._worker = None
+
+
+job_manager = JobManager()
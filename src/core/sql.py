@@ -0,0 +1,47 @@
+from sqlalchemy import Date
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
+from sqlalchemy.sql.visitors import InternalTraversal
+
+SQLITE_PERIODS = {
+    'date': (),
+    'week': ('weekday 0', '-6 days'),
+    'month': ('start of month',),
+}
+
+
+class date_trunc(FunctionElement):
+    """
+    Начало периода (день, неделя с понедельника или месяц) для даты.
+
+    На PostgreSQL компилируется в date_trunc, на SQLite в date()
+    с модификаторами.
+
+    Пример:
+        >>> select(date_trunc('month', SpimexTradingResults.date))
+    """
+    type = Date()
+    inherit_cache = True
+    _traverse_internals = FunctionElement._traverse_internals + [
+        ('period', InternalTraversal.dp_string)]
+
+    def __init__(self, period: str, column):
+        if period not in SQLITE_PERIODS:
+            raise ValueError(f'Неизвестный период: {period}')
+        self.period = period
+        super().__init__(column)
+
+
+@compiles(date_trunc)
+def compile_date_trunc_sqlite(element, compiler, **kw):
+    column = compiler.process(element.clauses, **kw)
+    modifiers = ''.join(f", '{modifier}'"
+                        for modifier in SQLITE_PERIODS[element.period])
+    return f'date({column}{modifiers})'
+
+
+@compiles(date_trunc, 'postgresql')
+def compile_date_trunc_postgresql(element, compiler, **kw):
+    column = compiler.process(element.clauses, **kw)
+    period = 'day' if element.period == 'date' else element.period
+    return f"CAST(date_trunc('{period}', {column}) AS DATE)"
@@ -0,0 +1,125 @@
+import asyncio
+import datetime as dt
+import hashlib
+import os
+import shutil
+from pathlib import Path
+from typing import Any, BinaryIO, Dict
+
+import orjson
+
+from core.config import settings
+
+META_FILE = 'meta.json'
+
+
+def get_hash(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def write_atomic(path: Path, data: bytes | BinaryIO) -> None:
+    """Записывает файл через временный, чтобы не оставить его обрезанным"""
+    temp = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+    with open(temp, 'wb') as file:
+        if isinstance(data, bytes):
+            file.write(data)
+        else:
+            shutil.copyfileobj(data, file)
+    os.replace(temp, path)
+
+
+class BulletinStore:
+    """
+    Хранилище скачанных бюллетеней на локальном диске.
+
+    Файлы лежат в BULLETIN_STORE_DIR/{дата}/{sha256}, рядом meta.json
+    с хэшем последней версии, ее ETag и Last-Modified для условного
+    запроса и хэшем версии, которая уже записана в БД. Одинаковое
+    содержимое хранится один раз, старые версии не удаляются.
+    """
+
+    def get_dir(self, time: str) -> Path:
+        date = dt.datetime.strptime(time, '%d.%m.%Y').date()
+        return Path(settings.BULLETIN_STORE_DIR) / date.isoformat()
+
+    def get_path(self, time: str, digest: str) -> Path:
+        return self.get_dir(time) / digest
+
+    def _load(self, time: str) -> Dict[str, Any]:
+        try:
+            meta = orjson.loads((self.get_dir(time) / META_FILE).read_bytes())
+        except FileNotFoundError:
+            return {}
+        if not self.get_path(time, meta['sha256']).exists():
+            # Без файла на диске ответ 304 нечем разобрать
+            meta.update(etag=None, last_modified=None)
+        return meta
+
+    def _save_meta(self, time: str, **fields: Any) -> Dict[str, Any]:
+        meta = {'sha256': None, 'etag': None, 'last_modified': None,
+                'ingested': None}
+        try:
+            meta.update(orjson.loads(
+                (self.get_dir(time) / META_FILE).read_bytes()))
+        except FileNotFoundError:
+            pass
+        meta.update(fields)
+        write_atomic(self.get_dir(time) / META_FILE, orjson.dumps(meta))
+        return meta
+
+    def _save(self, time: str, content: bytes | BinaryIO,
+              etag: str | None, last_modified: str | None,
+              digest: str | None) -> str:
+        digest = digest or get_hash(content)
+        path = self.get_path(time, digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            write_atomic(path, content)
+        self._save_meta(time, sha256=digest, etag=etag,
+                        last_modified=last_modified)
+        return digest
+
+    def _mark_ingested(self, time: str) -> None:
+        meta = self._load(time)
+        if meta:
+            self._save_meta(time, ingested=meta['sha256'])
+
+    async def load(self, time: str) -> Dict[str, Any]:
+        """
+        Возвращает метаданные даты или пустой словарь, если бюллетень
+        за нее еще не скачивался. ETag и Last-Modified сбрасываются,
+        если файла последней версии нет на диске.
+        """
+        return await asyncio.to_thread(self._load, time)
+
+    async def save(self, time: str, content: bytes | BinaryIO,
+                   etag: str | None = None,
+                   last_modified: str | None = None,
+                   digest: str | None = None) -> str:
+        """
+        Сохраняет скачанный бюллетень и делает его последней версией даты.
+
+        Args:
+            time (str): Дата торгов в формате 'dd.mm.YYYY'
+            content (bytes | BinaryIO): Содержимое файла или открытый
+                файл, который копируется на диск без чтения в память
+            etag (str | None): Заголовок ETag ответа
+            last_modified (str | None): Заголовок Last-Modified ответа
+            digest (str | None): SHA-256 содержимого, обязателен для
+                файла, для байтов вычисляется
+
+        Returns:
+            str: SHA-256 содержимого
+
+        Пример:
+            >>> digest = await bulletin_store.save("12.05.2023", content)
+        """
+        return await asyncio.to_thread(self._save, time, content, etag,
+                                       last_modified, digest)
+
+    async def mark_ingested(self, time: str) -> None:
+        """Отмечает последнюю версию даты как записанную в БД"""
+        await asyncio.to_thread(self._mark_ingested, time)
+
+
+bulletin_store = BulletinStore()
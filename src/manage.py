@@ -0,0 +1,63 @@
+"""
+Служебные команды.
+
+Запуск из каталога src:
+    python manage.py backfill [--start 2025-01-01] [--end 2025-01-31]
+    python manage.py check [--start 2025-01-01] [--end 2025-01-31]
+"""
+
+import argparse
+import asyncio
+import datetime as dt
+import sys
+
+from core.cache import bump_dataset_version, invalidate_cache_tags, \
+    redis_manager
+from core.database import async_session, create_database, engine
+from services.rollup import backfill_rollup, check_rollup
+
+
+async def backfill(start_date: dt.date | None,
+                   end_date: dt.date | None) -> int:
+    async with async_session() as session:
+        count = await backfill_rollup(session, start_date, end_date)
+    await bump_dataset_version()
+    await invalidate_cache_tags(['ns:aggregates'])
+    print(f'Пересчитано дат: {count}')
+    return 0
+
+
+async def check(start_date: dt.date | None,
+                end_date: dt.date | None) -> int:
+    async with async_session() as session:
+        dates = await check_rollup(session, start_date, end_date)
+    for date in dates:
+        print(f'Расхождение за {date.isoformat()}')
+    print(f'Дат с расхождениями: {len(dates)}')
+    return 1 if dates else 0
+
+
+async def main(args: argparse.Namespace) -> int:
+    await create_database()
+    try:
+        return await args.command(args.start, args.end)
+    finally:
+        await redis_manager.close()
+        await engine.dispose()
+
+
+def parse_args(argv: list) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    commands = parser.add_subparsers(required=True)
+    for name, command, help_text in (
+            ('backfill', backfill, 'Заполнить таблицу дневных сумм'),
+            ('check', check, 'Сверить дневные суммы с таблицей торгов')):
+        subparser = commands.add_parser(name, help=help_text)
+        subparser.set_defaults(command=command)
+        subparser.add_argument('--start', type=dt.date.fromisoformat)
+        subparser.add_argument('--end', type=dt.date.fromisoformat)
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    sys.exit(asyncio.run(main(parse_args(sys.argv[1:]))))
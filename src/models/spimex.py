@@ -2,14 +2,21 @@ from decimal import Decimal
 import datetime as dt
 
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import text, Numeric
+from sqlalchemy import BigInteger, Index, text, Numeric
 
 from core.database import Base
 
 
 class SpimexTradingResults(Base):
     __tablename__ = 'spimex_trading_results'
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        Index('uq_spimex_product_date', 'exchange_product_id', 'date',
+              unique=True),
+        Index('ix_spimex_date', 'date'),
+        Index('ix_spimex_filters_date', 'oil_id', 'delivery_basis_id',
+              'delivery_type_id', 'date'),
+        {'extend_existing': True}
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     exchange_product_id: Mapped[str]
@@ -45,3 +52,26 @@ class SpimexTradingResults(Base):
             'created_on': self.created_on.isoformat(),
             'updated_on': self.updated_on.isoformat()
         }
+
+
+class SpimexDailyRollup(Base):
+    """
+    Суммы торгов за день по нефтепродукту, базису и типу поставки.
+
+    Пересчитывается за загруженные даты в транзакции загрузки
+    (см. services.rollup.refresh_rollup).
+    """
+    __tablename__ = 'spimex_daily_rollup'
+    __table_args__ = (
+        Index('ix_spimex_rollup_filters_date', 'oil_id', 'delivery_basis_id',
+              'delivery_type_id', 'date'),
+        {'extend_existing': True}
+    )
+
+    date: Mapped[dt.date] = mapped_column(primary_key=True)
+    oil_id: Mapped[str] = mapped_column(primary_key=True)
+    delivery_basis_id: Mapped[str] = mapped_column(primary_key=True)
+    delivery_type_id: Mapped[str] = mapped_column(primary_key=True)
+    volume: Mapped[int | None] = mapped_column(BigInteger)
+    total: Mapped[Decimal | None] = mapped_column(Numeric(18, 2))
+    count: Mapped[int | None]
@@ -1,12 +1,27 @@
-from typing import Tuple
+from typing import Literal, Tuple
 from decimal import Decimal
 import datetime as dt
 
-from pydantic import BaseModel, constr, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, field_validator
+
+
+AggregateField = Literal['oil_id', 'delivery_basis_id', 'delivery_type_id',
+                         'date', 'week', 'month']
 
 
 class SpimexDateModel(BaseModel):
-    date: Tuple[constr(min_length=8, max_length=10), ...]
+    date: Tuple[str, ...]
+
+    @field_validator('date')
+    @classmethod
+    def check_format(cls, value: Tuple[str, ...]) -> Tuple[str, ...]:
+        """Даты торгов в формате бюллетеней 'dd.mm.YYYY'"""
+        for time in value:
+            try:
+                dt.datetime.strptime(time, '%d.%m.%Y')
+            except ValueError:
+                raise ValueError(f'Дата {time} не в формате dd.mm.YYYY')
+        return value
 
 
 class SpimexBaseModel(BaseModel):
@@ -42,3 +57,11 @@ class SpimexModel(SpimexBaseModel):
 
     model_config = ConfigDict(from_attributes=True,
                               arbitrary_types_allowed=True)
+
+
+class SpimexAggregateModel(SpimexBaseModel):
+    period: dt.date | None = None
+    volume: int | None
+    total: Decimal | None
+    count: int | None
+    vwap: Decimal | None
@@ -0,0 +1,163 @@
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import Insert, func, literal_column, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.spimex import SpimexTradingResults
+from services.rollup import refresh_rollup
+
+INSERT_COLUMNS = (
+    'exchange_product_id',
+    'exchange_product_name',
+    'oil_id',
+    'delivery_basis_id',
+    'delivery_basis_name',
+    'delivery_type_id',
+    'volume',
+    'total',
+    'count',
+    'date'
+)
+KEY_COLUMNS = ('exchange_product_id', 'date')
+VALUE_COLUMNS = tuple(name for name in INSERT_COLUMNS
+                      if name not in KEY_COLUMNS)
+STAGING_TABLE = 'spimex_trading_results_staging'
+
+Row = Tuple[Any, ...]
+
+
+def get_rows(columns: Dict[str, List[Any]]) -> List[Row]:
+    """
+    Собирает кортежи строк из колонок в порядке INSERT_COLUMNS.
+
+    Args:
+        columns (Dict[str, List[Any]]): Значения по именам полей модели
+
+    Returns:
+        List[Row]: Строки для вставки
+    """
+    return list(zip(*(columns.get(name, []) for name in INSERT_COLUMNS)))
+
+
+def get_key(row: Row) -> Tuple[Any, ...]:
+    return tuple(row[INSERT_COLUMNS.index(name)] for name in KEY_COLUMNS)
+
+
+def get_values(row: Row) -> Tuple[Any, ...]:
+    return tuple(row[INSERT_COLUMNS.index(name)] for name in VALUE_COLUMNS)
+
+
+def on_conflict_update(stmt: Insert) -> Insert:
+    """
+    Дополняет insert() диалекта обновлением строки при конфликте
+    по естественному ключу.
+    """
+    return stmt.on_conflict_do_update(
+        index_elements=KEY_COLUMNS,
+        set_={
+            **{name: stmt.excluded[name] for name in VALUE_COLUMNS},
+            'updated_on': func.current_timestamp()
+        }
+    )
+
+
+async def copy_upsert(session: AsyncSession, rows: List[Row]) -> None:
+    """
+    Загружает строки через COPY asyncpg во временную таблицу и переносит
+    их одним INSERT ... SELECT ... ON CONFLICT DO UPDATE.
+
+    Args:
+        session (AsyncSession): Сессия PostgreSQL с драйвером asyncpg
+        rows (List[Row]): Строки в порядке INSERT_COLUMNS
+    """
+    table = SpimexTradingResults.__table__
+    columns = ', '.join(INSERT_COLUMNS)
+    await session.execute(text(
+        f'CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE} ON COMMIT DROP '
+        f'AS SELECT {columns} FROM {table.name} WITH NO DATA'))
+
+    connection = await session.connection()
+    raw_connection = await connection.get_raw_connection()
+    await raw_connection.driver_connection.copy_records_to_table(
+        STAGING_TABLE, records=rows, columns=INSERT_COLUMNS)
+
+    staged = select(*(literal_column(name) for name in INSERT_COLUMNS)
+                    ).select_from(text(STAGING_TABLE))
+    await session.execute(on_conflict_update(
+        postgresql.insert(table).from_select(INSERT_COLUMNS, staged)))
+    await session.execute(text(f'TRUNCATE {STAGING_TABLE}'))
+
+
+async def upsert_rows(session: AsyncSession, rows: List[Row]) -> None:
+    """
+    Записывает строки как INSERT ... ON CONFLICT DO UPDATE.
+
+    На PostgreSQL строки загружаются через COPY во временную таблицу,
+    на SQLite пишутся одним executemany.
+
+    Args:
+        session (AsyncSession): Сессия БД
+        rows (List[Row]): Строки в порядке INSERT_COLUMNS
+    """
+    if session.get_bind().dialect.name == 'postgresql':
+        await copy_upsert(session, rows)
+    else:
+        await session.execute(
+            on_conflict_update(sqlite.insert(SpimexTradingResults)),
+            [dict(zip(INSERT_COLUMNS, row)) for row in rows]
+        )
+
+
+async def ingest(session: AsyncSession,
+                 columns: Dict[str, List[Any]]) -> Dict[str, int]:
+    """
+    Идемпотентно записывает торговые результаты по ключу
+    (exchange_product_id, date).
+
+    Строки сравниваются с уже записанными за те же даты: новые
+    вставляются, изменившиеся обновляются, совпадающие не пишутся вовсе,
+    поэтому повторная загрузка даты почти ничего не стоит. Дневные суммы
+    за даты с изменениями пересчитываются в той же транзакции. Фиксацию
+    транзакции выполняет вызывающий код.
+
+    Args:
+        session (AsyncSession): Сессия БД
+        columns (Dict[str, List[Any]]): Значения по именам полей модели,
+            как их возвращает get_spimex
+
+    Returns:
+        Dict[str, int]: Количество вставленных, обновленных
+        и неизменившихся строк
+
+    Пример:
+        >>> counts = await ingest(session, columns)
+        >>> await session.commit()
+    """
+    rows = {get_key(row): row for row in get_rows(columns)}
+    counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+    if not rows:
+        return counts
+
+    model = SpimexTradingResults
+    stmt = select(*(getattr(model, name) for name in INSERT_COLUMNS)).where(
+        model.date.in_({date for _, date in rows}))
+    existing = {get_key(row): get_values(row)
+                for row in (await session.execute(stmt)).tuples()}
+
+    changed = []
+    for key, row in rows.items():
+        if key not in existing:
+            counts['inserted'] += 1
+        elif existing[key] != get_values(row):
+            counts['updated'] += 1
+        else:
+            counts['unchanged'] += 1
+            continue
+        changed.append(row)
+
+    if changed:
+        await upsert_rows(session, changed)
+        date_index = INSERT_COLUMNS.index('date')
+        await refresh_rollup(session, {row[date_index] for row in changed})
+    return counts
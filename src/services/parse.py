@@ -1,24 +1,166 @@
-
 import asyncio
+import hashlib
+import os
 from datetime import datetime
 from decimal import Decimal
+from functools import partial
 from io import BytesIO
-from typing import Any, List, Dict, Tuple
+from tempfile import SpooledTemporaryFile
+from time import monotonic
+from typing import (Any, Awaitable, BinaryIO, Callable, List, Dict,
+                    Iterable, NamedTuple, Tuple)
+from urllib.parse import urljoin
 
 import aiohttp
 from bs4 import BeautifulSoup
+import numpy as np
 import pandas as pd
 
-from models.spimex import SpimexTradingResults
+try:
+    import python_calamine
+except ImportError:
+    python_calamine = None
+
+from core.cache import get_cache, redis_manager
+from core.config import settings
+from core.executor import parse_executor
+from core.http import get_request_timeout, with_retries
+from core.store import bulletin_store
 
 url = 'https://spimex.com/markets/oil_products/trades/results/'
 
+UNIT_MARKER = 'Единица измерения: Метрическая тонна'
+TOTAL_MARKER = 'Итого:'
+MARKER_COLUMNS = 2
+SCAN_CHUNK = 256
+HEADER_SCAN_ROWS = 100
+XLS_MAGIC = b'\xd0\xcf\x11\xe0'
+BULLETIN_COLUMNS = {
+    1: 'Форма СЭТ-БТ',
+    2: 'Unnamed: 2',
+    3: 'Unnamed: 3',
+    4: 'Unnamed: 4',
+    5: 'Unnamed: 5',
+    14: 'Unnamed: 14'
+}
+BULLETIN_DTYPES = {1: str, 2: str, 3: str, 4: object, 5: object, 14: object}
+
+
+def parse_index(html: str) -> Tuple[Dict[str, str], str | None]:
+    """
+    Разбирает страницу списка бюллетеней Spimex.
 
-async def parse_href(url: str, time: str) -> str | None:
+    Args:
+        html (str): HTML страницы результатов торгов
+
+    Returns:
+        Tuple[Dict[str, str], str | None]: Отображение даты торгов
+        в ссылку на xls-файл и ссылка на следующую страницу списка,
+        если она есть
+    """
+
+    soup = BeautifulSoup(html, 'html.parser')
+    index = {}
+    div = soup.find('div', id='comp_d609bce6ada86eff0b6f7e49e6bae904')
+    if div:
+        for div_item in div.find_all('div',
+                                     class_='accordeon-inner__wrap-item'):
+            span = div_item.find('span')
+            a = div_item.find('a',
+                              class_='accordeon-inner__item-title link xls')
+            if span and a and a.get('href'):
+                index.setdefault(
+                    span.text.strip(),
+                    f"https://spimex.com{a['href'].split('?')[0]}")
+
+    next_page = soup.select_one('.bx-pagination .bx-pag-next a[href]')
+    return index, next_page['href'] if next_page else None
+
+
+async def fetch_page(client: aiohttp.ClientSession, page_url: str) -> str:
+    """Скачивает страницу списка бюллетеней"""
+
+    async with client.get(page_url,
+                          timeout=get_request_timeout()) as response:
+        response.raise_for_status()
+        return await response.text()
+
+
+def _to_date(time: str) -> datetime | None:
+    try:
+        return datetime.strptime(time, '%d.%m.%Y')
+    except ValueError:
+        return None
+
+
+async def fetch_index(
+        client: aiohttp.ClientSession,
+        url: str,
+        times: Iterable[str]
+        ) -> Dict[str, str]:
+    """
+    Строит отображение дата -> ссылка на xls для набора дат.
+
+    Страница списка и ее пагинация скачиваются один раз на весь пакет дат,
+    обход страниц прекращается, как только найдены все даты или список
+    ушел раньше самой ранней из них. Даты не в формате 'dd.mm.YYYY'
+    не ищутся: их нет в списке, и обход дошел бы до SPIMEX_INDEX_MAX_PAGES.
+    Результат кэшируется в Redis с коротким TTL, поэтому повторные вызовы
+    подряд не ходят на сайт.
+
+    Args:
+        client (aiohttp.ClientSession): Общая HTTP-сессия приложения
+        url (str): URL первой страницы списка результатов
+        times (Iterable[str]): Даты торгов в формате 'dd.mm.YYYY'
+
+    Returns:
+        Dict[str, str]: Найденные ссылки на файлы по датам
+
+    Пример:
+        >>> index = await fetch_index(client, url, ("12.05.2023",))
+        >>> index["12.05.2023"]
+    """
+
+    cached_key = f'spimex_index:{url}'
+    index = await get_cache(cached_key) or {}
+    missing = {time for time in times
+               if time not in index and _to_date(time)}
+    if not missing:
+        return index
+
+    oldest = min(map(_to_date, missing))
+
+    page_url = url
+    for _ in range(settings.SPIMEX_INDEX_MAX_PAGES):
+        html = await with_retries(partial(fetch_page, client, page_url))
+        page_index, next_href = parse_index(html)
+        for time, href in page_index.items():
+            index.setdefault(time, href)
+        missing.difference_update(page_index)
+
+        page_dates = [date for date in map(_to_date, page_index) if date]
+        if (not missing or not next_href or
+                (page_dates and min(page_dates) < oldest)):
+            break
+        page_url = urljoin(page_url, next_href)
+
+    # Индекс не сбрасывается по тегам, только по сроку
+    await redis_manager.set_values({cached_key: index},
+                                   ttl=settings.SPIMEX_INDEX_TTL,
+                                   tagged=False)
+    return index
+
+
+async def parse_href(
+        client: aiohttp.ClientSession,
+        url: str,
+        time: str
+        ) -> str | None:
     """
     Извлекает URL для скачивания файла с сайта Spimex по указанному времени.
 
     Параметры:
+        client (aiohttp.ClientSession): Общая HTTP-сессия приложения
         url (str): URL страницы для парсинга
         time (str): Временная метка для поиска на странице
 
@@ -27,182 +169,432 @@ async def parse_href(url: str, time: str) -> str | None:
 
     Пример:
         >>> url = "https://spimex.com/markets/oil_products/trades/results/"
-        >>> download_url = parse_href(url, "10:30")
+        >>> download_url = await parse_href(client, url, "10:30")
     """
 
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url) as response:
-            html = await response.text()
+    index = await fetch_index(client, url, (time,))
+    return index.get(time)
 
-    soup = BeautifulSoup(html, 'html.parser')
-    div = soup.find('div', id='comp_d609bce6ada86eff0b6f7e49e6bae904')
-    for div_item in div.find_all('div', class_='accordeon-inner__wrap-item'):
-        if div_item.find('span').text.strip() == time:
-            a = div_item.find('a',
-                              class_='accordeon-inner__item-title link xls')
-            return f"https://spimex.com{a['href'].split('?')[0]}"
-    else:
-        return None
+
+class Download(NamedTuple):
+    """
+    Результат скачивания: временный файл, открытый на начале, и SHA-256
+    его содержимого. При ответе 304 file и sha256 равны None. Файл
+    закрывает вызывающий код.
+    """
+
+    file: BinaryIO | None
+    sha256: str | None
+    etag: str | None
+    last_modified: str | None
 
 
-async def download_file(file_url: str) -> pd.DataFrame:
+async def download_file(
+        client: aiohttp.ClientSession,
+        file_url: str,
+        etag: str | None = None,
+        last_modified: str | None = None
+        ) -> Download:
     """
-    Скачивает Excel-файл по URL и возвращает его содержимое в виде DataFrame.
+    Скачивает Excel-файл по URL.
+
+    Ответ читается блоками по DOWNLOAD_CHUNK_BYTES в SpooledTemporaryFile,
+    который держит в памяти не больше DOWNLOAD_SPOOL_BYTES, а дальше
+    пишется на диск, и хэшируется по ходу чтения. Файл больше
+    DOWNLOAD_MAX_BYTES не скачивается. При известных ETag или
+    Last-Modified прошлой версии запрос отправляется условным, и на
+    ответ 304 файл не скачивается. Разбор файла вынесен в read_bulletin,
+    чтобы он выполнялся вне цикла событий.
 
     Args:
+        client (aiohttp.ClientSession): Общая HTTP-сессия приложения
         file_url (str): Ссылка на Excel-файл для скачивания
+        etag (str | None): ETag сохраненной версии файла
+        last_modified (str | None): Last-Modified сохраненной версии
 
     Returns:
-        pd.DataFrame: Данные из Excel-файла в виде таблицы pandas
+        Download: Файл, его хэш, ETag и Last-Modified
+
+    Raises:
+        ValueError: Если файл больше DOWNLOAD_MAX_BYTES
 
     Пример:
-        >>> df = download_file("https://example.com/data.xlsx")
+        >>> download = await download_file(client, "https://example.com/a.xls")
+        >>> with download.file:
+        ...     digest = await bulletin_store.save(time, download.file,
+        ...                                        digest=download.sha256)
     """
 
-    async with aiohttp.ClientSession() as session:
-        async with session.get(file_url) as response:
-            file_content = await response.read()
-            return pd.read_excel(BytesIO(file_content))
+    headers = {}
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+    async with client.get(file_url, headers=headers,
+                          timeout=get_request_timeout()) as response:
+        response.raise_for_status()
+        if response.status == 304:
+            return Download(None, None, etag, last_modified)
+        if (response.content_length or 0) > settings.DOWNLOAD_MAX_BYTES:
+            raise ValueError(f"Файл {file_url} больше "
+                             f"{settings.DOWNLOAD_MAX_BYTES} байт")
+
+        file = SpooledTemporaryFile(max_size=settings.DOWNLOAD_SPOOL_BYTES)
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            async for chunk in response.content.iter_chunked(
+                    settings.DOWNLOAD_CHUNK_BYTES):
+                size += len(chunk)
+                if size > settings.DOWNLOAD_MAX_BYTES:
+                    raise ValueError(f"Файл {file_url} больше "
+                                     f"{settings.DOWNLOAD_MAX_BYTES} байт")
+                digest.update(chunk)
+                file.write(chunk)
+        except BaseException:
+            file.close()
+            raise
+        file.seek(0)
+        return Download(file, digest.hexdigest(),
+                        response.headers.get('ETag'),
+                        response.headers.get('Last-Modified'))
+
+
+def find_row(
+        df: pd.DataFrame,
+        text: str,
+        start: int = 0,
+        exact: bool = False
+        ) -> int | None:
+    """
+    Ищет первую строку, в колонках маркеров которой встречается текст.
 
+    Просматриваются только первые MARKER_COLUMNS колонок листа, поиск идет
+    блоками по SCAN_CHUNK строк векторизованным сравнением без регулярных
+    выражений и прекращается на первом найденном блоке.
 
-async def save_filtered_csv(df: pd.DataFrame, time: str) -> str | None:
+    Args:
+        df (pd.DataFrame): Лист бюллетеня
+        text (str): Искомый текст
+        start (int): Позиция строки, с которой начинается поиск
+        exact (bool): Требовать полного совпадения значения ячейки
+
+    Returns:
+        int | None: Позиция найденной строки или None
+
+    Пример:
+        >>> find_row(df, 'Итого:', start=10, exact=True)
     """
-    Фильтрует DataFrame и сохраняет данные в Excel-файл.
 
-    Ищет строку с указанной единицей измерения, сохраняет все данные после нее,
-    начиная с 3 строк ниже найденной строки.
+    columns = df.iloc[:, :MARKER_COLUMNS]
+    for offset in range(start, len(df), SCAN_CHUNK):
+        block = columns.iloc[offset:offset + SCAN_CHUNK]
+        hits = np.zeros(len(block), dtype=bool)
+        for _, column in block.items():
+            if column.dtype != object:
+                continue
+            if exact:
+                hits |= (column == text).to_numpy()
+            else:
+                hits |= column.str.contains(text, regex=False,
+                                            na=False).to_numpy(dtype=bool)
+        if hits.any():
+            return offset + int(hits.argmax())
+    return None
+
+
+def get_excel_engine(source: bytes | str | os.PathLike) -> str:
+    """
+    Выбирает движок чтения Excel: calamine, если установлен
+    python-calamine, иначе xlrd для старого формата .xls и openpyxl
+    для .xlsx.
 
     Args:
-        df (pd.DataFrame): Исходный DataFrame с данными для обработки
-        time (str): Временная метка для использования в имени файла
+        source (bytes | str | os.PathLike): Содержимое файла или путь к нему
+
+    Returns:
+        str: Имя движка для pd.ExcelFile
+    """
+
+    if python_calamine is not None:
+        return 'calamine'
+    if isinstance(source, bytes):
+        head = source[:len(XLS_MAGIC)]
+    else:
+        with open(source, 'rb') as file:
+            head = file.read(len(XLS_MAGIC))
+    return 'xlrd' if head == XLS_MAGIC else 'openpyxl'
+
+
+def read_bulletin(
+        source: bytes | str | os.PathLike
+        ) -> pd.DataFrame | None:
+    """
+    Читает из бюллетеня только таблицу торгов в метрических тоннах.
+
+    Файл открывается один раз. Строка с единицей измерения ищется
+    в первых HEADER_SCAN_ROWS строках колонок маркеров (во всем листе,
+    если там ее нет), затем лист читается с первой строки таблицы
+    и только в колонках маркеров и BULLETIN_COLUMNS с заданными типами.
+    Колонки получают имена, под которыми их читает pd.read_excel
+    с заголовком по первой строке.
+
+    Args:
+        source (bytes | str | os.PathLike): Содержимое Excel-файла или
+            путь к нему, файл читается движком напрямую с диска
 
     Returns:
-        str | None: Имя сохраненного файла или None,
-        если искомая строка не найдена
+        pd.DataFrame | None: Таблица торгов или None, если она не найдена
 
     Пример:
-        >>> filename = save_filtered_csv(df, "12.05.2023")
-        >>> print(f"Сохранено в {filename}")
+        >>> df = read_bulletin(path)
+        >>> df['Форма СЭТ-БТ'].head()
+    """
+
+    marker_columns = list(range(MARKER_COLUMNS))
+    with pd.ExcelFile(
+            BytesIO(source) if isinstance(source, bytes) else source,
+            engine=get_excel_engine(source)) as book:
+        markers = book.parse(header=None, dtype=object,
+                             usecols=marker_columns, nrows=HEADER_SCAN_ROWS)
+        marker = find_row(markers, UNIT_MARKER)
+        if marker is None and len(markers) == HEADER_SCAN_ROWS:
+            markers = book.parse(header=None, dtype=object,
+                                 usecols=marker_columns)
+            marker = find_row(markers, UNIT_MARKER)
+        if marker is None:
+            return None
+        df = book.parse(header=None, skiprows=marker + 3,
+                        usecols=sorted({*marker_columns, *BULLETIN_COLUMNS}),
+                        dtype={**dict.fromkeys(marker_columns, object),
+                               **BULLETIN_DTYPES})
+    end = find_row(df, TOTAL_MARKER, exact=True)
+    return df.iloc[:end][list(BULLETIN_COLUMNS)].rename(
+        columns=BULLETIN_COLUMNS)
+
+
+def archive_bulletin(df: pd.DataFrame, time: str) -> str:
+    """
+    Записывает отфильтрованный бюллетень в Excel-файл для архива.
+
+    Args:
+        df (pd.DataFrame): Отфильтрованный DataFrame с таблицей торгов
+        time (str): Временная метка для использования в имени файла
+
+    Returns:
+        str: Имя сохраненного файла
     """
 
     csv_filename = f"spimex_{time.replace('.', '_')}.xls"
-    mask = df.apply(
-        lambda row: row.astype(str).str.contains(
-            'Единица измерения: Метрическая тонна').any(), axis=1)
-    if not mask.any():
-        print("Не найдена строка с 'Единица измерения: Метрическая тонна'")
-        return None
-    start_idx = mask.idxmax() + 3
-    filtered_df = df.iloc[start_idx:]
-    await asyncio.to_thread(
-        filtered_df.to_excel,
-        csv_filename,
-        index=False,
-        engine='openpyxl'
-    )
+    df.to_excel(csv_filename, index=False, engine='openpyxl')
     return csv_filename
 
 
-async def process_time(time: str) -> List[Dict[str, Any]]:
+def parse_bulletin(
+        source: bytes | str | os.PathLike,
+        time: str,
+        archive: bool = False
+        ) -> Dict[str, List[Any]]:
     """
-    Обрабатывает данные для указанного времени: парсит URL, скачивает файл,
-    сохраняет отфильтрованные данные и преобразует в словарь.
+    Разбирает содержимое бюллетеня в колонки значений торгов.
+
+    Выполняется в пуле процессов parse_executor, поэтому принимает
+    и возвращает только то, что передается через pickle: путь к файлу
+    (или его байты) на входе и колонки значений вместо DataFrame
+    на выходе.
 
     Args:
+        source (bytes | str | os.PathLike): Путь к Excel-файлу
+            или его содержимое
         time (str): Временная метка в формате 'dd.mm.YYYY'
+        archive (bool): Сохранить отфильтрованный бюллетень на диск
 
     Returns:
-        List[Dict[str, Any]]: Список словарей с данными из Excel файла
+        Dict[str, List[Any]]: Значения по именам полей модели
 
     Raises:
-        ValueError: Если не найден файл для указанного времени
+        ValueError: Если в файле не найдена таблица торгов
 
     Пример:
-        >>> data = await process_time("12.05.2023")
-        >>> print(f"Получено {len(data)} записей")
+        >>> columns = parse_bulletin(path, "12.05.2023")
     """
 
-    href = await parse_href(url, time)
-    if not href:
-        raise ValueError(f"Не найден файл для времени {time}")
-    file = await download_file(href)
-    file_name = await save_filtered_csv(file, time)
-    df = await asyncio.to_thread(pd.read_excel, file_name, engine='openpyxl')
-    return df.to_dict(orient='records')
+    df = read_bulletin(source)
+    if df is None:
+        raise ValueError(f"Не найдена таблица торгов для времени {time}")
+    if archive:
+        archive_bulletin(df, time)
+    return get_columns(time, df)
 
 
-def get_objects(
+async def process_time(
+        client: aiohttp.ClientSession,
         time: str,
-        data: List[Dict[str, Any]]
-        ) -> List[SpimexTradingResults]:
+        href: str | None,
+        archive: bool | None = None
+        ) -> Dict[str, List[Any]] | None:
     """
-    Преобразует сырые данные в список объектов SpimexTradingResults.
-
-    Обрабатывает данные до встречи строки 'Итого:' и пропускает записи
-    с значением '-' в колонке 'Unnamed: 14'.
+    Обрабатывает данные для указанного времени: скачивает файл по ссылке
+    из индекса и разбирает его в пуле parse_executor, не занимая цикл
+    событий.
+
+    Скачанный файл сохраняется в bulletin_store, повторное скачивание
+    идет условным запросом. Если содержимое совпадает с уже записанной
+    в БД версией, разбор пропускается и возвращается None. Иначе пул
+    разбирает файл прямо из хранилища по пути, без передачи содержимого
+    между процессами. Скачивание повторяется при сетевых ошибках
+    и ответах 429/5xx с экспоненциальной паузой. Отфильтрованная таблица
+    пишется на диск только при включенном архивировании.
 
     Args:
+        client (aiohttp.ClientSession): Общая HTTP-сессия приложения
         time (str): Временная метка в формате 'dd.mm.YYYY'
-        data (List[Dict[str, Any]]): Список словарей с сырыми данными
+        href (str | None): Ссылка на файл из индекса бюллетеней
+        archive (bool | None): Сохранить отфильтрованный бюллетень на диск.
+            По умолчанию берется из настройки SPIMEX_ARCHIVE
 
     Returns:
-        List[SpimexTradingResults]: Список объектов торговых результатов Spimex
+        Dict[str, List[Any]] | None: Значения торгов по именам полей
+        модели или None, если эта версия файла уже записана
+
+    Raises:
+        ValueError: Если дата не в формате 'dd.mm.YYYY' или не найден
+            файл или таблица для указанного времени
 
     Пример:
-        >>> objects = get_objects("12.05.2023", raw_data)
-        >>> print(f"Создано {len(objects)} объектов")
+        >>> columns = await process_time(client, "12.05.2023", href)
+        >>> print(f"Получено {len(columns['date'])} строк")
     """
 
-    spimex_objects = []
+    if _to_date(time) is None:
+        raise ValueError(f"Неверный формат даты {time}, нужен dd.mm.YYYY")
+    if not href:
+        raise ValueError(f"Не найден файл для времени {time}")
+    meta = await bulletin_store.load(time)
+    download = await with_retries(partial(
+        download_file, client, href,
+        meta.get('etag'), meta.get('last_modified')))
+    if download.file is None:
+        digest = meta['sha256']
+    else:
+        with download.file:
+            digest = await bulletin_store.save(
+                time, download.file, download.etag, download.last_modified,
+                digest=download.sha256)
+    if digest == meta.get('ingested'):
+        return None
+    return await parse_executor.run(
+        parse_bulletin, str(bulletin_store.get_path(time, digest)), time,
+        settings.SPIMEX_ARCHIVE if archive is None else archive)
+
 
-    for row in data:
-        if row['Форма СЭТ-БТ'] == 'Итого:':
-            break
+def _to_int(column: pd.Series) -> List[int | None]:
+    values = pd.to_numeric(column, errors='coerce').fillna(0)
+    return [value or None for value in values.astype('int64').tolist()]
+
+
+def get_columns(time: str, df: pd.DataFrame) -> Dict[str, List[Any]]:
+    """
+    Преобразует таблицу торгов в колонки значений SpimexTradingResults.
 
-        if row['Unnamed: 14'] != '-':
+    Пропускает записи со значением '-' в колонке 'Unnamed: 14' и строки
+    без кода инструмента, например пустые строки внутри таблицы. Коды
+    продукта, базиса и типа поставки, объем и количество вычисляются
+    векторными операциями над колонками среза, дата разбирается один раз.
 
-            date_obj = datetime.strptime(time, '%d.%m.%Y').date()
+    Args:
+        time (str): Временная метка в формате 'dd.mm.YYYY'
+        df (pd.DataFrame): Срез бюллетеня с таблицей торгов
 
-            spimex = SpimexTradingResults(
-                exchange_product_id=row['Форма СЭТ-БТ'],
-                exchange_product_name=row['Unnamed: 2'],
-                oil_id=row['Форма СЭТ-БТ'][:4],
-                delivery_basis_id=row['Форма СЭТ-БТ'][4:7],
-                delivery_basis_name=row['Unnamed: 3'],
-                delivery_type_id=row['Форма СЭТ-БТ'][-1],
-                volume=int(row['Unnamed: 4']) if row['Unnamed: 4'] else None,
-                total=Decimal(
-                    str(row['Unnamed: 5'])) if row['Unnamed: 5'] else None,
-                count=int(row['Unnamed: 14']) if row['Unnamed: 14'] else None,
-                date=date_obj
-            )
-            spimex_objects.append(spimex)
-    return spimex_objects
+    Returns:
+        Dict[str, List[Any]]: Значения по именам полей модели
 
+    Пример:
+        >>> columns = get_columns("12.05.2023", filtered_df)
+        >>> columns['oil_id'][:2]
+    """
 
-async def get_spimex(times: Tuple[str, ...]) -> List[SpimexTradingResults]:
+    code = df['Форма СЭТ-БТ'].astype(str).str.strip()
+    rows = ((df['Unnamed: 14'] != '-') & df['Форма СЭТ-БТ'].notna() &
+            (code != ''))
+    df, code = df[rows], code[rows]
+    total = df['Unnamed: 5']
+    date_obj = datetime.strptime(time, '%d.%m.%Y').date()
+    return {
+        'exchange_product_id': code.tolist(),
+        'exchange_product_name': df['Unnamed: 2'].tolist(),
+        'oil_id': code.str[:4].tolist(),
+        'delivery_basis_id': code.str[4:7].tolist(),
+        'delivery_basis_name': df['Unnamed: 3'].tolist(),
+        'delivery_type_id': code.str[-1].tolist(),
+        'volume': _to_int(df['Unnamed: 4']),
+        'total': [Decimal(str(value)) if value else None
+                  for value in total.astype(object).where(
+                      total.notna(), None).tolist()],
+        'count': _to_int(df['Unnamed: 14']),
+        'date': [date_obj] * len(df)
+    }
+
+
+async def get_spimex(
+        client: aiohttp.ClientSession,
+        times: Tuple[str, ...],
+        on_date: Callable[..., Awaitable[None]] | None = None
+        ) -> Tuple[Dict[str, List[Any]], Dict[str, str]]:
     """
     Получает и обрабатывает данные Spimex для нескольких временных меток.
 
-    Параллельно обрабатывает все указанные временные периоды и объединяет
-    результаты в единый список объектов.
+    Индекс бюллетеней строится один раз на весь пакет, затем даты
+    обрабатываются параллельно, но не более SPIMEX_CONCURRENCY
+    одновременно, и результаты объединяются в общие колонки значений.
+    Все запросы идут через одну общую HTTP-сессию с пулом соединений.
+    Ошибка одной даты не прерывает остальные: успешные даты попадают
+    в результат, неудачные возвращаются отдельно с текстом ошибки.
 
     Args:
+        client (aiohttp.ClientSession): Общая HTTP-сессия приложения
         times (Tuple[str, ...]): Кортеж временных меток в формате 'dd.mm.YYYY'
+        on_date (Optional[Callable]): Вызывается после обработки каждой
+            даты как on_date(time, rows=..., seconds=..., error=...)
+            или, если версия файла уже записана в БД,
+            on_date(time, rows=0, seconds=..., skipped=True)
 
     Returns:
-        List[SpimexTradingResults]: Объединенный список объектов
-        торговых результатов
+        Tuple[Dict[str, List[Any]], Dict[str, str]]: Объединенные колонки
+        значений торговых результатов по именам полей модели и ошибки
+        по датам, которые загрузить не удалось
 
     Пример:
         >>> times = ("12.05.2023", "13.05.2023")
-        >>> results = await get_spimex(times)
-        >>> print(f"Всего обработано {len(results)} записей")
+        >>> columns, failures = await get_spimex(client, times)
+        >>> print(f"Всего обработано {len(columns['date'])} записей")
     """
 
-    tasks = [process_time(time) for time in times]
-    all_data = await asyncio.gather(*tasks)
-    result = []
-    for time, data in zip(times, all_data):
-        result.extend(get_objects(time, data))
-    return result
+    semaphore = asyncio.Semaphore(settings.SPIMEX_CONCURRENCY)
+    failures = {}
+
+    async def get_date_columns(time: str, href: str | None):
+        async with semaphore:
+            started = monotonic()
+            try:
+                columns = await process_time(client, time, href)
+            except Exception as error:
+                failures[time] = str(error) or type(error).__name__
+                if on_date:
+                    await on_date(time, seconds=monotonic() - started,
+                                  error=failures[time])
+                return {}
+        if on_date:
+            await on_date(time, rows=len(columns['date']) if columns else 0,
+                          seconds=monotonic() - started,
+                          skipped=columns is None)
+        return columns or {}
+
+    index = await fetch_index(client, url, times)
+    all_columns = await asyncio.gather(
+        *(get_date_columns(time, index.get(time)) for time in times))
+    result = {}
+    for columns in all_columns:
+        for name, values in columns.items():
+            result.setdefault(name, []).extend(values)
+    return result, failures
@@ -0,0 +1,159 @@
+import datetime as dt
+from typing import Iterable, List
+
+from sqlalchemy import delete, func, insert, select, union, Select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from core.cache import (bump_dataset_version, invalidate_cache_tags,
+                        redis_manager)
+from models.spimex import SpimexDailyRollup, SpimexTradingResults
+
+ROLLUP_KEYS = ('date', 'oil_id', 'delivery_basis_id', 'delivery_type_id')
+ROLLUP_SUMS = ('volume', 'total', 'count')
+BACKFILL_BATCH = 31
+BACKFILL_LOCK_TIMEOUT = 600
+
+
+def get_rollup_source(dates: Iterable[dt.date] | None = None,
+                      start_date: dt.date | None = None,
+                      end_date: dt.date | None = None) -> Select:
+    """
+    Создает запрос дневных сумм по исходной таблице торгов.
+
+    Args:
+        dates (Optional[Iterable[dt.date]]): Только эти даты
+        start_date (Optional[dt.date]): Начальная дата периода
+        end_date (Optional[dt.date]): Конечная дата периода
+    """
+    model = SpimexTradingResults
+    keys = [getattr(model, name) for name in ROLLUP_KEYS]
+    stmt = select(*keys, *(func.sum(getattr(model, name)).label(name)
+                           for name in ROLLUP_SUMS)).group_by(*keys)
+    if dates is not None:
+        stmt = stmt.where(model.date.in_(list(dates)))
+    if start_date:
+        stmt = stmt.where(model.date >= start_date)
+    if end_date:
+        stmt = stmt.where(model.date <= end_date)
+    return stmt
+
+
+async def refresh_rollup(session: AsyncSession,
+                         dates: Iterable[dt.date]) -> None:
+    """
+    Пересчитывает дневные суммы за указанные даты в текущей транзакции.
+
+    Строки за даты удаляются и вставляются заново одним
+    INSERT ... SELECT ... GROUP BY, поэтому пересчет идет в БД
+    и затрагивает только загруженные даты.
+
+    Args:
+        session (AsyncSession): Сессия БД с транзакцией загрузки
+        dates (Iterable[dt.date]): Даты, данные за которые изменились
+    """
+    dates = sorted(set(dates))
+    if not dates:
+        return
+    await session.execute(delete(SpimexDailyRollup).where(
+        SpimexDailyRollup.date.in_(dates)))
+    await session.execute(insert(SpimexDailyRollup).from_select(
+        [*ROLLUP_KEYS, *ROLLUP_SUMS], get_rollup_source(dates)))
+
+
+async def backfill_rollup(session: AsyncSession,
+                          start_date: dt.date | None = None,
+                          end_date: dt.date | None = None) -> int:
+    """
+    Заполняет дневные суммы по всем датам торгов за период пачками
+    по BACKFILL_BATCH дат, фиксируя транзакцию после каждой пачки.
+
+    Args:
+        session (AsyncSession): Сессия БД
+        start_date (Optional[dt.date]): Начальная дата периода
+        end_date (Optional[dt.date]): Конечная дата периода
+
+    Returns:
+        int: Количество пересчитанных дат
+    """
+    model = SpimexTradingResults
+    stmt = select(model.date).distinct().order_by(model.date)
+    if start_date:
+        stmt = stmt.where(model.date >= start_date)
+    if end_date:
+        stmt = stmt.where(model.date <= end_date)
+    dates = (await session.execute(stmt)).scalars().all()
+
+    for offset in range(0, len(dates), BACKFILL_BATCH):
+        await refresh_rollup(session, dates[offset:offset + BACKFILL_BATCH])
+        await session.commit()
+    return len(dates)
+
+
+async def ensure_rollup(session_factory: async_sessionmaker) -> int:
+    """
+    Заполняет дневные суммы при первом запуске на уже заполненной базе:
+    если таблица сумм пуста, а таблица торгов нет.
+
+    Заполнение идет под блокировкой Redis, остальные процессы ждут его
+    окончания и заново проверяют таблицу. После заполнения сбрасывается
+    кэш агрегатов и увеличивается версия набора данных.
+
+    Args:
+        session_factory (async_sessionmaker): Фабрика сессий БД
+
+    Returns:
+        int: Количество пересчитанных дат, 0 если заполнять не нужно
+
+    Пример:
+        >>> await create_database()
+        >>> await ensure_rollup(async_session)
+    """
+    async def is_needed() -> bool:
+        async with session_factory() as session:
+            rollup = await session.scalar(
+                select(SpimexDailyRollup.date).limit(1))
+            source = await session.scalar(
+                select(SpimexTradingResults.date).limit(1))
+        return rollup is None and source is not None
+
+    if not await is_needed():
+        return 0
+    client = await redis_manager.get_client()
+    async with client.lock('lock:rollup_backfill',
+                           timeout=BACKFILL_LOCK_TIMEOUT):
+        if not await is_needed():
+            return 0
+        async with session_factory() as session:
+            count = await backfill_rollup(session)
+    await bump_dataset_version()
+    await invalidate_cache_tags(['ns:aggregates'])
+    return count
+
+
+async def check_rollup(session: AsyncSession,
+                       start_date: dt.date | None = None,
+                       end_date: dt.date | None = None) -> List[dt.date]:
+    """
+    Сверяет дневные суммы с исходной таблицей торгов.
+
+    Args:
+        session (AsyncSession): Сессия БД
+        start_date (Optional[dt.date]): Начальная дата периода
+        end_date (Optional[dt.date]): Конечная дата периода
+
+    Returns:
+        List[dt.date]: Даты, суммы за которые расходятся
+    """
+    source = get_rollup_source(start_date=start_date, end_date=end_date)
+    rollup = select(*(getattr(SpimexDailyRollup, name)
+                      for name in (*ROLLUP_KEYS, *ROLLUP_SUMS)))
+    if start_date:
+        rollup = rollup.where(SpimexDailyRollup.date >= start_date)
+    if end_date:
+        rollup = rollup.where(SpimexDailyRollup.date <= end_date)
+
+    missing = source.except_(rollup).subquery()
+    extra = rollup.except_(source).subquery()
+    diff = union(select(missing.c.date), select(extra.c.date)).subquery()
+    stmt = select(diff.c.date).order_by(diff.c.date)
+    return list((await session.execute(stmt)).scalars().all())
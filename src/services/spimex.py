@@ -1,17 +1,122 @@
+import base64
+import binascii
 import datetime as dt
-from typing import Dict, Any
+import json
+from typing import (AsyncIterator, Dict, Any, Iterable, List, Sequence,
+                    Tuple)
 
-from sqlalchemy import select, desc, between, Select
+from sqlalchemy import (select, desc, between, tuple_, func, or_, Numeric,
+                        Select)
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from models.spimex import SpimexTradingResults
+from core.cache import (get_cache_entries, set_cache_many, redis_manager,
+                        get_or_set_cache, invalidate_cache_tags, CachedBody,
+                        make_body, bump_dataset_version,
+                        get_dataset_version)
+from core.config import settings
+from core.sql import date_trunc
+from models.spimex import SpimexTradingResults, SpimexDailyRollup
+from services.rollup import ROLLUP_KEYS
+
+STREAM_BATCH = 1000
+WARM_LAST_DATES = (5, 10)
+WARM_TRADING_RESULTS_LIMIT = 5
+WARM_DYNAMICS_DAYS = 30
+INGEST_NAMESPACES = ('ns:all', 'ns:last_trading_dates', 'ns:trading_results',
+                     'ns:aggregates', 'ns:dynamics')
+GROUP_FIELDS = ('oil_id', 'delivery_basis_id', 'delivery_type_id')
+PERIODS = ('date', 'week', 'month')
 
 
 def get_filters(**kargs) -> Dict[str, Any]:
     return {key: value for key, value in kargs.items() if value}
 
 
-def get_all_spimex() -> Select:
-    return select(SpimexTradingResults)
+async def fetch_all(session: AsyncSession, stmt: Select) -> Sequence[Any]:
+    """
+    Выполняет запрос и возвращает все значения первой колонки.
+
+    Args:
+        session (AsyncSession): Сессия БД
+        stmt (Select): Запрос
+    """
+    result = await session.execute(stmt)
+    return result.scalars().all()
+
+
+def get_all_spimex(
+        limit: int | None = None,
+        after: Tuple[dt.date, int] | None = None
+        ) -> Select:
+    """
+    Создает запрос для получения всех записей в порядке (date, id).
+
+    Args:
+        limit (Optional[int]): Размер страницы
+        after (Optional[Tuple[dt.date, int]]): Ключ (date, id) последней
+            записи предыдущей страницы для keyset-пагинации
+    """
+    stmt = select(SpimexTradingResults).order_by(SpimexTradingResults.date,
+                                                 SpimexTradingResults.id)
+    if after:
+        stmt = stmt.filter(
+            tuple_(SpimexTradingResults.date, SpimexTradingResults.id) >
+            tuple_(*after))
+    if limit:
+        stmt = stmt.limit(limit)
+    return stmt
+
+
+def encode_cursor(date: dt.date, id_: int) -> str:
+    """
+    Кодирует ключ (date, id) последней записи страницы в непрозрачный курсор.
+
+    Args:
+        date (dt.date): Дата последней записи страницы
+        id_ (int): ID последней записи страницы
+    """
+    key = f'{date.isoformat()}:{id_}'
+    return base64.urlsafe_b64encode(key.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[dt.date, int]:
+    """
+    Декодирует курсор страницы в ключ (date, id).
+
+    Args:
+        cursor (str): Курсор из заголовка X-Next-Cursor
+
+    Raises:
+        ValueError: Если курсор поврежден
+    """
+    try:
+        date, id_ = base64.urlsafe_b64decode(
+            cursor.encode()).decode().split(':')
+        return dt.date.fromisoformat(date), int(id_)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError(f'Некорректный курсор {cursor}')
+
+
+async def stream_spimex(
+        session_factory: async_sessionmaker,
+        stmt: Select
+        ) -> AsyncIterator[bytes]:
+    """
+    Построчно отдает результат запроса в формате NDJSON.
+
+    Запрос читается серверным курсором пачками по STREAM_BATCH строк
+    в собственной сессии, поэтому память не растет с размером таблицы.
+
+    Args:
+        session_factory (async_sessionmaker): Фабрика сессий БД
+        stmt (Select): Запрос записей SpimexTradingResults
+    """
+    async with session_factory() as session:
+        result = await session.stream_scalars(
+            stmt.execution_options(yield_per=STREAM_BATCH))
+        async for partition in result.partitions():
+            yield ''.join(json.dumps(item.to_dict(), ensure_ascii=False) +
+                          '\n' for item in partition).encode()
 
 
 def get_last_spimex(limit: int) -> Select:
@@ -29,6 +134,23 @@ def get_last_spimex(limit: int) -> Select:
         )
 
 
+async def get_last_dates_cached(
+        session_factory: async_sessionmaker,
+        limit: int = 5
+        ) -> CachedBody:
+    """
+    Возвращает последние торговые даты из кэша или из БД.
+
+    Args:
+        session_factory (async_sessionmaker): Фабрика сессий БД
+        limit (int): Количество последних дат
+    """
+    stmt = get_last_spimex(limit=limit)
+    return await get_or_set_cache(f'last_trading_dates:{limit}',
+                                  session_factory,
+                                  lambda session: fetch_all(session, stmt))
+
+
 def get_dynamics_spimex(
         start_date: dt.date,
         end_date: dt.date,
@@ -53,7 +175,353 @@ def get_dynamics_spimex(
     )
     return select(SpimexTradingResults).filter(
         between(SpimexTradingResults.date, start_date, end_date)
-    ).filter_by(**filters)
+    ).filter_by(**filters).order_by(SpimexTradingResults.date,
+                                    SpimexTradingResults.id)
+
+
+def get_aggregates_spimex(
+        start_date: dt.date,
+        end_date: dt.date,
+        group_by: Sequence[str] = ('date',),
+        oil_id: str | None = None,
+        delivery_type_id: str | None = None,
+        delivery_basis_id: str | None = None
+        ) -> Select:
+    """
+    Создает запрос агрегатов торгов за период: суммы объема, оборота
+    и количества договоров и средневзвешенная по объему цена.
+    Читает таблицу дневных сумм, когда группировка это позволяет
+    (см. get_aggregate_model).
+
+    Args:
+        start_date (dt.date): Начальная дата периода
+        end_date (dt.date): Конечная дата периода
+        group_by (Sequence[str]): Поля группировки из GROUP_FIELDS и не
+            более одного периода из PERIODS (день, неделя, месяц)
+        oil_id (Optional[str]): ID нефтепродукта для фильтрации
+        delivery_type_id (Optional[str]): ID типа поставки для фильтрации
+        delivery_basis_id (Optional[str]): ID базиса поставки для фильтрации
+
+    Raises:
+        ValueError: Если указано больше одного периода или неизвестное поле
+    """
+    unknown = set(group_by) - set(GROUP_FIELDS) - set(PERIODS)
+    periods = [field for field in PERIODS if field in group_by]
+    if unknown:
+        raise ValueError(f'Неизвестные поля группировки: {sorted(unknown)}')
+    if len(periods) > 1:
+        raise ValueError('Можно группировать только по одному периоду')
+
+    filters = get_filters(
+        oil_id=oil_id,
+        delivery_type_id=delivery_type_id,
+        delivery_basis_id=delivery_basis_id
+    )
+    model = get_aggregate_model([*group_by, *filters])
+    groups = [getattr(model, field)
+              for field in GROUP_FIELDS if field in group_by]
+    if periods:
+        groups.insert(0, date_trunc(periods[0], model.date).label('period'))
+    volume = func.sum(model.volume)
+    total = func.sum(model.total)
+
+    return (
+        select(*groups,
+               volume.label('volume'),
+               total.label('total'),
+               func.sum(model.count).label('count'),
+               func.round(total / func.nullif(volume, 0), 2,
+                          type_=Numeric(18, 2)).label('vwap'))
+        .filter_by(**filters)
+        .filter(between(model.date, start_date, end_date))
+        .group_by(*groups)
+        .order_by(*groups)
+        )
+
+
+def get_aggregate_model(fields: Iterable[str]) -> type:
+    """
+    Выбирает таблицу для агрегации: дневные суммы, если все поля
+    группировки и фильтров есть в них, иначе исходную таблицу торгов.
+
+    Args:
+        fields (Iterable[str]): Поля группировки и фильтров
+    """
+    if set(fields) <= {*ROLLUP_KEYS, *PERIODS}:
+        return SpimexDailyRollup
+    return SpimexTradingResults
+
+
+async def fetch_mappings(session: AsyncSession,
+                         stmt: Select) -> List[Dict[str, Any]]:
+    """
+    Выполняет запрос и возвращает строки словарями по меткам колонок.
+
+    Args:
+        session (AsyncSession): Сессия БД
+        stmt (Select): Запрос
+    """
+    result = await session.execute(stmt)
+    return [dict(row) for row in result.mappings()]
+
+
+async def get_aggregates_cached(
+        session_factory: async_sessionmaker,
+        start_date: dt.date,
+        end_date: dt.date,
+        group_by: Sequence[str] = ('date',),
+        oil_id: str | None = None,
+        delivery_type_id: str | None = None,
+        delivery_basis_id: str | None = None
+        ) -> CachedBody:
+    """
+    Возвращает агрегаты торгов за период из кэша или из БД.
+
+    Args:
+        session_factory (async_sessionmaker): Фабрика сессий БД
+        start_date (dt.date): Начальная дата периода
+        end_date (dt.date): Конечная дата периода
+        group_by (Sequence[str]): Поля группировки, см. get_aggregates_spimex
+        oil_id (Optional[str]): ID нефтепродукта для фильтрации
+        delivery_type_id (Optional[str]): ID типа поставки для фильтрации
+        delivery_basis_id (Optional[str]): ID базиса поставки для фильтрации
+
+    Raises:
+        ValueError: Если группировка задана неверно
+    """
+    stmt = get_aggregates_spimex(
+        start_date=start_date,
+        end_date=end_date,
+        group_by=group_by,
+        oil_id=oil_id,
+        delivery_type_id=delivery_type_id,
+        delivery_basis_id=delivery_basis_id)
+    cached_key = (f'aggregates:{oil_id}_{delivery_basis_id}_'
+                  f'{delivery_type_id}_{",".join(sorted(set(group_by)))}:'
+                  f'{start_date.isoformat()}_{end_date.isoformat()}')
+    return await get_or_set_cache(
+        cached_key, session_factory,
+        lambda session: fetch_mappings(session, stmt))
+
+
+def get_dynamics_key(
+        date: dt.date,
+        oil_id: str | None = None,
+        delivery_type_id: str | None = None,
+        delivery_basis_id: str | None = None
+        ) -> str:
+    """
+    Формирует ключ кэша динамики за один торговый день.
+
+    Args:
+        date (dt.date): Торговый день
+        oil_id (Optional[str]): ID нефтепродукта для фильтрации
+        delivery_type_id (Optional[str]): ID типа поставки для фильтрации
+        delivery_basis_id (Optional[str]): ID базиса поставки для фильтрации
+    """
+    return (f'get_dynamics:{oil_id}_{delivery_basis_id}_'
+            f'{delivery_type_id}:{date.isoformat()}')
+
+
+def get_date_runs(days: List[dt.date]) -> List[Tuple[dt.date, dt.date]]:
+    """
+    Разбивает отсортированные дни на непрерывные отрезки.
+
+    Args:
+        days (List[dt.date]): Дни по возрастанию
+
+    Returns:
+        List[Tuple[dt.date, dt.date]]: Первый и последний день отрезков
+
+    Пример:
+        >>> get_date_runs([dt.date(2025, 1, 1), dt.date(2025, 1, 2),
+        ...                dt.date(2025, 1, 5)])
+        [(date(2025, 1, 1), date(2025, 1, 2)), (date(2025, 1, 5), ...)]
+    """
+    runs = []
+    for day in days:
+        if runs and (day - runs[-1][1]).days == 1:
+            runs[-1] = (runs[-1][0], day)
+        else:
+            runs.append((day, day))
+    return runs
+
+
+async def get_dynamics_range_cached(
+        session_factory: async_sessionmaker,
+        start_date: dt.date,
+        end_date: dt.date,
+        **filters: str | None
+        ) -> CachedBody:
+    """
+    Возвращает динамику за период одним ключом кэша и одним запросом.
+
+    Args:
+        session_factory (async_sessionmaker): Фабрика сессий БД
+        start_date (dt.date): Начальная дата периода
+        end_date (dt.date): Конечная дата периода
+        **filters: Фильтры oil_id, delivery_type_id, delivery_basis_id
+    """
+    stmt = get_dynamics_spimex(start_date=start_date, end_date=end_date,
+                               **filters)
+    cached_key = (f'dynamics:{filters["oil_id"]}_'
+                  f'{filters["delivery_basis_id"]}_'
+                  f'{filters["delivery_type_id"]}:'
+                  f'{start_date.isoformat()}_{end_date.isoformat()}')
+    return await get_or_set_cache(
+        cached_key, session_factory,
+        lambda session: fetch_all(session, stmt), to_dict=True)
+
+
+async def get_dynamics_cached(
+        session_factory: async_sessionmaker,
+        start_date: dt.date,
+        end_date: dt.date,
+        oil_id: str | None = None,
+        delivery_type_id: str | None = None,
+        delivery_basis_id: str | None = None
+        ) -> CachedBody:
+    """
+    Собирает динамику за период из кэшированных срезов по дням.
+
+    Каждый день с набором фильтров кэшируется отдельно, поэтому
+    пересекающиеся периоды используют общие срезы. Дни без среза в кэше
+    загружаются из БД одним запросом по непрерывным отрезкам, одновременные
+    одинаковые загрузки объединяются. Устаревшие срезы отдаются сразу
+    и пересчитываются в фоне. Пустые дни тоже кэшируются, сегодняшний,
+    по которому бюллетень еще может выйти, только на CACHE_EMPTY_TTL.
+    Будущие дни не кэшируются и читаются из БД при каждом запросе.
+
+    Период длиннее DYNAMICS_SLICE_MAX_DAYS прошедших дней кэшируется
+    целиком одним ключом (см. get_dynamics_range_cached), чтобы не
+    заводить ключ на каждый день.
+
+    Срезы хранятся готовыми JSON-массивами и склеиваются в тело ответа
+    без декодирования.
+
+    Args:
+        session_factory (async_sessionmaker): Фабрика сессий БД
+        start_date (dt.date): Начальная дата периода
+        end_date (dt.date): Конечная дата периода
+        oil_id (Optional[str]): ID нефтепродукта для фильтрации
+        delivery_type_id (Optional[str]): ID типа поставки для фильтрации
+        delivery_basis_id (Optional[str]): ID базиса поставки для фильтрации
+
+    Returns:
+        CachedBody: JSON-массив записей за период в порядке (date, id)
+    """
+    filters = {
+        'oil_id': oil_id,
+        'delivery_type_id': delivery_type_id,
+        'delivery_basis_id': delivery_basis_id
+    }
+    today = dt.date.today()
+    count = (min(end_date, today) - start_date).days + 1
+    if count > settings.DYNAMICS_SLICE_MAX_DAYS:
+        return await get_dynamics_range_cached(
+            session_factory, start_date, end_date, **filters)
+
+    days = [start_date + dt.timedelta(days=offset)
+            for offset in range(count)]
+    parts = []
+    if days:
+        parts.extend(await get_dynamics_slices(session_factory, days,
+                                               **filters))
+    if end_date > today:
+        stmt = get_dynamics_spimex(
+            start_date=max(start_date, today + dt.timedelta(days=1)),
+            end_date=end_date, **filters)
+        async with session_factory() as session:
+            parts.append(make_body([item.to_dict() for item
+                                    in await fetch_all(session, stmt)]))
+    return join_bodies(parts)
+
+
+async def get_dynamics_slices(
+        session_factory: async_sessionmaker,
+        days: List[dt.date],
+        **filters: str | None
+        ) -> List[CachedBody]:
+    """
+    Возвращает срезы динамики по дням из кэша, недостающие загружает
+    из БД и кэширует, см. get_dynamics_cached.
+
+    Args:
+        session_factory (async_sessionmaker): Фабрика сессий БД
+        days (List[dt.date]): Прошедшие дни и сегодняшний по возрастанию
+        **filters: Фильтры oil_id, delivery_type_id, delivery_basis_id
+
+    Returns:
+        List[CachedBody]: Срезы в порядке дней
+    """
+    grace = settings.CACHE_STALE_GRACE
+    keys = {day: get_dynamics_key(day, **filters) for day in days}
+    entries = dict(zip(days, await get_cache_entries(list(keys.values()),
+                                                     grace)))
+    slices = {day: data if isinstance(data, CachedBody) else None
+              for day, (data, _) in entries.items()}
+
+    def load(selected: List[dt.date]):
+        selected_keys = [keys[day] for day in selected]
+
+        async def compute() -> Dict[dt.date, CachedBody]:
+            stmt = get_dynamics_spimex(
+                start_date=selected[0], end_date=selected[-1], **filters
+            ).filter(or_(*(between(SpimexTradingResults.date, first, last)
+                           for first, last in get_date_runs(selected))))
+            rows = {day: [] for day in selected}
+            version = await get_dataset_version()
+            async with session_factory() as session:
+                for item in await fetch_all(session, stmt):
+                    rows[item.date].append(item.to_dict())
+            loaded = {day: make_body(data) for day, data in rows.items()}
+
+            today = dt.date.today()
+            tags = {keys[day]: [f'date:{day.isoformat()}'] for day in loaded}
+            await set_cache_many({keys[day]: data
+                                  for day, data in loaded.items()
+                                  if rows[day] or day < today},
+                                 grace=grace, tags=tags, version=version)
+            await set_cache_many({keys[day]: data
+                                  for day, data in loaded.items()
+                                  if not rows[day] and day >= today},
+                                 ttl=settings.CACHE_EMPTY_TTL, tags=tags,
+                                 version=version)
+            return loaded
+
+        async def probe() -> Dict[dt.date, CachedBody] | None:
+            data = await get_cache_entries(selected_keys, grace)
+            if any(not isinstance(value, CachedBody) or stale
+                   for value, stale in data):
+                return None
+            return {day: value for day, (value, _) in zip(selected, data)}
+
+        flight_key = (f'{selected_keys[0]}_{selected[-1].isoformat()}_'
+                      f'{len(selected)}')
+        return flight_key, compute, probe
+
+    stale = [day for day, (data, is_stale) in entries.items()
+             if data is not None and is_stale]
+    if stale:
+        redis_manager.refresh(*load(stale))
+        await redis_manager.count_stale(len(stale))
+
+    missing = [day for day, data in slices.items() if data is None]
+    if missing:
+        slices.update(await redis_manager.single_flight(*load(missing)))
+
+    return [slices[day] for day in days]
+
+
+def join_bodies(parts: List[CachedBody]) -> CachedBody:
+    """
+    Склеивает JSON-массивы в один массив без декодирования.
+
+    Args:
+        parts (List[CachedBody]): Тела с JSON-массивами
+    """
+    items = [part.body[1:-1] for part in parts if part.body != b'[]']
+    return CachedBody(b'[' + b','.join(items) + b']')
 
 
 def get_trading_results_spimex(
@@ -79,3 +547,79 @@ def get_trading_results_spimex(
 
     return select(SpimexTradingResults).filter_by(**filters).order_by(
         desc(SpimexTradingResults.date)).limit(limit)
+
+
+async def get_trading_results_cached(
+        session_factory: async_sessionmaker,
+        limit: int = 5,
+        oil_id: str | None = None,
+        delivery_type_id: str | None = None,
+        delivery_basis_id: str | None = None
+        ) -> CachedBody:
+    """
+    Возвращает последние торговые результаты из кэша или из БД.
+
+    Args:
+        session_factory (async_sessionmaker): Фабрика сессий БД
+        limit (int): Количество последних записей
+        oil_id (Optional[str]): ID нефтепродукта для фильтрации
+        delivery_type_id (Optional[str]): ID типа поставки для фильтрации
+        delivery_basis_id (Optional[str]): ID базиса поставки для фильтрации
+    """
+    cached_key = (f'trading_results:{oil_id}_{delivery_basis_id}_'
+                  f'{delivery_type_id}_{limit}')
+    stmt = get_trading_results_spimex(
+        oil_id=oil_id,
+        delivery_basis_id=delivery_basis_id,
+        delivery_type_id=delivery_type_id,
+        limit=limit)
+    return await get_or_set_cache(
+        cached_key, session_factory,
+        lambda session: fetch_all(session, stmt), to_dict=True)
+
+
+async def warm_up_cache(session_factory: async_sessionmaker) -> None:
+    """
+    Заполняет кэш самыми частыми запросами: последние даты, последние
+    результаты без фильтров и динамика без фильтров за WARM_DYNAMICS_DAYS.
+
+    Args:
+        session_factory (async_sessionmaker): Фабрика сессий БД
+    """
+    today = dt.date.today()
+    for limit in WARM_LAST_DATES:
+        await get_last_dates_cached(session_factory, limit)
+    await get_trading_results_cached(session_factory,
+                                     WARM_TRADING_RESULTS_LIMIT)
+    await get_dynamics_cached(
+        session_factory,
+        start_date=today - dt.timedelta(days=WARM_DYNAMICS_DAYS - 1),
+        end_date=today)
+
+
+async def refresh_spimex_cache(
+        session_factory: async_sessionmaker,
+        dates: Iterable[dt.date]
+        ) -> List[str]:
+    """
+    Сбрасывает кэш, затронутый загрузкой торгов за указанные даты,
+    и запускает фоновый прогрев.
+
+    Сначала увеличивается версия набора данных, от которой зависят ETag
+    ответов, и только затем сбрасываются пространства имен
+    INGEST_NAMESPACES и срезы динамики за загруженные даты: вычисление,
+    начатое по старой версии, не сможет записать устаревшее тело.
+
+    Args:
+        session_factory (async_sessionmaker): Фабрика сессий БД
+        dates (Iterable[dt.date]): Даты, данные за которые изменились
+
+    Returns:
+        List[str]: Удаленные ключи кэша
+    """
+    tags = [*INGEST_NAMESPACES,
+            *sorted({f'date:{day.isoformat()}' for day in dates})]
+    await bump_dataset_version()
+    keys = await invalidate_cache_tags(tags)
+    redis_manager.spawn(warm_up_cache(session_factory))
+    return keys
@@ -0,0 +1,82 @@
+from typing import Any, Dict, Sequence
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from core.http import http_manager
+from core.jobs import Job, job_manager
+from core.store import bulletin_store
+from services.ingest import ingest
+from services.parse import get_spimex
+from services.spimex import refresh_spimex_cache
+
+
+async def submit_spimex_job(times: Sequence[str]) -> str:
+    """
+    Ставит в очередь загрузку бюллетеней за указанные даты.
+
+    Args:
+        times (Sequence[str]): Даты в формате 'dd.mm.YYYY'
+
+    Returns:
+        str: Идентификатор задания
+    """
+    return await job_manager.submit(
+        {'dates': list(times)},
+        stage='queued',
+        dates={time: {'state': 'pending', 'rows': None, 'seconds': None,
+                      'error': None} for time in times},
+        counts=None,
+        failed_dates=None)
+
+
+async def run_spimex_job(job: Job, payload: Dict[str, Any],
+                         session_factory: async_sessionmaker) -> None:
+    """
+    Выполняет загрузку: скачивает и разбирает бюллетени, записывает
+    строки одной транзакцией и обновляет кэш.
+
+    Ход выполнения пишется в статус задания: stage (parsing, ingesting),
+    для каждой даты состояние (parsed, unchanged - файл не изменился
+    с прошлой загрузки, failed), число строк, время обработки и ошибка,
+    в конце количество вставленных, обновленных и неизменившихся строк
+    и список дат, которые загрузить не удалось. Успешные даты
+    записываются, даже если часть дат завершилась ошибкой, и после
+    фиксации транзакции их файлы отмечаются в bulletin_store как
+    записанные.
+
+    Args:
+        job (Job): Выполняемое задание
+        payload (Dict[str, Any]): Данные задания с ключом dates
+        session_factory (async_sessionmaker): Фабрика сессий БД
+
+    Raises:
+        ValueError: Если не удалось загрузить ни одной даты
+    """
+    async def on_date(time: str, rows: int | None = None,
+                      seconds: float = 0, error: str | None = None,
+                      skipped: bool = False) -> None:
+        job.status['dates'][time].update(
+            state=('failed' if error else
+                   'unchanged' if skipped else 'parsed'),
+            rows=rows, seconds=round(seconds, 3), error=error)
+        await job.save()
+
+    await job.update(stage='parsing')
+    client = await http_manager.get_client()
+    columns, failures = await get_spimex(client, tuple(payload['dates']),
+                                         on_date=on_date)
+    failed_dates = sorted(failures)
+    if failures and len(failures) == len(payload['dates']):
+        await job.update(stage='failed', failed_dates=failed_dates)
+        raise ValueError('Не удалось загрузить ни одной даты')
+
+    await job.update(stage='ingesting')
+    async with session_factory() as session:
+        counts = await ingest(session, columns)
+        await session.commit()
+    for time in payload['dates']:
+        if time not in failures:
+            await bulletin_store.mark_ingested(time)
+    if counts['inserted'] or counts['updated']:
+        await refresh_spimex_cache(session_factory, columns['date'])
+    await job.update(stage='done', counts=counts, failed_dates=failed_dates)
@@ -1,9 +1,13 @@
 import datetime as dt
 import json
+from unittest.mock import patch
 
 import pytest
+from sqlalchemy import text
 
-from core.cache import redis_manager
+from core.cache import (redis_manager, bump_dataset_version,
+                        get_dataset_version)
+from core.conditional import etag_matches, get_max_age
 
 
 class TestSpimexCreation:
@@ -18,7 +22,29 @@ class TestSpimexCreation:
 
         response = await async_client.post('/create_spimex',
                                            json=create_spimex_date)
-        assert response.status_code == 201
+        assert response.status_code == 202
+        job_id = response.json()['job_id']
+
+        job = await async_client.get(f'/jobs/{job_id}')
+        assert job.status_code == 200
+        assert job.json()['id'] == job_id
+        assert set(job.json()['dates']) == set(create_spimex_date['date'])
+
+    @pytest.mark.asyncio
+    async def test_create_spimex_invalid_date(self, async_client):
+        """Тест отказа для даты не в формате dd.mm.YYYY."""
+
+        response = await async_client.post(
+            '/create_spimex', json={'date': ['12.09.2025', '2025-09-12']})
+
+        assert response.status_code == 422
+
+    @pytest.mark.asyncio
+    async def test_unknown_job(self, async_client):
+        """Тест статуса несуществующего задания."""
+
+        response = await async_client.get('/jobs/unknown')
+        assert response.status_code == 404
 
 
 @pytest.mark.usefixtures('pull_spimex')
@@ -35,6 +61,43 @@ class TestSpimexQueries:
         assert response.status_code == 200
         assert response.json() == spimex_data
 
+    @pytest.mark.asyncio
+    async def test_get_all_pages(self, async_client, spimex_data):
+        """Тест keyset-пагинации списка всех записей."""
+
+        pages = []
+        params = {'limit': 2}
+        while True:
+            response = await async_client.get('/all', params=params)
+            assert response.status_code == 200
+            pages.append(response.json())
+            cursor = response.headers.get('X-Next-Cursor')
+            if not cursor:
+                break
+            params = {'limit': 2, 'cursor': cursor}
+
+        assert [len(page) for page in pages] == [2, 2, 1]
+        assert sum(pages, []) == spimex_data
+
+    @pytest.mark.asyncio
+    async def test_get_all_bad_cursor(self, async_client):
+        """Тест ответа на поврежденный курсор."""
+
+        response = await async_client.get('/all',
+                                          params={'cursor': 'broken'})
+        assert response.status_code == 400
+
+    @pytest.mark.asyncio
+    async def test_get_all_stream(self, async_client, spimex_data):
+        """Тест потоковой выдачи всех записей в NDJSON."""
+
+        response = await async_client.get('/all', params={'stream': True})
+        assert response.status_code == 200
+        assert response.headers['content-type'] == 'application/x-ndjson'
+
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert rows == spimex_data
+
     @pytest.mark.parametrize(('limit', 'date'), ((1, ['2025-01-19']),
                              (2, ['2025-01-19', '2025-01-18'])))
     @pytest.mark.asyncio
@@ -74,6 +137,27 @@ class TestSpimexQueries:
 
         assert spimex_dict == result_dict
 
+    @pytest.mark.asyncio
+    async def test_get_dynamics_day_slices(self, async_client, db_session,
+                                           spimex_data):
+        """Тест сборки пересекающихся периодов из срезов по дням."""
+
+        first = await async_client.get('/get_dynamics', params={
+            'start_date': '2025-01-15', 'end_date': '2025-01-16'})
+        assert [item['id'] for item in first.json()] == [1, 2]
+
+        await db_session.execute(
+            text('DELETE FROM spimex_trading_results WHERE id IN (2, 3)'))
+        await db_session.commit()
+
+        second = await async_client.get('/get_dynamics', params={
+            'start_date': '2025-01-16', 'end_date': '2025-01-18'})
+
+        assert second.json() == [spimex_data[1], spimex_data[3]]
+        empty = await redis_manager._client.get(
+            'get_dynamics:None_None_None:2025-01-17')
+        assert redis_manager.serializer.decode(empty).body == b'[]'
+
     @pytest.mark.parametrize('params_fixture', [
         'get_trading_result_params',
         'get_trading_result_params_minimal'
@@ -104,8 +188,8 @@ class TestSpimexQueries:
                 'delivery_basis_id': 'BASIS001',
                 'delivery_type_id': 'TYPE001',
                 'start_date': dt.date(2025, 1, 15),
-                'end_date': dt.date(2025, 1, 16)
-            }, "get_dynamics:OIL001_BASIS001_TYPE001_2025-01-15_2025-01-16"),
+                'end_date': dt.date(2025, 1, 15)
+            }, "get_dynamics:OIL001_BASIS001_TYPE001:2025-01-15"),
             ('/get_trading_results', {
                     'oil_id': 'OIL001',
                     'delivery_basis_id': 'BASIS001',
@@ -129,12 +213,136 @@ class TestSpimexQueries:
         cached_data = await redis_manager._client.get(cache_key)
         assert cached_data is not None
 
-        redis_data = json.loads(cached_data)
+        cached_body = redis_manager.serializer.decode(cached_data)
+        redis_data = json.loads(cached_body.body)
 
         response2 = await async_client.get(url, params=params)
         response_data = response2.json()
+        assert response2.content == cached_body.body
+        assert response2.headers['etag'] == response1.headers['etag']
 
         response_dicts = [sorted(item) for item in response_data]
         redis_dicts = [sorted(item) for item in redis_data]
 
         assert response_dicts == redis_dicts
+
+
+@pytest.mark.usefixtures('pull_rollup')
+class TestSpimexAggregatesApi:
+    """Тесты для эндпоинта агрегатов."""
+
+    @pytest.mark.asyncio
+    async def test_get_aggregates(self, async_client):
+        """Тест агрегатов по месяцу и нефтепродукту."""
+
+        response = await async_client.get('/get_aggregates', params={
+            'start_date': '2025-01-15', 'end_date': '2025-01-19',
+            'group_by': ['month', 'oil_id']})
+
+        assert response.status_code == 200
+        rows = response.json()
+        assert len(rows) == 4
+        assert rows[0] == {'period': '2025-01-01', 'oil_id': 'OIL001',
+                           'volume': 3000, 'total': '125001.25',
+                           'count': 25, 'vwap': '41.67'}
+
+    @pytest.mark.parametrize(('group_by', 'status_code'), (
+        (['week', 'month'], 400),
+        (['price'], 422)
+    ))
+    @pytest.mark.asyncio
+    async def test_invalid_group_by(self, async_client, group_by,
+                                    status_code):
+        """Тест ошибок для неверной группировки."""
+
+        response = await async_client.get('/get_aggregates', params={
+            'start_date': '2025-01-15', 'end_date': '2025-01-19',
+            'group_by': group_by})
+
+        assert response.status_code == status_code
+
+
+@pytest.mark.usefixtures('pull_spimex')
+class TestConditionalRequests:
+    """Тесты для ETag и условных запросов."""
+
+    @pytest.mark.parametrize(('url', 'params'), (
+        ('/all', {'limit': 2}),
+        ('/get_last_trading_dates', {'limit': 3}),
+        ('/get_dynamics', {'start_date': '2025-01-15',
+                           'end_date': '2025-01-16'}),
+        ('/get_trading_results', None)
+    ))
+    @pytest.mark.asyncio
+    async def test_not_modified(self, async_client, url, params):
+        """Тест ответа 304 без обращения к кэшу и БД."""
+
+        first = await async_client.get(url, params=params)
+        etag = first.headers['etag']
+        assert etag.startswith(f'"v{await get_dataset_version()}-')
+        max_age = first.headers['cache-control'].removeprefix(
+            'public, max-age=')
+        assert abs(int(max_age) - get_max_age()) <= 1
+
+        with patch.object(redis_manager, 'get_entries',
+                          side_effect=AssertionError('Чтение кэша')):
+            second = await async_client.get(
+                url, params=params, headers={'If-None-Match': etag})
+
+        assert second.status_code == 304
+        assert second.content == b''
+        assert second.headers['etag'] == etag
+
+    @pytest.mark.parametrize(('current', 'max_age'), (
+        (dt.datetime(2025, 1, 20, 10, 0), 4 * 3600 + 11 * 60),
+        (dt.datetime(2025, 1, 20, 14, 11), 24 * 3600),
+        (dt.datetime(2025, 1, 20, 15, 0), 23 * 3600 + 11 * 60)
+    ))
+    @pytest.mark.asyncio
+    async def test_max_age_until_publication(self, async_client, current,
+                                             max_age):
+        """Тест срока хранения ответа до ближайших 14:11."""
+
+        with patch('core.conditional.now', return_value=current):
+            response = await async_client.get('/get_trading_results')
+
+        assert response.headers['cache-control'] == \
+            f'public, max-age={max_age}'
+
+    @pytest.mark.asyncio
+    async def test_etag_changes_with_version(self, async_client):
+        """Тест смены ETag после загрузки новых данных."""
+
+        first = await async_client.get('/get_trading_results')
+        other = await async_client.get('/get_trading_results',
+                                       params={'limit': 3})
+        version = await bump_dataset_version()
+        second = await async_client.get(
+            '/get_trading_results',
+            headers={'If-None-Match': first.headers['etag']})
+
+        assert first.headers['etag'] != other.headers['etag']
+        assert second.status_code == 200
+        assert second.headers['etag'].startswith(f'"v{version}-')
+
+    @pytest.mark.asyncio
+    async def test_etag_changes_after_version_loss(self, async_client):
+        """Тест новой эпохи версии после потери ключа в Redis."""
+
+        first = await async_client.get('/get_trading_results')
+        client = await redis_manager.get_client()
+        await client.flushall()
+        second = await async_client.get(
+            '/get_trading_results',
+            headers={'If-None-Match': first.headers['etag']})
+
+        assert second.status_code == 200
+        assert second.headers['etag'] != first.headers['etag']
+
+    def test_etag_matches(self):
+        """Тест разбора заголовка If-None-Match."""
+
+        assert etag_matches('W/"v1-a", "v2-b"', '"v2-b"')
+        assert etag_matches('*', '"v2-b"')
+        assert not etag_matches('"v1-b"', '"v2-b"')
+        assert not etag_matches(None, '"v2-b"')
@@ -1,11 +1,22 @@
+import asyncio
 import datetime as dt
 import json
+import time
+
+from contextlib import nullcontext
+from unittest.mock import patch
 
 import pytest
 from redis.asyncio.client import Redis
 
-from core.cache import (redis_manager, DateEncoder,
-                        RedisManager, get_cache, set_cache)
+from core.cache import (redis_manager, DateEncoder, LocalCache,
+                        RedisManager, get_cache, set_cache, invalidate_cache,
+                        get_or_set_cache, set_cache_many,
+                        invalidate_cache_tags, STALE_COUNTER,
+                        get_dataset_version, bump_dataset_version,
+                        CacheSerializer, COMPRESSIONS, CODEC_MAGIC,
+                        CODEC_VERSION, CachedBody, make_body)
+from core.config import settings
 from models.spimex import SpimexTradingResults
 
 
@@ -61,7 +72,7 @@ class TestCache:
         redis_manager = RedisManager()
         await redis_manager.set_cached_data('key', 'value')
         result = await redis_manager.get_cached_data('key')
-        assert result == 'value'
+        assert result == b'value'
 
     @pytest.mark.asyncio
     async def test_get_json_cache(self):
@@ -121,3 +132,369 @@ class TestCache:
                     'updated_on': '2025-01-19T09:05:26'
                     }
                 ]
+
+
+class TestLocalCache:
+    """Тесты для внутрипроцессного кэша."""
+
+    def test_evicts_least_recently_used(self):
+        """Тест вытеснения по размеру в байтах."""
+
+        cache = LocalCache(max_bytes=10)
+        cache.set('a', 'A', 4, 60)
+        cache.set('b', 'B', 4, 60)
+        cache.get('a')
+        cache.set('c', 'C', 4, 60)
+
+        assert cache.get('a') == 'A'
+        assert cache.get('b') is None
+        assert cache.get('c') == 'C'
+        assert cache.size == 8
+
+    def test_skips_oversized_and_expired(self):
+        """Тест пропуска слишком больших и истекших записей."""
+
+        cache = LocalCache(max_bytes=10)
+        cache.set('big', 'X', 11, 60)
+        cache.set('old', 'Y', 1, -1)
+
+        assert cache.get('big') is None
+        assert cache.get('old') is None
+        assert cache.size == 0
+
+    @pytest.mark.asyncio
+    async def test_get_cache_served_locally(self):
+        """Тест ответа из локального кэша без обращения к Redis."""
+
+        await set_cache('local_key', ('value',))
+        await redis_manager._client.delete('local_key')
+
+        assert await get_cache('local_key') == ['value']
+
+    @pytest.mark.asyncio
+    async def test_get_cache_fills_local_with_redis_ttl(self):
+        """Тест заполнения локального кэша со сроком жизни ключа Redis."""
+
+        await redis_manager.set_cached_data('ttl_key', '[1]', ttl=100)
+
+        assert await get_cache('ttl_key') == [1]
+        _, size, _, expires_at = redis_manager.local._data['ttl_key']
+        assert size == 3
+        assert 0 < expires_at - time.monotonic() <= 100
+
+    @pytest.mark.asyncio
+    async def test_invalidate_reaches_other_workers(self):
+        """Тест сброса локального кэша другого процесса через pub/sub."""
+
+        worker = RedisManager()
+        worker.start_listener()
+        try:
+            await asyncio.sleep(0.1)
+            worker.local.set('shared', ['stale'], 7, 60)
+            worker.local.set('other', ['kept'], 6, 60)
+
+            await invalidate_cache(['shared'])
+            for _ in range(50):
+                if worker.local.get('shared') is None:
+                    break
+                await asyncio.sleep(0.02)
+
+            assert worker.local.get('shared') is None
+            assert worker.local.get('other') == ['kept']
+        finally:
+            await worker.close()
+
+    @pytest.mark.asyncio
+    async def test_listener_reconnects(self, monkeypatch):
+        """Тест переподписки после обрыва с очисткой локального кэша."""
+
+        worker = RedisManager()
+        get_client = worker.get_client
+        calls = []
+
+        async def flaky_client():
+            calls.append(len(calls))
+            if len(calls) == 1:
+                raise ConnectionError('Redis недоступен')
+            return await get_client()
+
+        monkeypatch.setattr(worker, 'get_client', flaky_client)
+        monkeypatch.setattr(settings, 'CACHE_LISTEN_BACKOFF', 0)
+        worker.local.set('missed', ['stale'], 7, 60)
+        worker.start_listener()
+        try:
+            for _ in range(50):
+                if worker.local.get('missed') is None:
+                    break
+                await asyncio.sleep(0.02)
+            worker.local.set('shared', ['stale'], 7, 60)
+
+            await invalidate_cache(['shared'])
+            for _ in range(50):
+                if worker.local.get('shared') is None:
+                    break
+                await asyncio.sleep(0.02)
+
+            assert len(calls) == 2
+            assert worker.local.get('missed') is None
+            assert worker.local.get('shared') is None
+        finally:
+            await worker.close()
+
+
+class TestSingleFlight:
+    """Тесты для объединения одновременных промахов кэша."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_load_once(self):
+        """Тест одной загрузки на несколько одновременных промахов."""
+
+        calls = []
+
+        async def loader(session):
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return ['value']
+
+        results = await asyncio.gather(*(
+            get_or_set_cache('flight_key', nullcontext, loader)
+            for _ in range(10)))
+
+        assert calls == [1]
+        assert [result.body for result in results] == [b'["value"]'] * 10
+        assert (await get_cache('flight_key')).body == b'["value"]'
+
+    @pytest.mark.asyncio
+    async def test_waits_for_other_worker(self):
+        """Тест ожидания результата, который считает другой процесс."""
+
+        async def loader(session):
+            raise AssertionError('Пересчет должен выполнить другой процесс')
+
+        async def other_worker():
+            await asyncio.sleep(0.1)
+            worker = RedisManager()
+            await worker.set_cached_data(
+                'locked_key', worker.serializer.encode(make_body(['remote'])),
+                ttl=100000)
+            await worker.close()
+
+        await redis_manager._client.set('lock:locked_key', 'other', px=5000)
+        with patch.object(settings, 'CACHE_LOCK_POLL', 0.01):
+            result, _ = await asyncio.gather(
+                get_or_set_cache('locked_key', nullcontext, loader),
+                other_worker())
+
+        assert result.body == b'["remote"]'
+
+    @pytest.mark.asyncio
+    async def test_recomputes_after_lease(self):
+        """Тест пересчета, если аренда блокировки истекла без результата."""
+
+        async def loader(session):
+            return ['fallback']
+
+        await redis_manager._client.set('lock:stuck_key', 'other', px=5000)
+        with patch.object(settings, 'CACHE_LOCK_LEASE', 0.1), \
+             patch.object(settings, 'CACHE_LOCK_POLL', 0.01):
+            result = await get_or_set_cache('stuck_key', nullcontext, loader)
+
+        assert result.body == b'["fallback"]'
+
+    @pytest.mark.asyncio
+    async def test_recomputes_after_unlock(self):
+        """Тест пересчета сразу после снятия блокировки без результата."""
+
+        async def loader(session):
+            return []
+
+        async def other_worker():
+            await asyncio.sleep(0.1)
+            await redis_manager._client.delete('lock:empty_key')
+
+        await redis_manager._client.set('lock:empty_key', 'other', px=5000)
+        start = time.monotonic()
+        with patch.object(settings, 'CACHE_LOCK_POLL', 0.01):
+            result, _ = await asyncio.gather(
+                get_or_set_cache('empty_key', nullcontext, loader),
+                other_worker())
+
+        assert result.body == b'[]'
+        assert time.monotonic() - start < 1
+
+
+class TestStaleWhileRevalidate:
+    """Тесты для отдачи устаревших данных с фоновым пересчетом."""
+
+    def test_local_entry_becomes_stale(self):
+        """Тест признака устаревания записи локального кэша."""
+
+        cache = LocalCache(max_bytes=10)
+        cache.set('fresh', 'A', 1, 60, grace=10)
+        cache.set('stale', 'B', 1, 60, grace=60)
+
+        assert cache.get_entry('fresh') == ('A', False)
+        assert cache.get_entry('stale') == ('B', True)
+
+    def test_ttl_jitter(self):
+        """Тест случайного сдвига мягкого времени жизни."""
+
+        manager = RedisManager()
+        with patch.object(settings, 'CACHE_TTL_JITTER', 30):
+            ttls = {manager.get_ttl() - manager.get_date()
+                    for _ in range(50)}
+
+        assert ttls <= set(range(31))
+        assert len(ttls) > 1
+
+    @pytest.mark.asyncio
+    async def test_set_keeps_key_for_grace(self):
+        """Тест хранения ключа в Redis дольше мягкого срока."""
+
+        await redis_manager.set_values({'grace_key': [1]}, ttl=100,
+                                       grace=50)
+
+        ttl = await redis_manager._client.ttl('grace_key')
+        assert 100 < ttl <= 150
+
+    @pytest.mark.asyncio
+    async def test_serves_stale_and_refreshes(self):
+        """Тест отдачи устаревшего значения и его фонового обновления."""
+
+        calls = []
+
+        async def loader(session):
+            calls.append(1)
+            return ['fresh']
+
+        await redis_manager.set_cached_data(
+            'swr_key', redis_manager.serializer.encode(make_body(['stale'])),
+            ttl=100)
+        served = redis_manager.stale_served
+
+        with patch.object(settings, 'CACHE_STALE_GRACE', 200):
+            result = await get_or_set_cache('swr_key', nullcontext, loader)
+            await asyncio.gather(*redis_manager._background)
+            refreshed = await get_or_set_cache('swr_key', nullcontext,
+                                               loader)
+
+        assert result.body == b'["stale"]'
+        assert refreshed.body == b'["fresh"]'
+        assert calls == [1]
+        assert redis_manager.stale_served == served + 1
+        assert await redis_manager._client.get(STALE_COUNTER)
+
+
+class TestCacheTags:
+    """Тесты для сброса кэша по тегам."""
+
+    @pytest.mark.asyncio
+    async def test_invalidate_by_namespace_and_tag(self):
+        """Тест сброса ключей пространства имен и тега без SCAN."""
+
+        await set_cache_many({'trading_results:a': [1], 'all': [2]})
+        await set_cache_many(
+            {'get_dynamics:x:2025-01-15': [3],
+             'get_dynamics:x:2025-01-16': [4]},
+            tags={'get_dynamics:x:2025-01-15': ['date:2025-01-15'],
+                  'get_dynamics:x:2025-01-16': ['date:2025-01-16']})
+
+        with patch.object(redis_manager, 'invalidate',
+                          side_effect=AssertionError('Повторный DEL')):
+            keys = await invalidate_cache_tags(
+                ['ns:trading_results', 'date:2025-01-15'])
+
+        assert keys == ['get_dynamics:x:2025-01-15', 'trading_results:a']
+        assert await get_cache('trading_results:a') is None
+        assert await get_cache('get_dynamics:x:2025-01-15') is None
+        assert await get_cache('all') == [2]
+        assert await get_cache('get_dynamics:x:2025-01-16') == [4]
+        assert not await redis_manager._client.smembers(
+            'tag:ns:trading_results')
+        assert not await redis_manager._client.exists(
+            'tag:ns:get_dynamics')
+
+    @pytest.mark.asyncio
+    async def test_tag_lives_as_long_as_keys(self):
+        """Тест срока жизни множества тега по самому долгому ключу."""
+
+        await set_cache_many({'all:1': [1]}, ttl=500)
+        await set_cache_many({'all:2': [2]}, ttl=100)
+
+        ttl = await redis_manager._client.ttl('tag:ns:all')
+        assert 400 < ttl <= 500
+
+    @pytest.mark.asyncio
+    async def test_skip_write_after_version_bump(self):
+        """Тест отказа от записи тела, посчитанного по старой версии."""
+
+        version = await get_dataset_version()
+        await set_cache_many({'all:1': [1]}, version=version)
+        await bump_dataset_version()
+        await set_cache_many({'all:2': [2]}, version=version)
+
+        assert await get_cache('all:1') == [1]
+        assert await get_cache('all:2') is None
+        assert not await redis_manager._client.sismember('tag:ns:all',
+                                                         'all:2')
+
+
+class TestCacheSerializer:
+    """Тесты для кодеков записей кэша."""
+
+    ROWS = [{'id': 1, 'date': dt.date(2025, 1, 15), 'total': '10.50',
+             'created_on': dt.datetime(2025, 1, 15, 9, 5, 26)}] * 50
+    DECODED = [{'id': 1, 'date': '2025-01-15', 'total': '10.50',
+                'created_on': '2025-01-15T09:05:26'}] * 50
+
+    @pytest.mark.parametrize('codec', ('json', 'orjson', 'msgpack'))
+    @pytest.mark.parametrize('compression', ('none', 'zstd', 'lz4'))
+    def test_round_trip(self, codec, compression):
+        """Тест кодирования и декодирования каждым кодеком."""
+
+        if not COMPRESSIONS[compression].available:
+            pytest.skip(f'Пакет для {compression} не установлен')
+        serializer = CacheSerializer(codec, compression, 100)
+
+        data = serializer.encode(self.ROWS)
+
+        assert data[:2] == CODEC_MAGIC + bytes((CODEC_VERSION,))
+        assert data[3] == COMPRESSIONS[compression].id
+        assert serializer.decode(data) == self.DECODED
+
+    def test_small_values_not_compressed(self):
+        """Тест хранения значений меньше порога без сжатия."""
+
+        serializer = CacheSerializer('orjson', 'none', 100)
+        serializer.compression = COMPRESSIONS['zstd']
+
+        assert serializer.encode([1])[3] == COMPRESSIONS['none'].id
+
+    def test_reads_other_formats(self):
+        """Тест чтения записей прежнего и другого формата."""
+
+        serializer = CacheSerializer('orjson', 'none', 100)
+        other = CacheSerializer('msgpack', 'none', 100)
+
+        assert serializer.decode(b'[1, 2]') == [1, 2]
+        assert serializer.decode(other.encode([1, 2])) == [1, 2]
+        assert serializer.decode(
+            CODEC_MAGIC + bytes((CODEC_VERSION + 1, 1, 0)) + b'[]') is None
+
+    def test_body_round_trip(self):
+        """Тест хранения готового тела ответа без перекодирования."""
+
+        serializer = CacheSerializer('msgpack', 'none', 100)
+        cached = make_body(self.ROWS, {'X-Next-Cursor': 'abc'})
+
+        decoded = serializer.decode(serializer.encode(cached))
+
+        assert isinstance(decoded, CachedBody)
+        assert decoded == cached
+        assert json.loads(decoded.body) == self.DECODED
+
+    def test_unknown_codec(self):
+        """Тест ошибки для неизвестного кодека."""
+
+        with pytest.raises(ValueError):
+            CacheSerializer('pickle', 'none', 100)
@@ -10,9 +10,13 @@ from api.main import app
 from core.database import (create_engine_with_config,
                            async_sessionmaker,
                            Base,
-                           get_session)
+                           get_session,
+                           get_session_factory)
 from models.spimex import SpimexTradingResults
+from services.rollup import backfill_rollup
 from core.cache import redis_manager
+from core.config import settings
+from core.jobs import job_manager
 
 
 @pytest_asyncio.fixture(scope="function")
@@ -31,6 +35,8 @@ async def test_app():
         await conn.run_sync(Base.metadata.create_all)
 
     app.dependency_overrides[get_session] = override_get_session
+    app.dependency_overrides[get_session_factory] = \
+        lambda: test_async_session
 
     yield app
 
@@ -49,6 +55,13 @@ async def db_session(test_app):
         yield session
 
 
+@pytest.fixture
+def session_factory(test_app):
+    """Фикстура фабрики сессий тестовой БД."""
+
+    return app.dependency_overrides[get_session_factory]()
+
+
 @pytest.fixture
 def spimex_data():
     """Тестовые данные для SpimexTradingResults."""
@@ -157,6 +170,14 @@ async def pull_spimex(db_session, spimex_data):
     return spimex_data
 
 
+@pytest_asyncio.fixture
+async def pull_rollup(db_session, pull_spimex):
+    """Заполняет дневные суммы по тестовым данным Spimex."""
+
+    await backfill_rollup(db_session)
+    return pull_spimex
+
+
 @pytest_asyncio.fixture
 async def async_client(test_app):
     """Асинхронный HTTP клиент для тестов."""
@@ -176,6 +197,7 @@ async def redis_manager_fixture():
         await redis_manager.get_client()
 
     await redis_manager._client.flushall()
+    redis_manager.local.clear()
 
     yield
 
@@ -184,6 +206,24 @@ async def redis_manager_fixture():
         redis_manager._client = None
 
 
+@pytest_asyncio.fixture(autouse=True)
+async def job_manager_fixture():
+    """Останавливает воркер заданий и очищает очередь после теста."""
+
+    yield job_manager
+    await job_manager.close()
+    job_manager._backend = None
+
+
+@pytest.fixture(autouse=True)
+def bulletin_store_dir(tmp_path, monkeypatch):
+    """Хранилище бюллетеней во временном каталоге теста."""
+
+    monkeypatch.setattr(settings, 'BULLETIN_STORE_DIR',
+                        str(tmp_path / 'bulletins'))
+    return tmp_path / 'bulletins'
+
+
 @pytest.fixture
 def last_spimex_data():
     """Данные последних дат для тестов."""
@@ -0,0 +1,43 @@
+import datetime as dt
+
+import pytest
+from sqlalchemy import func, insert, inspect, select, text
+
+from core.database import sync_indexes
+from models.spimex import SpimexTradingResults
+
+
+class TestSyncIndexes:
+    """Тесты для досоздания индексов в существующей БД."""
+
+    @pytest.mark.asyncio
+    async def test_sync_indexes_removes_duplicates(self, db_session):
+        """Тест создания уникального индекса поверх дубликатов."""
+
+        await db_session.execute(text('DROP INDEX uq_spimex_product_date'))
+        row = {
+            'exchange_product_id': 'A592ACN060F',
+            'exchange_product_name': 'Бензин',
+            'oil_id': 'A592',
+            'delivery_basis_id': 'ACN',
+            'delivery_basis_name': 'ст. Ачинск',
+            'delivery_type_id': 'F',
+            'date': dt.date(2025, 9, 12)
+        }
+        await db_session.execute(insert(SpimexTradingResults),
+                                 [row, row, {**row, 'oil_id': 'A593'}])
+
+        connection = await db_session.connection()
+        await connection.run_sync(sync_indexes)
+        indexes = await connection.run_sync(
+            lambda conn: inspect(conn).get_indexes(
+                SpimexTradingResults.__tablename__))
+
+        rows = (await db_session.execute(
+            select(SpimexTradingResults.oil_id,
+                   func.count()).group_by(SpimexTradingResults.oil_id)
+        )).all()
+
+        assert 'uq_spimex_product_date' in {index['name']
+                                            for index in indexes}
+        assert rows == [('A593', 1)]
@@ -0,0 +1,156 @@
+import asyncio
+from unittest.mock import patch
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from core.config import settings
+from core.http import HttpManager, get_backoff, with_retries
+from services.parse import download_file, parse_href
+
+
+class TestHttpManager:
+    """Тесты для общего HTTP-клиента."""
+
+    @pytest.mark.asyncio
+    async def test_get_client_reuses_session(self):
+        """Тест переиспользования одной сессии между вызовами."""
+
+        manager = HttpManager()
+        client = await manager.get_client()
+        try:
+            assert await manager.get_client() is client
+            assert client.connector.limit == settings.HTTP_POOL_LIMIT
+            assert (client.connector.limit_per_host ==
+                    settings.HTTP_POOL_LIMIT_PER_HOST)
+        finally:
+            await manager.close()
+        assert manager._client is None
+        assert client.closed
+
+    @pytest.mark.asyncio
+    async def test_parse_href_with_local_server(self):
+        """Тест парсинга ссылки через локальный сервер-заглушку."""
+
+        html = """
+            <div id="comp_d609bce6ada86eff0b6f7e49e6bae904">
+                <div class="accordeon-inner__wrap-item">
+                    <span>12.09.2025</span>
+                    <a class="accordeon-inner__item-title link xls"
+                    href="/upload/file.xls?r=1">Скачать</a>
+                </div>
+            </div>
+            """
+
+        async def index(request):
+            return web.Response(text=html, content_type='text/html')
+
+        app = web.Application()
+        app.router.add_get('/results/', index)
+
+        async with TestServer(app) as server:
+            async with aiohttp.ClientSession() as client:
+                result = await parse_href(
+                    client, str(server.make_url('/results/')), '12.09.2025')
+        assert result == 'https://spimex.com/upload/file.xls'
+
+
+class TestRetries:
+    """Тесты для повторов запросов с паузой."""
+
+    @pytest.mark.asyncio
+    async def test_retries_server_errors(self):
+        """Тест повтора скачивания после ответов 503."""
+
+        calls = []
+
+        async def bulletin(request):
+            calls.append(request)
+            if len(calls) < 3:
+                return web.Response(status=503)
+            return web.Response(body=b'xls')
+
+        app = web.Application()
+        app.router.add_get('/file.xls', bulletin)
+
+        async with TestServer(app) as server:
+            async with aiohttp.ClientSession() as client:
+                result = await with_retries(lambda: download_file(
+                    client, str(server.make_url('/file.xls'))))
+
+        with result.file:
+            assert result.file.read() == b'xls'
+        assert len(calls) == 3
+
+    @pytest.mark.asyncio
+    async def test_gives_up(self):
+        """Тест ошибки после исчерпания повторов и без повторов для 404."""
+
+        calls = []
+
+        async def failing():
+            calls.append(1)
+            raise asyncio.TimeoutError()
+
+        with patch.object(settings, 'HTTP_RETRIES', 2):
+            with pytest.raises(asyncio.TimeoutError):
+                await with_retries(failing)
+        assert len(calls) == 3
+
+        async def missing():
+            calls.append(1)
+            raise aiohttp.ClientResponseError(None, (), status=404)
+
+        with pytest.raises(aiohttp.ClientResponseError):
+            await with_retries(missing)
+        assert len(calls) == 4
+
+    @pytest.mark.parametrize('chunked', (False, True))
+    @pytest.mark.asyncio
+    async def test_download_size_limit(self, chunked):
+        """Тест отказа от файла больше DOWNLOAD_MAX_BYTES."""
+
+        calls = []
+
+        async def bulletin(request):
+            calls.append(request)
+            if not chunked:
+                return web.Response(body=b'x' * 100)
+            response = web.StreamResponse()
+            response.enable_chunked_encoding()
+            await response.prepare(request)
+            for _ in range(10):
+                await response.write(b'x' * 10)
+            await response.write_eof()
+            return response
+
+        app = web.Application()
+        app.router.add_get('/file.xls', bulletin)
+
+        async with TestServer(app) as server:
+            async with aiohttp.ClientSession() as client:
+                with patch.object(settings, 'DOWNLOAD_MAX_BYTES', 50), \
+                     patch.object(settings, 'DOWNLOAD_CHUNK_BYTES', 16):
+                    with pytest.raises(ValueError):
+                        await with_retries(lambda: download_file(
+                            client, str(server.make_url('/file.xls'))))
+                with patch.object(settings, 'DOWNLOAD_SPOOL_BYTES', 16), \
+                     patch.object(settings, 'DOWNLOAD_CHUNK_BYTES', 16):
+                    result = await download_file(
+                        client, str(server.make_url('/file.xls')))
+
+        with result.file:
+            assert result.file._rolled
+            assert result.file.read() == b'x' * 100
+        assert len(calls) == 2
+
+    def test_backoff(self):
+        """Тест экспоненциального роста паузы с ограничением сверху."""
+
+        with patch.object(settings, 'HTTP_BACKOFF_BASE', 1), \
+             patch.object(settings, 'HTTP_BACKOFF_MAX', 5):
+            assert all(0 <= get_backoff(0) <= 1 for _ in range(50))
+            assert all(0 <= get_backoff(2) <= 4 for _ in range(50))
+            assert all(0 <= get_backoff(10) <= 5 for _ in range(50))
@@ -0,0 +1,157 @@
+import datetime as dt
+import os
+from decimal import Decimal
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from core.database import Base
+from models.spimex import SpimexDailyRollup, SpimexTradingResults
+from services.ingest import (INSERT_COLUMNS, STAGING_TABLE, copy_upsert,
+                             get_rows, ingest)
+
+POSTGRES_URL = os.environ.get('TEST_POSTGRES_URL')
+
+
+@pytest_asyncio.fixture
+async def pg_session():
+    """Сессия PostgreSQL из TEST_POSTGRES_URL с пустыми таблицами."""
+
+    if not POSTGRES_URL:
+        pytest.skip('TEST_POSTGRES_URL не задан')
+    engine = create_async_engine(POSTGRES_URL)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    async with async_sessionmaker(bind=engine)() as session:
+        yield session
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+    await engine.dispose()
+
+
+@pytest.fixture
+def ingest_columns():
+    """Колонки значений в том виде, в каком их возвращает get_spimex."""
+
+    return {
+        'exchange_product_id': ['A592ACN060F', 'DT5KUFA001A'],
+        'exchange_product_name': ['Бензин', 'Дизельное топливо'],
+        'oil_id': ['A592', 'DT5K'],
+        'delivery_basis_id': ['ACN', 'UFA'],
+        'delivery_basis_name': ['ст. Ачинск', 'ст. Уфа'],
+        'delivery_type_id': ['F', 'A'],
+        'volume': [120, None],
+        'total': [Decimal('6240000'), None],
+        'count': [4, None],
+        'date': [dt.date(2025, 9, 12)] * 2
+    }
+
+
+class TestIngest:
+    """Тесты для идемпотентной записи торговых результатов."""
+
+    def test_get_rows(self, ingest_columns):
+        """Тест сборки строк в порядке колонок вставки."""
+
+        rows = get_rows(ingest_columns)
+        assert len(rows) == 2
+        assert dict(zip(INSERT_COLUMNS, rows[0]))['oil_id'] == 'A592'
+
+    @pytest.mark.asyncio
+    async def test_ingest(self, db_session, ingest_columns):
+        """Тест первичной вставки строк."""
+
+        counts = await ingest(db_session, ingest_columns)
+        await db_session.commit()
+
+        result = await db_session.execute(
+            select(SpimexTradingResults).order_by(SpimexTradingResults.id))
+        spimex_objects = result.scalars().all()
+
+        assert counts == {'inserted': 2, 'updated': 0, 'unchanged': 0}
+        assert [obj.exchange_product_id for obj in spimex_objects] == \
+            ingest_columns['exchange_product_id']
+        assert spimex_objects[0].total == Decimal('6240000')
+        assert spimex_objects[1].volume is None
+        assert spimex_objects[0].created_on is not None
+
+    @pytest.mark.asyncio
+    async def test_ingest_is_idempotent(self, db_session, ingest_columns):
+        """Тест повторной загрузки той же даты."""
+
+        await ingest(db_session, ingest_columns)
+        await db_session.commit()
+
+        unchanged = await ingest(db_session, ingest_columns)
+        ingest_columns['volume'] = [150, None]
+        updated = await ingest(db_session, ingest_columns)
+        await db_session.commit()
+
+        total = await db_session.scalar(
+            select(func.count()).select_from(SpimexTradingResults))
+        volume = await db_session.scalar(
+            select(SpimexTradingResults.volume).filter_by(
+                exchange_product_id='A592ACN060F'))
+
+        assert unchanged == {'inserted': 0, 'updated': 0, 'unchanged': 2}
+        assert updated == {'inserted': 0, 'updated': 1, 'unchanged': 1}
+        assert total == 2
+        assert volume == 150
+
+    @pytest.mark.asyncio
+    async def test_ingest_empty(self, db_session):
+        """Тест записи пустого набора колонок."""
+
+        assert await ingest(db_session, {}) == {
+            'inserted': 0, 'updated': 0, 'unchanged': 0}
+
+
+@pytest.mark.postgres
+class TestCopyUpsert:
+    """Тесты загрузки через COPY во временную таблицу PostgreSQL."""
+
+    @pytest.mark.asyncio
+    async def test_copy_upsert(self, pg_session, ingest_columns):
+        """Тест вставки и обновления строк через временную таблицу."""
+
+        rows = get_rows(ingest_columns)
+        await copy_upsert(pg_session, rows)
+        changed = [rows[0][:6] + (150, Decimal('7800000'), 5, rows[0][9])]
+        await copy_upsert(pg_session, changed)
+        await pg_session.commit()
+
+        result = await pg_session.execute(
+            select(SpimexTradingResults).order_by(
+                SpimexTradingResults.exchange_product_id))
+        spimex_objects = result.scalars().all()
+        staging = await pg_session.scalar(text(
+            f"SELECT to_regclass('pg_temp.{STAGING_TABLE}')"))
+
+        assert len(spimex_objects) == 2
+        assert spimex_objects[0].volume == 150
+        assert spimex_objects[0].total == Decimal('7800000')
+        assert spimex_objects[0].updated_on is not None
+        assert spimex_objects[1].volume is None
+        assert staging is None
+
+    @pytest.mark.asyncio
+    async def test_ingest(self, pg_session, ingest_columns):
+        """Тест идемпотентной загрузки и дневных сумм на PostgreSQL."""
+
+        inserted = await ingest(pg_session, ingest_columns)
+        await pg_session.commit()
+        unchanged = await ingest(pg_session, ingest_columns)
+        ingest_columns['volume'] = [150, None]
+        updated = await ingest(pg_session, ingest_columns)
+        await pg_session.commit()
+
+        volume = await pg_session.scalar(
+            select(SpimexDailyRollup.volume).filter_by(oil_id='A592'))
+
+        assert inserted == {'inserted': 2, 'updated': 0, 'unchanged': 0}
+        assert unchanged == {'inserted': 0, 'updated': 0, 'unchanged': 2}
+        assert updated == {'inserted': 0, 'updated': 1, 'unchanged': 1}
+        assert volume == 150
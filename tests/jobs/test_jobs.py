@@ -0,0 +1,205 @@
+import asyncio
+import datetime as dt
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+
+from core.config import settings
+from core.jobs import JobManager, RedisJobBackend, job_manager
+from core.store import bulletin_store
+from services.tasks import run_spimex_job, submit_spimex_job
+
+
+async def wait_job(manager: JobManager, job_id: str) -> dict:
+    for _ in range(100):
+        job = await manager.get_status(job_id)
+        if job['state'] in ('done', 'failed'):
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError('Задание не завершилось')
+
+
+@pytest.fixture
+def job_columns():
+    """Колонки одной загруженной даты."""
+
+    return {
+        'exchange_product_id': ['A592ACN060F'],
+        'exchange_product_name': ['Бензин'],
+        'oil_id': ['A592'],
+        'delivery_basis_id': ['ACN'],
+        'delivery_basis_name': ['ст. Ачинск'],
+        'delivery_type_id': ['F'],
+        'volume': [120],
+        'total': [Decimal('6240000')],
+        'count': [4],
+        'date': [dt.date(2025, 9, 12)]
+    }
+
+
+class TestJobManager:
+    """Тесты для очереди фоновых заданий."""
+
+    @pytest.mark.asyncio
+    async def test_runs_job(self):
+        """Тест выполнения задания воркером."""
+
+        payloads = []
+
+        async def handler(job, payload):
+            payloads.append(payload)
+            await job.update(progress=1)
+
+        job_manager.start_worker(handler)
+        job_id = await job_manager.submit({'value': 1}, progress=0)
+        job = await wait_job(job_manager, job_id)
+
+        assert payloads == [{'value': 1}]
+        assert job['state'] == 'done'
+        assert job['progress'] == 1
+        assert job['seconds'] >= 0
+        assert job['started_at'] <= job['finished_at']
+
+    @pytest.mark.asyncio
+    async def test_failed_job(self):
+        """Тест состояния задания, завершившегося ошибкой."""
+
+        async def handler(job, payload):
+            raise ValueError('Нет бюллетеня')
+
+        job_manager.start_worker(handler)
+        job = await wait_job(job_manager, await job_manager.submit({}))
+
+        assert job['state'] == 'failed'
+        assert job['error'] == 'Нет бюллетеня'
+
+    @pytest.mark.asyncio
+    async def test_worker_survives_errors(self):
+        """Тест работы воркера после ошибок очереди и записи статуса."""
+
+        backend = job_manager.get_backend()
+        pop, save = backend.pop, backend.save
+        failures = {'pop': 1, 'save': 1}
+
+        async def flaky_pop(timeout):
+            if failures['pop']:
+                failures['pop'] -= 1
+                raise ConnectionError('Очередь недоступна')
+            return await pop(timeout)
+
+        async def flaky_save(job_id, status):
+            if status.get('state') == 'running' and failures['save']:
+                failures['save'] -= 1
+                raise ConnectionError('Статус не записан')
+            await save(job_id, status)
+
+        async def handler(job, payload):
+            pass
+
+        with patch.object(settings, 'JOB_POLL_TIMEOUT', 0.01), \
+             patch.object(backend, 'pop', flaky_pop), \
+             patch.object(backend, 'save', flaky_save):
+            job_manager.start_worker(handler)
+            lost = await job_manager.submit({})
+            job = await wait_job(job_manager,
+                                 await job_manager.submit({}))
+
+        assert failures == {'pop': 0, 'save': 0}
+        assert job['state'] == 'done'
+        assert (await job_manager.get_status(lost))['state'] == 'queued'
+
+    def test_unknown_backend(self):
+        """Тест ошибки для неизвестного бэкенда."""
+
+        with patch.object(settings, 'JOB_BACKEND', 'kafka'):
+            with pytest.raises(ValueError):
+                JobManager().get_backend()
+
+    @pytest.mark.asyncio
+    async def test_redis_backend(self):
+        """Тест очереди и статусов в Redis."""
+
+        backend = RedisJobBackend()
+
+        await backend.push('job1', {'dates': ['12.09.2025']})
+        await backend.save('job1', {'state': 'queued'})
+
+        assert await backend.pop(0.1) == ('job1', {'dates': ['12.09.2025']})
+        assert await backend.pop(0.1) is None
+        assert await backend.load('job1') == {'state': 'queued'}
+        assert await backend.load('job2') is None
+
+
+class TestSpimexJob:
+    """Тесты для задания загрузки бюллетеней."""
+
+    @pytest.mark.asyncio
+    async def test_progress_and_counts(self, session_factory, job_columns):
+        """Тест хода выполнения по датам и итоговых счетчиков."""
+
+        async def get_spimex(client, times, on_date):
+            await on_date('12.09.2025', rows=1, seconds=0.5)
+            await on_date('11.09.2025', seconds=0.1, error='Нет файла')
+            await on_date('10.09.2025', rows=0, seconds=0.1, skipped=True)
+            return job_columns, {'11.09.2025': 'Нет файла'}
+
+        job_id = await submit_spimex_job(
+            ('12.09.2025', '11.09.2025', '10.09.2025'))
+        assert (await job_manager.get_status(job_id))['stage'] == 'queued'
+
+        with patch('services.tasks.get_spimex', get_spimex):
+            job_manager.start_worker(
+                lambda job, payload: run_spimex_job(
+                    job, payload, session_factory=session_factory))
+            job = await wait_job(job_manager, job_id)
+
+        assert job['state'] == 'done'
+        assert job['stage'] == 'done'
+        assert job['counts'] == {'inserted': 1, 'updated': 0,
+                                 'unchanged': 0}
+        assert job['dates']['12.09.2025'] == {
+            'state': 'parsed', 'rows': 1, 'seconds': 0.5, 'error': None}
+        assert job['dates']['11.09.2025']['error'] == 'Нет файла'
+        assert job['failed_dates'] == ['11.09.2025']
+        assert job['dates']['10.09.2025']['state'] == 'unchanged'
+
+    @pytest.mark.asyncio
+    async def test_marks_ingested(self, session_factory, job_columns):
+        """Тест отметки записанных файлов после фиксации транзакции."""
+
+        async def get_spimex(client, times, on_date):
+            for time in times:
+                await bulletin_store.save(time, time.encode())
+            return job_columns, {'11.09.2025': 'Нет таблицы'}
+
+        job_id = await submit_spimex_job(('12.09.2025', '11.09.2025'))
+
+        with patch('services.tasks.get_spimex', get_spimex):
+            job_manager.start_worker(
+                lambda job, payload: run_spimex_job(
+                    job, payload, session_factory=session_factory))
+            assert (await wait_job(job_manager, job_id))['state'] == 'done'
+
+        ingested = await bulletin_store.load('12.09.2025')
+        assert ingested['ingested'] == ingested['sha256']
+        assert (await bulletin_store.load('11.09.2025'))['ingested'] is None
+
+    @pytest.mark.asyncio
+    async def test_all_dates_failed(self, session_factory):
+        """Тест ошибки задания, если не загрузилась ни одна дата."""
+
+        async def get_spimex(client, times, on_date):
+            return {}, {time: 'Нет файла' for time in times}
+
+        job_id = await submit_spimex_job(('12.09.2025',))
+
+        with patch('services.tasks.get_spimex', get_spimex):
+            job_manager.start_worker(
+                lambda job, payload: run_spimex_job(
+                    job, payload, session_factory=session_factory))
+            job = await wait_job(job_manager, job_id)
+
+        assert job['state'] == 'failed'
+        assert job['stage'] == 'failed'
+        assert job['failed_dates'] == ['12.09.2025']
@@ -1,4 +1,17 @@
+from io import BytesIO
+
+import aiohttp
+import pandas as pd
 import pytest
+import pytest_asyncio
+
+
+@pytest_asyncio.fixture
+async def http_client():
+    """HTTP-сессия, подставляемая в функции парсинга вместо общей."""
+
+    async with aiohttp.ClientSession() as client:
+        yield client
 
 
 @pytest.fixture
@@ -6,11 +19,64 @@ def get_time():
     return '12.09.2025'
 
 
+@pytest.fixture
+def index_pages():
+    """Две страницы списка бюллетеней, связанные пагинацией."""
+
+    def page(dates, next_href=None):
+        items = ''.join(
+            f"""
+            <div class="accordeon-inner__wrap-item">
+                <span>{date}</span>
+                <a class="accordeon-inner__item-title link xls"
+                href="/f/{date[:2]}{date[3:5]}.xls?r=1">Скачать</a>
+            </div>""" for date in dates)
+        pagination = (
+            f"""<div class="bx-pagination"><ul>
+            <li class="bx-pag-next"><a href="{next_href}">След.</a></li>
+            </ul></div>""" if next_href else '')
+        return (f'<div id="comp_d609bce6ada86eff0b6f7e49e6bae904">'
+                f'{items}</div>{pagination}')
+
+    return [page(('12.09.2025', '11.09.2025'), '?page=page-2'),
+            page(('10.09.2025', '09.09.2025'), '?page=page-3')]
+
+
+@pytest.fixture
+def bulletin_df():
+    """Фикстура бюллетеня в том виде, в каком его читает pandas."""
+
+    return pd.DataFrame({
+        'Форма СЭТ-БТ': ['Бюллетень',
+                         'Единица измерения: Метрическая тонна',
+                         'Код Инструмента', None, 'A001B02C', 'Итого:'],
+        'Unnamed: 2': [None, None, 'Наименование', None, 'Product 1', None],
+        'Unnamed: 3': [None, None, 'Базис', None, 'Basis 1', None],
+        'Unnamed: 4': [None, None, 'Объем', None, 100, 100],
+        'Unnamed: 5': [None, None, 'Сумма', None, 5000.5, 5000.5],
+        'Unnamed: 14': [None, None, 'Количество', None, 5, 5]
+    })
+
+
+@pytest.fixture
+def bulletin_content(bulletin_df):
+    """Бюллетень bulletin_df в виде xlsx с колонками на местах из файла."""
+
+    sheet = pd.DataFrame(None, index=range(len(bulletin_df) + 1),
+                         columns=range(16), dtype=object)
+    for position, name in zip((1, 2, 3, 4, 5, 14), bulletin_df.columns):
+        sheet[position] = [name if position == 1 else None,
+                           *bulletin_df[name]]
+    buffer = BytesIO()
+    sheet.to_excel(buffer, index=False, header=False, engine='openpyxl')
+    return buffer.getvalue()
+
+
 @pytest.fixture
 def get_row_spimex():
-    """Фикстура возвращает тестовые сырые данные Spimex."""
+    """Фикстура возвращает тестовые срезы таблиц торгов Spimex."""
 
-    return [[
+    return [pd.DataFrame([
         {
             'Форма СЭТ-БТ': 'A001B02C',
             'Unnamed: 2': 'Product 1',
@@ -19,7 +85,7 @@ def get_row_spimex():
             'Unnamed: 5': '5000.50',
             'Unnamed: 14': '5'
         }
-    ], [
+    ]), pd.DataFrame([
         {
             'Форма СЭТ-БТ': 'A002B03D',
             'Unnamed: 2': 'Product 2',
@@ -28,4 +94,19 @@ def get_row_spimex():
             'Unnamed: 5': '6000.75',
             'Unnamed: 14': '3'
         }
-    ]]
+    ])]
+
+
+@pytest.fixture
+def table_df():
+    """Срез таблицы торгов с пропущенными сделками и числами из Excel."""
+
+    return pd.DataFrame({
+        'Форма СЭТ-БТ': ['A592ACN060F', 'DT5KUFA001A', 'A100BEZ002J',
+                         'MZ12NVY003F'],
+        'Unnamed: 2': ['Бензин 1', 'ДТ 2', 'Бензин 3', 'Мазут 4'],
+        'Unnamed: 3': ['ст. 1', 'ст. 2', 'ст. 3', 'ст. 4'],
+        'Unnamed: 4': [120, '-', 0, 35.0],
+        'Unnamed: 5': [6240000, '-', 0, 1750000.5],
+        'Unnamed: 14': [4, '-', 1, 2]
+    })
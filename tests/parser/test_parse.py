@@ -1,22 +1,62 @@
+import asyncio
+import hashlib
+from datetime import datetime
 from decimal import Decimal
-import unittest
 from unittest.mock import patch
 from io import BytesIO
 
 import pytest
 import pandas as pd
 from aioresponses import aioresponses
+from yarl import URL
 
-from services.parse import (url, parse_href, download_file,
-                            save_filtered_csv, process_time,
-                            get_objects, get_spimex)
+from models.spimex import SpimexTradingResults
+from services.parse import (url, parse_href, fetch_index, download_file,
+                            find_row, process_time, Download,
+                            parse_bulletin, get_columns,
+                            get_spimex, read_bulletin, get_excel_engine)
+from services import parse
+from core.config import settings, Settings
+from core.executor import ParseExecutor
+from core.store import bulletin_store
+
+
+def legacy_get_objects(time, data):
+    """Прежнее построчное преобразование для проверки совпадения."""
+
+    spimex_objects = []
+    for row in data:
+        if row['Unnamed: 14'] != '-':
+            spimex_objects.append(SpimexTradingResults(
+                exchange_product_id=row['Форма СЭТ-БТ'],
+                exchange_product_name=row['Unnamed: 2'],
+                oil_id=row['Форма СЭТ-БТ'][:4],
+                delivery_basis_id=row['Форма СЭТ-БТ'][4:7],
+                delivery_basis_name=row['Unnamed: 3'],
+                delivery_type_id=row['Форма СЭТ-БТ'][-1],
+                volume=int(row['Unnamed: 4']) if row['Unnamed: 4'] else None,
+                total=Decimal(
+                    str(row['Unnamed: 5'])) if row['Unnamed: 5'] else None,
+                count=int(row['Unnamed: 14']) if row['Unnamed: 14'] else None,
+                date=datetime.strptime(time, '%d.%m.%Y').date()
+            ))
+    return spimex_objects
+
+
+XLS_HASH = hashlib.sha256(b'xls').hexdigest()
+
+
+def make_download(*args):
+    """Результат download_file с содержимым b'xls'."""
+
+    return Download(BytesIO(b'xls'), XLS_HASH, None, None)
 
 
 class TestParse:
     """Тесты для модуля парсинга данных Spimex."""
 
     @pytest.mark.asyncio
-    async def test_parse_href(self, get_time):
+    async def test_parse_href(self, http_client, get_time):
         """Тест парсинга ссылки из HTML контента."""
 
         time_to_find = get_time
@@ -32,11 +72,43 @@ class TestParse:
 
         with aioresponses() as m:
             m.get(url, body=html_content, status=200)
-            result = await parse_href(url, time_to_find)
+            result = await parse_href(http_client, url, time_to_find)
             assert result == "https://spimex.com/some/path/file.xls"
 
     @pytest.mark.asyncio
-    async def test_download_file(self):
+    async def test_fetch_index(self, http_client, index_pages):
+        """Тест построения индекса по страницам списка с пагинацией."""
+
+        times = ('12.09.2025', '10.09.2025')
+
+        with aioresponses() as m:
+            m.get(url, body=index_pages[0], status=200)
+            m.get(f'{url}?page=page-2', body=index_pages[1], status=200)
+            result = await fetch_index(http_client, url, times)
+
+            assert result['12.09.2025'] == 'https://spimex.com/f/1209.xls'
+            assert result['10.09.2025'] == 'https://spimex.com/f/1009.xls'
+            assert sum(map(len, m.requests.values())) == 2
+
+            cached = await fetch_index(http_client, url, times)
+            assert cached == result
+            assert sum(map(len, m.requests.values())) == 2
+
+    @pytest.mark.asyncio
+    async def test_fetch_index_invalid_date(self, http_client):
+        """Тест даты не в формате списка без обхода страниц."""
+
+        with aioresponses() as m:
+            result = await fetch_index(http_client, url, ('2025-09-12',))
+
+            assert result == {}
+            assert not m.requests
+
+        with pytest.raises(ValueError, match='dd.mm.YYYY'):
+            await process_time(http_client, '2025-09-12', None)
+
+    @pytest.mark.asyncio
+    async def test_download_file(self, http_client):
         """Тест загрузки файла с данными."""
 
         test_data = pd.DataFrame({'Column1': [1, 2, 3],
@@ -47,63 +119,277 @@ class TestParse:
 
         with aioresponses() as m:
             m.get(url, body=buffer.getvalue(), status=200)
-            result = await download_file(url)
-            pd.testing.assert_frame_equal(result, test_data)
+            result = await download_file(http_client, url)
 
-    @pytest.mark.asyncio
-    async def test_save_filtered_csv(self):
-        """Тест сохранения отфильтрованного CSV файла."""
+        with result.file:
+            assert result.file.read() == buffer.getvalue()
+        assert result.sha256 == hashlib.sha256(buffer.getvalue()).hexdigest()
 
-        test_df = pd.DataFrame({
-            'Column1': ['Единица измерения: Метрическая тонна', 'data1'],
-            'Column2': ['extra info', 'data2']
-        })
+    def test_find_row_skips_numeric_columns(self):
+        """Тест поиска маркера при числовых колонках листа."""
+
+        test_df = pd.DataFrame({'num': [1.0, 2.0, 3.0],
+                                'text': [None, 'Итого:', 'Итого: всего']})
+        assert find_row(test_df, 'Итого:', exact=True) == 1
+        assert find_row(test_df, 'всего') == 2
+        assert find_row(test_df, 'Итого:', start=2, exact=True) is None
+
+    @pytest.mark.parametrize('calamine', (False, True))
+    def test_read_bulletin(self, get_time, bulletin_df, bulletin_content,
+                           calamine):
+        """Тест чтения таблицы торгов без загрузки всего листа."""
+
+        if calamine and parse.python_calamine is None:
+            pytest.skip('python-calamine не установлен')
+        with patch.object(parse, 'python_calamine',
+                          parse.python_calamine if calamine else None):
+            result = read_bulletin(bulletin_content)
+
+        assert list(result.columns) == list(bulletin_df.columns)
+        assert (get_columns(get_time, result) ==
+                get_columns(get_time, bulletin_df.iloc[4:5]))
+
+    def test_read_bulletin_long_header(self, get_time, bulletin_df,
+                                       bulletin_content):
+        """Тест поиска таблицы за пределами первых строк листа."""
+
+        with patch.object(parse, 'HEADER_SCAN_ROWS', 2):
+            result = read_bulletin(bulletin_content)
 
-        with patch('builtins.open', unittest.mock.mock_open()), \
-             patch('pandas.DataFrame.to_excel') as mock_to_excel:
+        assert (get_columns(get_time, result) ==
+                get_columns(get_time, bulletin_df.iloc[4:5]))
 
-            result = await save_filtered_csv(test_df, '12.09.2025')
-            assert result == "spimex_12_09_2025.xls"
-            mock_to_excel.assert_called_once()
+    def test_read_bulletin_without_table(self):
+        """Тест бюллетеня без таблицы торгов."""
 
+        buffer = BytesIO()
+        pd.DataFrame({'col1': [1, 2], 'col2': ['a', 'b']}).to_excel(
+            buffer, index=False, engine='openpyxl')
+        assert read_bulletin(buffer.getvalue()) is None
+
+    def test_get_excel_engine(self):
+        """Тест выбора движка по формату файла."""
+
+        with patch.object(parse, 'python_calamine', None):
+            assert get_excel_engine(b'\xd0\xcf\x11\xe0xls') == 'xlrd'
+            assert get_excel_engine(b'PK\x03\x04xlsx') == 'openpyxl'
+        with patch.object(parse, 'python_calamine', object()):
+            assert get_excel_engine(b'PK\x03\x04xlsx') == 'calamine'
+
+    @pytest.mark.parametrize('archive', (False, True))
     @pytest.mark.asyncio
-    async def test_process_time(self, get_time):
-        """Тест обработки данных по времени."""
+    async def test_process_time(self, http_client, get_time, bulletin_df,
+                                bulletin_store_dir, archive):
+        """Тест обработки данных по времени из сохраненного файла."""
 
         test_time = get_time
-        test_df = pd.DataFrame({'col1': [1, 2], 'col2': ['a', 'b']})
 
-        with patch('services.parse.parse_href', return_value="test_url"), \
-             patch('services.parse.download_file', return_value=test_df), \
-             patch('services.parse.save_filtered_csv',
-                   return_value="test.xls"), \
-             patch('pandas.read_excel', return_value=test_df):
+        with patch('services.parse.download_file',
+                   side_effect=make_download), \
+             patch('services.parse.read_bulletin',
+                   return_value=bulletin_df.iloc[4:5]) as mock_read, \
+             patch('services.parse.archive_bulletin',
+                   return_value="test.xls") as mock_save:
+
+            result = await process_time(http_client, test_time, 'test_url',
+                                        archive=archive)
+            assert result == get_columns(test_time, bulletin_df.iloc[4:5])
+            mock_read.assert_called_once_with(str(
+                bulletin_store_dir / '2025-09-12' / XLS_HASH))
+            assert mock_save.called is archive
 
-            result = await process_time(test_time)
-            assert result == test_df.to_dict('records')
+    @pytest.mark.asyncio
+    async def test_process_time_without_table(self, http_client, get_time):
+        """Тест ошибки при отсутствии таблицы торгов в файле."""
+
+        with patch('services.parse.download_file',
+                   side_effect=make_download), \
+             patch('services.parse.read_bulletin', return_value=None):
+            with pytest.raises(ValueError):
+                await process_time(http_client, get_time, 'test_url')
+
+    @pytest.mark.asyncio
+    async def test_process_time_stored(self, http_client, get_time,
+                                       bulletin_df, bulletin_store_dir):
+        """Тест условного скачивания и пропуска уже записанного файла."""
 
-    def test_get_objects(self, get_row_spimex):
-        """Тест преобразования сырых данных в объекты Spimex."""
+        file_url = 'https://spimex.com/f/1209.xls'
+        headers = {'ETag': '"v1"',
+                   'Last-Modified': 'Fri, 12 Sep 2025 18:00:00 GMT'}
+
+        with aioresponses() as m, \
+             patch('services.parse.read_bulletin',
+                   return_value=bulletin_df.iloc[4:5]) as mock_read:
+            m.get(file_url, body=b'xls', headers=headers)
+            m.get(file_url, status=304)
+            m.get(file_url, status=304)
+
+            first = await process_time(http_client, get_time, file_url)
+            second = await process_time(http_client, get_time, file_url)
+            await bulletin_store.mark_ingested(get_time)
+            third = await process_time(http_client, get_time, file_url)
+
+            requests = m.requests[('GET', URL(file_url))]
+
+        path = bulletin_store_dir / '2025-09-12' / XLS_HASH
+        assert path.read_bytes() == b'xls'
+        assert first == second == get_columns(get_time, bulletin_df.iloc[4:5])
+        assert third is None
+        assert [call.args for call in mock_read.call_args_list] == \
+            [(str(path),), (str(path),)]
+        assert 'If-None-Match' not in requests[0].kwargs['headers']
+        assert requests[1].kwargs['headers'] == {
+            'If-None-Match': '"v1"',
+            'If-Modified-Since': 'Fri, 12 Sep 2025 18:00:00 GMT'}
+
+    @pytest.mark.asyncio
+    async def test_process_time_unchanged_content(self, http_client,
+                                                  get_time, bulletin_df):
+        """Тест пропуска разбора, если скачан тот же файл без ETag."""
+
+        with patch('services.parse.download_file',
+                   side_effect=make_download), \
+             patch('services.parse.read_bulletin',
+                   return_value=bulletin_df.iloc[4:5]) as mock_read:
+            assert await process_time(http_client, get_time, 'test_url')
+            await bulletin_store.mark_ingested(get_time)
+            assert await process_time(http_client, get_time,
+                                      'test_url') is None
+
+        mock_read.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_parse_bulletin_in_process_pool(self, get_time,
+                                                  bulletin_content):
+        """Тест разбора бюллетеня в отдельном процессе пула."""
+
+        content = bulletin_content
+        executor = ParseExecutor()
+        with patch.object(settings, 'PARSE_WORKERS', 1):
+            try:
+                result = await executor.run(parse_bulletin, content,
+                                            get_time)
+            finally:
+                await executor.close()
+
+        assert result == parse_bulletin(content, get_time)
+        assert result['exchange_product_id'] == ['A001B02C']
+
+    @pytest.mark.parametrize(('web', 'workers'), ((1, 8), (4, 2), (16, 1)))
+    def test_parse_workers_split_by_web_workers(self, monkeypatch, web,
+                                                workers):
+        """Тест деления ядер между пулами воркеров uvicorn."""
+
+        monkeypatch.delenv('PARSE_WORKERS', raising=False)
+        monkeypatch.setenv('WEB_CONCURRENCY', str(web))
+        with patch('core.config.os.cpu_count', return_value=8):
+            assert Settings().PARSE_WORKERS == workers
+
+    def test_get_columns_parity(self, get_time, table_df):
+        """Тест совпадения колонок с построчным преобразованием."""
+
+        columns = get_columns(get_time, table_df)
+        expected = legacy_get_objects(get_time,
+                                      table_df.to_dict(orient='records'))
+
+        result = [[(value, type(value)) for value in row]
+                  for row in zip(*columns.values())]
+        assert len(result) == 3
+        assert result == [[(getattr(obj, field), type(getattr(obj, field)))
+                           for field in columns] for obj in expected]
+
+    def test_get_columns_skips_blank_code(self, get_time, table_df):
+        """Тест пропуска строк таблицы без кода инструмента."""
+
+        blank = pd.DataFrame({
+            'Форма СЭТ-БТ': [None, float('nan'), ' '],
+            'Unnamed: 2': [None, float('nan'), None],
+            'Unnamed: 3': [None] * 3,
+            'Unnamed: 4': [None, 10, None],
+            'Unnamed: 5': [None, 500, None],
+            'Unnamed: 14': [None, 1, None]
+        })
+        df = pd.concat([table_df.iloc[:2], blank, table_df.iloc[2:]],
+                       ignore_index=True)
+
+        result = get_columns(get_time, df)
+
+        assert result == get_columns(get_time, table_df)
+        assert 'nan' not in result['exchange_product_id']
+
+    def test_get_columns(self, get_row_spimex):
+        """Тест преобразования сырых данных в колонки Spimex."""
 
         time = "12.09.2025"
 
-        result = get_objects(time, get_row_spimex[0])
+        result = get_columns(time, get_row_spimex[0])
 
-        assert len(result) == 1
-        assert result[0].exchange_product_id == 'A001B02C'
-        assert result[0].volume == 100
-        assert result[0].total == Decimal('5000.50')
-        assert result[0].count == 5
+        assert result['exchange_product_id'] == ['A001B02C']
+        assert result['volume'] == [100]
+        assert result['total'] == [Decimal('5000.50')]
+        assert result['count'] == [5]
 
     @pytest.mark.asyncio
-    async def test_get_spimex(self, get_row_spimex):
+    async def test_get_spimex(self, http_client, get_row_spimex):
         """Тест основного процесса получения данных Spimex."""
 
         test_times = ("12.09.2025", "13.09.2025")
 
-        with patch('services.parse.process_time', side_effect=get_row_spimex):
-            result = await get_spimex(test_times)
+        index = {time: f'{time}.xls' for time in test_times}
+
+        with patch('services.parse.fetch_index', return_value=index), \
+             patch('services.parse.process_time',
+                   side_effect=[get_columns(time, df) for time, df
+                                in zip(test_times, get_row_spimex)]):
+            result, failures = await get_spimex(http_client, test_times)
+
+            assert result['exchange_product_id'] == ['A001B02C', 'A002B03D']
+            assert result['volume'] == [100, 200]
+            assert result['count'] == [5, 3]
+            assert failures == {}
+
+    @pytest.mark.asyncio
+    async def test_get_spimex_partial(self, http_client, get_row_spimex):
+        """Тест частичного результата при ошибке одной из дат."""
+
+        test_times = ("12.09.2025", "13.09.2025")
+        reports = []
+
+        async def on_date(time, **report):
+            reports.append((time, report.get('error')))
+
+        with patch('services.parse.fetch_index', return_value={}), \
+             patch('services.parse.process_time',
+                   side_effect=[get_columns(test_times[0], get_row_spimex[0]),
+                                ValueError('Нет файла')]):
+            result, failures = await get_spimex(http_client, test_times,
+                                                on_date=on_date)
+
+        assert result['exchange_product_id'] == ['A001B02C']
+        assert failures == {'13.09.2025': 'Нет файла'}
+        assert sorted(reports) == [('12.09.2025', None),
+                                   ('13.09.2025', 'Нет файла')]
+
+    @pytest.mark.asyncio
+    async def test_get_spimex_concurrency(self, http_client, get_row_spimex):
+        """Тест ограничения числа одновременно обрабатываемых дат."""
+
+        test_times = tuple(f'{day:02}.09.2025' for day in range(1, 11))
+        running = []
+        peak = []
+
+        async def process_time(client, time, href):
+            running.append(time)
+            peak.append(len(running))
+            await asyncio.sleep(0.01)
+            running.remove(time)
+            return get_columns(time, get_row_spimex[0])
+
+        with patch('services.parse.fetch_index', return_value={}), \
+             patch('services.parse.process_time', process_time), \
+             patch.object(settings, 'SPIMEX_CONCURRENCY', 3):
+            result, failures = await get_spimex(http_client, test_times)
 
-            assert len(result) == 2
-            assert result[0].exchange_product_id == 'A001B02C'
-            assert result[1].exchange_product_id == 'A002B03D'
+        assert max(peak) == 3
+        assert len(result['date']) == len(test_times)
+        assert failures == {}
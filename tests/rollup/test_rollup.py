@@ -0,0 +1,99 @@
+import datetime as dt
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import select, text
+
+from manage import parse_args, backfill, check
+from models.spimex import SpimexDailyRollup
+from services.ingest import ingest
+from services.rollup import backfill_rollup, check_rollup, ensure_rollup
+
+
+@pytest.fixture
+def rollup_columns():
+    """Две строки одного нефтепродукта и базиса за один день."""
+
+    return {
+        'exchange_product_id': ['A592ACN060F', 'A592ACN005F'],
+        'exchange_product_name': ['Бензин', 'Бензин'],
+        'oil_id': ['A592', 'A592'],
+        'delivery_basis_id': ['ACN', 'ACN'],
+        'delivery_basis_name': ['ст. Ачинск', 'ст. Ачинск'],
+        'delivery_type_id': ['F', 'F'],
+        'volume': [120, 30],
+        'total': [Decimal('6240000'), Decimal('1500000.50')],
+        'count': [4, 1],
+        'date': [dt.date(2025, 9, 12)] * 2
+    }
+
+
+async def get_rollup(session):
+    result = await session.execute(
+        select(SpimexDailyRollup).order_by(SpimexDailyRollup.date,
+                                           SpimexDailyRollup.oil_id))
+    return [(row.date, row.oil_id, row.volume, row.total, row.count)
+            for row in result.scalars()]
+
+
+class TestRollup:
+    """Тесты для таблицы дневных сумм."""
+
+    @pytest.mark.asyncio
+    async def test_ingest_updates_rollup(self, db_session, rollup_columns):
+        """Тест пересчета дневных сумм в транзакции загрузки."""
+
+        await ingest(db_session, rollup_columns)
+        await db_session.commit()
+        assert await get_rollup(db_session) == [
+            (dt.date(2025, 9, 12), 'A592', 150, Decimal('7740000.50'), 5)]
+
+        rollup_columns['volume'] = [100, 30]
+        await ingest(db_session, rollup_columns)
+        await db_session.commit()
+        assert (await get_rollup(db_session))[0][2] == 130
+        assert await check_rollup(db_session) == []
+
+    @pytest.mark.asyncio
+    async def test_backfill_and_check(self, db_session, pull_spimex):
+        """Тест заполнения и сверки дневных сумм."""
+
+        assert await check_rollup(db_session) == [
+            dt.date(2025, 1, day) for day in range(15, 20)]
+
+        assert await backfill_rollup(db_session,
+                                     start_date=dt.date(2025, 1, 16)) == 4
+        assert await check_rollup(db_session) == [dt.date(2025, 1, 15)]
+        assert len(await get_rollup(db_session)) == 4
+
+        await db_session.execute(text(
+            'UPDATE spimex_daily_rollup SET volume = 1 '
+            "WHERE date = '2025-01-17'"))
+        await db_session.commit()
+        assert await check_rollup(db_session,
+                                  start_date=dt.date(2025, 1, 16)) == [
+            dt.date(2025, 1, 17)]
+
+    @pytest.mark.asyncio
+    async def test_ensure_rollup(self, db_session, session_factory,
+                                 pull_spimex):
+        """Тест заполнения пустой таблицы сумм при запуске."""
+
+        assert await ensure_rollup(session_factory) == 5
+        assert await check_rollup(db_session) == []
+        assert await ensure_rollup(session_factory) == 0
+
+    @pytest.mark.asyncio
+    async def test_ensure_rollup_empty(self, session_factory):
+        """Тест запуска на пустой базе без заполнения."""
+
+        assert await ensure_rollup(session_factory) == 0
+
+    def test_parse_args(self):
+        """Тест разбора аргументов служебных команд."""
+
+        args = parse_args(['backfill', '--start', '2025-01-15'])
+        assert args.command is backfill
+        assert args.start == dt.date(2025, 1, 15)
+        assert args.end is None
+        assert parse_args(['check']).command is check
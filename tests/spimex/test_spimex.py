@@ -1,7 +1,21 @@
+import asyncio
+import datetime as dt
+import json
+from decimal import Decimal
+
 import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
 
+from core.cache import redis_manager, make_body
 from services.spimex import (get_filters, get_all_spimex, get_last_spimex,
-                             get_dynamics_spimex, get_trading_results_spimex)
+                             get_dynamics_spimex, get_trading_results_spimex,
+                             get_dynamics_cached, get_trading_results_cached,
+                             refresh_spimex_cache, join_bodies,
+                             get_aggregates_spimex, fetch_mappings,
+                             get_date_runs)
+from core.sql import date_trunc
+from models.spimex import SpimexTradingResults
 from schemas.spimex import SpimexModel
 
 
@@ -73,3 +87,222 @@ class TestSpimexDatabaseQueries:
         ]
         sorted_validated = sorted(validated_data, key=lambda x: x['id'])
         assert sorted_validated == spimex_data[:2]
+
+
+async def explain(session, stmt):
+    """Возвращает план выполнения запроса SQLite одной строкой."""
+
+    connection = await session.connection()
+    compiled = stmt.compile(dialect=connection.dialect)
+    params = tuple(
+        value.isoformat() if isinstance(value, dt.date) else value
+        for value in (compiled.params[name]
+                      for name in compiled.positiontup))
+    result = await connection.exec_driver_sql(
+        f'EXPLAIN QUERY PLAN {compiled}', params)
+    return ' '.join(row[-1] for row in result)
+
+
+@pytest.mark.usefixtures('pull_spimex')
+class TestSpimexIndexes:
+    """Тесты использования индексов запросами Spimex."""
+
+    @pytest.mark.parametrize(('stmt', 'index'), (
+        (get_last_spimex(limit=3), 'ix_spimex_date'),
+        (get_dynamics_spimex(start_date=dt.date(2025, 1, 15),
+                             end_date=dt.date(2025, 1, 16)),
+         'ix_spimex_date'),
+        (get_dynamics_spimex(start_date=dt.date(2025, 1, 15),
+                             end_date=dt.date(2025, 1, 16),
+                             oil_id='OIL001',
+                             delivery_basis_id='BASIS001',
+                             delivery_type_id='TYPE001'),
+         'ix_spimex_filters_date'),
+        (get_trading_results_spimex(limit=3), 'ix_spimex_date'),
+        (get_trading_results_spimex(limit=3,
+                                    oil_id='OIL001',
+                                    delivery_basis_id='BASIS001',
+                                    delivery_type_id='TYPE001'),
+         'ix_spimex_filters_date'),
+    ))
+    @pytest.mark.asyncio
+    async def test_query_uses_index(self, db_session, stmt, index):
+        """Тест плана запроса через EXPLAIN QUERY PLAN."""
+
+        plan = await explain(db_session, stmt)
+        assert f'INDEX {index}' in plan, plan
+        assert 'TEMP B-TREE' not in plan, plan
+
+
+@pytest.mark.usefixtures('pull_rollup')
+class TestSpimexAggregates:
+    """Тесты для агрегации торгов в SQL."""
+
+    @pytest.mark.asyncio
+    async def test_group_by_oil(self, db_session):
+        """Тест сумм и VWAP по нефтепродукту."""
+
+        stmt = get_aggregates_spimex(dt.date(2025, 1, 15),
+                                     dt.date(2025, 1, 19),
+                                     group_by=['oil_id'])
+        rows = await fetch_mappings(db_session, stmt)
+
+        assert len(rows) == 4
+        assert rows[0] == {'oil_id': 'OIL001', 'volume': 3000,
+                           'total': Decimal('125001.25'), 'count': 25,
+                           'vwap': Decimal('41.67')}
+
+    @pytest.mark.asyncio
+    async def test_group_by_week(self, db_session):
+        """Тест группировки по неделе с понедельника."""
+
+        stmt = get_aggregates_spimex(dt.date(2025, 1, 15),
+                                     dt.date(2025, 1, 19),
+                                     group_by=['week'],
+                                     oil_id='OIL001')
+        rows = await fetch_mappings(db_session, stmt)
+
+        assert rows == [{'period': dt.date(2025, 1, 13), 'volume': 3000,
+                         'total': Decimal('125001.25'), 'count': 25,
+                         'vwap': Decimal('41.67')}]
+
+    @pytest.mark.asyncio
+    async def test_group_by_date_and_basis(self, db_session):
+        """Тест группировки по дню и базису."""
+
+        stmt = get_aggregates_spimex(dt.date(2025, 1, 15),
+                                     dt.date(2025, 1, 16),
+                                     group_by=['delivery_basis_id', 'date'])
+        rows = await fetch_mappings(db_session, stmt)
+
+        assert [(row['period'], row['delivery_basis_id'], row['volume'])
+                for row in rows] == [(dt.date(2025, 1, 15), 'BASIS001', 1000),
+                                     (dt.date(2025, 1, 16), 'BASIS001', 2000)]
+
+    @pytest.mark.parametrize('group_by', (['week', 'month'], ['price']))
+    def test_invalid_group_by(self, group_by):
+        """Тест ошибки для нескольких периодов и неизвестных полей."""
+
+        with pytest.raises(ValueError):
+            get_aggregates_spimex(dt.date(2025, 1, 15),
+                                  dt.date(2025, 1, 19), group_by=group_by)
+
+    @pytest.mark.parametrize(('period', 'name'), (
+        ('date', 'day'), ('week', 'week'), ('month', 'month')))
+    def test_date_trunc_postgresql(self, period, name):
+        """Тест компиляции date_trunc для PostgreSQL."""
+
+        sql = str(select(date_trunc(period, SpimexTradingResults.date))
+                  .compile(dialect=postgresql.dialect()))
+
+        assert f"CAST(date_trunc('{name}', " in sql
+
+@pytest.mark.usefixtures('pull_spimex')
+class TestSpimexCacheRefresh:
+    """Тесты для сброса и прогрева кэша после загрузки."""
+
+    @pytest.mark.asyncio
+    async def test_refresh_after_ingest(self, session_factory):
+        """Тест сброса затронутых дат и прогрева частых ключей."""
+
+        await get_dynamics_cached(session_factory,
+                                  start_date=dt.date(2025, 1, 15),
+                                  end_date=dt.date(2025, 1, 16))
+        await get_trading_results_cached(session_factory, limit=3)
+
+        keys = await refresh_spimex_cache(session_factory,
+                                          [dt.date(2025, 1, 15)])
+        await asyncio.gather(*redis_manager._background)
+
+        assert keys == ['get_dynamics:None_None_None:2025-01-15',
+                        'trading_results:None_None_None_3']
+        cached = await redis_manager._client.mget(
+            'last_trading_dates:5', 'last_trading_dates:10',
+            'trading_results:None_None_None_5',
+            'get_dynamics:None_None_None:2025-01-16',
+            'get_dynamics:None_None_None:2025-01-15')
+        assert all(cached[:4])
+        assert cached[4] is None
+
+
+@pytest.mark.usefixtures('pull_spimex')
+class TestDynamicsCache:
+    """Тесты для кэширования динамики по дням."""
+
+    def test_get_date_runs(self):
+        """Тест разбиения дней на непрерывные отрезки."""
+
+        days = [dt.date(2025, 1, 15), dt.date(2025, 1, 16),
+                dt.date(2025, 1, 18), dt.date(2025, 2, 1)]
+
+        assert get_date_runs(days) == [
+            (dt.date(2025, 1, 15), dt.date(2025, 1, 16)),
+            (dt.date(2025, 1, 18), dt.date(2025, 1, 18)),
+            (dt.date(2025, 2, 1), dt.date(2025, 2, 1))]
+        assert get_date_runs([]) == []
+
+    @pytest.mark.asyncio
+    async def test_long_range_single_key(self, session_factory,
+                                         spimex_data):
+        """Тест длинного периода одним ключом вместо срезов по дням."""
+
+        body = await get_dynamics_cached(session_factory,
+                                         start_date=dt.date(1990, 1, 1),
+                                         end_date=dt.date(2040, 12, 31))
+
+        assert [item['id'] for item in json.loads(body.body)] == \
+            [item['id'] for item in spimex_data]
+        assert await redis_manager._client.keys('get_dynamics:*') == []
+        assert await redis_manager._client.exists(
+            'dynamics:None_None_None:1990-01-01_2040-12-31')
+
+    @pytest.mark.asyncio
+    async def test_missing_runs(self, session_factory):
+        """Тест загрузки несмежных недостающих дней."""
+
+        await get_dynamics_cached(session_factory,
+                                  start_date=dt.date(2025, 1, 16),
+                                  end_date=dt.date(2025, 1, 17))
+
+        body = await get_dynamics_cached(session_factory,
+                                         start_date=dt.date(2025, 1, 15),
+                                         end_date=dt.date(2025, 1, 19))
+
+        assert [item['id'] for item in json.loads(body.body)] == \
+            [1, 2, 3, 4, 5]
+
+    @pytest.mark.asyncio
+    async def test_future_days_not_cached(self, session_factory,
+                                          db_session, spimex_data):
+        """Тест чтения будущих дней без кэширования."""
+
+        today = dt.date.today()
+        tomorrow = today + dt.timedelta(days=1)
+        data = {**spimex_data[0], 'id': 6, 'date': tomorrow,
+                'total': Decimal(spimex_data[0]['total']),
+                'created_on': dt.datetime.now(),
+                'updated_on': dt.datetime.now()}
+        db_session.add(SpimexTradingResults(**data))
+        await db_session.commit()
+
+        body = await get_dynamics_cached(
+            session_factory, start_date=today,
+            end_date=today + dt.timedelta(days=2))
+
+        assert [item['id'] for item in json.loads(body.body)] == [6]
+        assert await redis_manager._client.keys('get_dynamics:*') == [
+            f'get_dynamics:None_None_None:{today.isoformat()}'.encode()]
+
+
+class TestJoinBodies:
+    """Тесты для склейки закэшированных JSON-массивов."""
+
+    def test_join_skips_empty(self):
+        """Тест склейки срезов с пустыми днями."""
+
+        parts = [make_body([1, 2]), make_body([]), make_body([{'a': 3}])]
+
+        joined = join_bodies(parts)
+
+        assert json.loads(joined.body) == [1, 2, {'a': 3}]
+        assert join_bodies([make_body([])]).body == b'[]'
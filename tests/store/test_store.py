@@ -0,0 +1,70 @@
+import hashlib
+
+import orjson
+import pytest
+
+from core.store import BulletinStore
+
+
+class TestBulletinStore:
+    """Тесты для хранилища скачанных бюллетеней."""
+
+    @pytest.mark.asyncio
+    async def test_save_and_load(self, bulletin_store_dir):
+        """Тест сохранения файла по дате и хэшу с метаданными."""
+
+        store = BulletinStore()
+        assert await store.load('12.09.2025') == {}
+
+        digest = await store.save('12.09.2025', b'v1', '"e1"',
+                                  'Fri, 12 Sep 2025 18:00:00 GMT')
+
+        assert digest == hashlib.sha256(b'v1').hexdigest()
+        assert (bulletin_store_dir / '2025-09-12' / digest).read_bytes() == \
+            b'v1'
+        assert store.get_path('12.09.2025', digest).read_bytes() == b'v1'
+        assert await store.load('12.09.2025') == {
+            'sha256': digest, 'etag': '"e1"',
+            'last_modified': 'Fri, 12 Sep 2025 18:00:00 GMT',
+            'ingested': None}
+
+    @pytest.mark.asyncio
+    async def test_versions_and_ingested(self, bulletin_store_dir):
+        """Тест новых версий файла и отметки о записи в БД."""
+
+        store = BulletinStore()
+        first = await store.save('12.09.2025', b'v1')
+        await store.mark_ingested('12.09.2025')
+        second = await store.save('12.09.2025', b'v2', '"e2"')
+
+        meta = await store.load('12.09.2025')
+        assert meta['sha256'] == second
+        assert meta['ingested'] == first
+        assert sorted(path.name for path in
+                      (bulletin_store_dir / '2025-09-12').iterdir()) == \
+            sorted((first, second, 'meta.json'))
+
+        await store.mark_ingested('12.09.2025')
+        assert (await store.load('12.09.2025'))['ingested'] == second
+
+    @pytest.mark.asyncio
+    async def test_missing_file(self, bulletin_store_dir):
+        """Тест сброса валидаторов, если файла версии нет на диске."""
+
+        store = BulletinStore()
+        digest = await store.save('12.09.2025', b'v1', '"e1"', 'date')
+        (bulletin_store_dir / '2025-09-12' / digest).unlink()
+
+        meta = await store.load('12.09.2025')
+        assert meta['etag'] is None
+        assert meta['last_modified'] is None
+        assert orjson.loads(
+            (bulletin_store_dir / '2025-09-12' / 'meta.json').read_bytes()
+        )['etag'] == '"e1"'
+
+    @pytest.mark.asyncio
+    async def test_mark_unknown_date(self, bulletin_store_dir):
+        """Тест отметки даты, для которой файл не скачивался."""
+
+        await BulletinStore().mark_ingested('12.09.2025')
+        assert not bulletin_store_dir.exists()